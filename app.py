@@ -1,39 +1,102 @@
-from flask import Flask, render_template, request, jsonify, redirect, session, flash
+from flask import (Blueprint, Flask, render_template, request, jsonify, redirect, session, flash, g,
+                   current_app)
 from flask_cors import CORS
-import os
+from werkzeug.local import LocalProxy
+import logging
+import time
+from datetime import datetime
 import pymysql
-from pymysql.cursors import DictCursor
 from pymysql.err import IntegrityError
-from pymysql.cursors import DictCursor
 
-
-
-app = Flask(__name__)
-app.secret_key = "secret-key"
-CORS(app)
-
-#connect to db
-db = pymysql.connect(
-    host="localhost", 
-    user="mrocazap",
-    password="newpassword",
-    database="mrocazap", 
-    cursorclass=DictCursor
-)
+import feed
+import settings
+import swipes
+import keyword_index
+from db_pool import PoolTimeout
+from geo import normalize_loc
+from group_view import (load_group_header, message_json, split_message_page,
+                        MESSAGES_SINCE_SQL, MESSAGES_BEFORE_SQL, MAX_MESSAGE_ID)
+from services import Services
+import instrument
+from instrument import Metrics, Profiler
+
+log = logging.getLogger(__name__)
+
+bp = Blueprint("bubbl", __name__)
+
+#the app's components (pool, caches, indexes, background workers); see services.py
+svc = LocalProxy(lambda: current_app.extensions["bubbl"])
+
+CHAT_LONG_POLL_MAX = 25
+CHAT_KEEPALIVE_SECONDS = 15
+CHAT_STREAM_MAX_SECONDS = 300
+MESSAGE_PAGE_SIZE = 50
+MESSAGE_PAGE_MAX = 200
+
+
+def create_app(config=None):
+    #settings from BUBBL_* env vars, overridden by `config`; no DB connection or thread until a request needs one.
+    #Chat fan-out is per process: forked workers stop trusting their bus and read new messages from MySQL;
+    #with several workers started any other way, set BUBBL_CHAT_BUS_VOUCH=0 (or put a shared broker in front).
+    app = Flask(__name__)
+    app.config.update(settings.from_env())
+    app.config.update(config or {})
+    if app.config["SECRET_KEY"] == settings.DEFAULTS["SECRET_KEY"]:
+        log.warning("BUBBL_SECRET_KEY is not set; sessions are signed with the built-in development key")
+    CORS(app)
+
+    #per-request statement counts / DB time (Server-Timing), per-endpoint percentiles, sampled cProfile
+    app.extensions["bubbl_metrics"] = metrics = Metrics()
+    app.extensions["bubbl_profiler"] = profiler = Profiler(rate=app.config["PROFILE_RATE"])
+    services = app.extensions["bubbl"] = Services(app.config, cursorclass=instrument.cursor_class(metrics))
+    instrument.init_app(app, metrics, profiler, slow_ms=app.config["SLOW_REQUEST_MS"])
+
+    #background threads start with this process's first request (each worker's, after a fork)
+    app.before_request(services.ensure_started)
+    app.teardown_appcontext(release_db)
+    app.register_blueprint(bp)
+
+    #opt-in: load the indexes and busiest decks now, e.g. once in a pre-fork master
+    if app.config["WARMUP"]:
+        services.warmup()
+    return app
+
+def __getattr__(name):
+    #`app:app` for gunicorn / `flask run`, built on first access so importing this module stays free
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+#connect to db (pooled: each request checks out its own connection)
+def get_db():
+    #lazily check out one connection per request, returned in teardown
+    if "db" not in g:
+        g.db = svc.pool.acquire()
+    return g.db
+
+def release_db(exc):
+    conn = g.pop("db", None)
+    if conn is not None:
+        broken = isinstance(exc, (pymysql.OperationalError, pymysql.InterfaceError))
+        svc.pool.release(conn, broken=broken)
+
+@bp.app_errorhandler(PoolTimeout)
+def pool_exhausted(e):
+    return jsonify({"error": "server busy, please retry"}), 503
 
 #helper functions
-def normalize_loc(city: str, state: str) -> str: #Normalize the format of user state and city
-   
-    if not city or not state:
-        return ""
-
-    # Capitalize city properly and make state uppercase
-    city_clean = city.strip().title()
-    state_clean = state.strip().upper()
-
-    return f"{city_clean}, {state_clean}"
-
-@app.route("/")
+def seen_events(cursor, username):
+    #cached set of event ids this user already rated (None when the cache is off)
+    if not svc.seen_cache_enabled:
+        return None
+    seen = svc.seen_cache.get(username)
+    if seen is None:
+        cursor.execute("SELECT event_id FROM User_Event_Ratings WHERE username = %s", (username,))
+        seen = svc.seen_cache.put(username, (row["event_id"] for row in cursor.fetchall()))
+    return seen
+
+@bp.route("/")
 def home(): 
     return redirect("/login")
 
@@ -42,7 +105,7 @@ def home():
 #TODO: need a signup.html
 
 #create User if not already exists - signup
-@app.route("/signup", methods=["GET", "POST"])
+@bp.route("/signup", methods=["GET", "POST"])
 def signup():
     if request.method == "POST":
         username = request.form["username"].strip()
@@ -55,7 +118,8 @@ def signup():
         gender   = request.form["user_gender"].strip().upper()[:1]
 
         # Use DictCursor so fetchone() returns a dict
-        cursor = db.cursor(DictCursor)
+        db = get_db()
+        cursor = db.cursor()
 
         # Pre-check for existing username OR email
         cursor.execute(
@@ -99,14 +163,15 @@ def signup():
     return render_template("signup.html")
 
 
-@app.route("/login", methods=["GET", "POST"])
+@bp.route("/login", methods=["GET", "POST"])
 def login():
     if request.method == "POST":
         username = request.form.get("username", "").strip()
         password = request.form.get("password", "")
 
         # DictCursor so we can access columns by name (user["user_password"])
-        cursor = db.cursor(DictCursor)
+        db = get_db()
+        cursor = db.cursor()
         cursor.execute("SELECT * FROM Users WHERE username = %s LIMIT 1", (username,))
         user = cursor.fetchone()
 
@@ -124,7 +189,7 @@ def login():
     return render_template("login.html")
 
 
-@app.route("/logout")
+@bp.route("/logout")
 def logout(): 
     session.clear()
     return redirect("/login")        
@@ -132,9 +197,7 @@ def logout():
 #TODO: events.html, where each event is a button/card that then calls /select_event/<event_id>
 
 #based on user location from session, find events in that location
-from pymysql.cursors import DictCursor
-
-@app.route("/events")
+@bp.route("/events")
 def find_events(): 
     if "username" not in session: 
         return redirect("/login")
@@ -142,17 +205,44 @@ def find_events():
     city = session["user_city"]
     state = session["user_state"]
     target_location = normalize_loc(city, state)
+    # before get_db(): a cold venue grid loads on its own connection
+    locations = svc.feed_locations(target_location)
 
-    cursor = db.cursor(DictCursor)  
-    cursor.execute(
-        "SELECT * FROM Single_Events WHERE venue_location = %s",
-        (target_location,)
+    # only the first small page is inlined; the deck pulls the rest from /api/events/feed
+    db = get_db()
+    cursor = db.cursor()  
+    username = session["username"]
+    events, next_cursor = feed.fetch_page(
+        cursor, locations,
+        username=username, seen=seen_events(cursor, username),
     )
-    events = cursor.fetchall()
     
-    return render_template("events.html", events=events)
+    return render_template("events.html", events=events, next_cursor=next_cursor)
+
+@bp.route("/api/events/feed")
+def events_feed():
+    if "username" not in session:
+        return jsonify({"error": "unauthorized"}), 401
 
-@app.route("/api/events/<int:event_id>/swipe", methods=["POST"])
+    target_location = normalize_loc(session["user_city"], session["user_state"])
+    username = session["username"]
+    locations = svc.feed_locations(target_location)
+
+    db = get_db()
+    cursor = db.cursor()
+    try:
+        events, next_cursor = feed.fetch_page(
+            cursor, locations,
+            token=request.args.get("cursor"),
+            limit=request.args.get("limit", type=int),
+            username=username, seen=seen_events(cursor, username),
+        )
+    except feed.BadCursor as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({"events": events, "next_cursor": next_cursor})
+
+@bp.route("/api/events/<int:event_id>/swipe", methods=["POST"])
 def swipe_event(event_id):
     if "username" not in session:
         return jsonify({"error": "unauthorized"}), 401
@@ -161,7 +251,7 @@ def swipe_event(event_id):
     choice = (data.get("choice") or "").lower()
 
     username = session["username"]
-    cursor = db.cursor(DictCursor)
+    db = get_db()
 
     # We’ll always return some JSON
     response = {
@@ -172,81 +262,49 @@ def swipe_event(event_id):
         "already_waiting": False,
     }
 
-    rating_value = 1 if choice == "yes" else 0
-    cursor.execute("""
-        INSERT INTO User_Event_Ratings (username, event_id, rating)
-        VALUES (%s, %s, %s)
-        ON DUPLICATE KEY UPDATE rating = VALUES(rating)
-    """, (username, event_id, rating_value))
-    db.commit()
+    # anything that isn't a "yes" is recorded as a pass
+    results = swipes.normalize_swipes([{"event_id": event_id, "choice": "yes" if choice == "yes" else "no"}])
+    result = swipes.apply_swipes(db, username, results,
+                                 counters=svc.popularity_counters, matcher=svc.swipe_matcher())[0]
+    if result["status"] == "unknown_event":
+        return jsonify({"error": "no such event"}), 404
+    svc.after_swipes(username, [result])
 
-    if choice == "yes":
-        # 0) bump popularity for this event
-        cursor.execute(
-            """
-            UPDATE Single_Events
-               SET popularity = COALESCE(popularity, 0) + 1
-             WHERE event_id = %s
-            """,
-            (event_id,),
-        )
+    if result["status"] == "already_waiting":
+        flash("Hang out tight, we're waiting to match you to a group!")
+        return redirect("/events")
 
-        # 0) If already signed up and wating, error
-        cursor.execute("select 1 from Matches where username = %s and event_id = %s and group_id is null limit 1", (username, event_id))
-        if cursor.fetchone() is not None:
-            flash("Hang out tight, we're waiting to match you to a group!")
-            return redirect("/events")
+    if result["group_id"] is not None:
+        return redirect(f"/group/{result['group_id']}")
 
-        # 1) record this user's match for the event
-        cursor.execute(
-            "INSERT INTO Matches (event_id, username) VALUES (%s, %s)",
-            (event_id, username),
-        )
-        db.commit()
+    return jsonify(response)
 
-        # 2) how many matches are still ungrouped for this event?
-        cursor.execute(
-            "SELECT COUNT(*) AS count FROM Matches WHERE event_id = %s AND group_id IS NULL",
-            (event_id,),
-        )
-        record = cursor.fetchone()
-        count = record["count"] if record else 0
+@bp.route("/api/swipes/batch", methods=["POST"])
+def swipe_batch():
+    if "username" not in session:
+        return jsonify({"error": "unauthorized"}), 401
 
-        # 3) if enough, create a group, then assign those matches to it
-        # TODO: change threshold to 10 later or figure out how big the groups should be? 
-        if count >= 2:
-            # create the group
-            cursor.execute(
-                "INSERT INTO Match_Groups (event_id) VALUES (%s)",
-                (event_id,),
-            )
-            db.commit()
+    data = request.get_json(silent=True) or {}
+    items = data.get("swipes")
+    if not isinstance(items, list):
+        return jsonify({"error": "swipes must be a list"}), 400
+    if len(items) > swipes.MAX_BATCH:
+        return jsonify({"error": f"at most {swipes.MAX_BATCH} swipes per batch"}), 413
 
-            # IMPORTANT: get the group_id we just created
-            group_id = cursor.lastrowid
+    username = session["username"]
+    db = get_db()
 
-            # assign all ungrouped matches for this event to this new group
-            cursor.execute(
-                """
-                UPDATE Matches
-                SET group_id = %s
-                WHERE event_id = %s
-                AND group_id IS NULL
-                """,
-                (group_id, event_id),
-            )
-            db.commit()
-            return redirect(f"/group/{group_id}")
+    # all ratings, popularity bumps and matches land in one transaction;
+    # the response is only sent after it commits
+    results = swipes.apply_swipes(db, username, swipes.normalize_swipes(items),
+                                  counters=svc.popularity_counters, matcher=svc.swipe_matcher())
+    svc.after_swipes(username, results)
 
-        db.commit()
-        return jsonify(response)
-
-    # For "no" (or anything else), we don't create a match
-    return jsonify(response)
+    return jsonify({"results": results})
 
 
 '''#create a match based on a selected event
-@app.route("/select_event/<int:event_id>")
+@bp.route("/select_event/<int:event_id>")
 def event_selected(event_id):
     # must be logged in
     if "username" not in session:
@@ -307,44 +365,44 @@ def event_selected(event_id):
 
 
 #group page
-@app.route("/group/<int:group_id>")
+@bp.route("/group/<int:group_id>")
 def group(group_id): 
-    cursor = db.cursor()
-    
-    #get the group based on the group id
-    cursor.execute("select * from Match_Groups where group_id = %s", (group_id,))
-    group = cursor.fetchone() #Does this work??
-    
-    
-    #now get the event info
-    cursor.execute("select * from Single_Events where event_id = %s", (group['event_id'],))
-    event = cursor.fetchone()
-
-    #get ALL the users together
-    cursor.execute("select u.username from Matches m join Users u on m.username = u.username where m.event_id = %s", (group['event_id'],))
-    users = cursor.fetchall()
+    #cached header + latest message page; a cold view is two queries
+    epoch = svc.group_views.epoch()
+    header, page = svc.group_views.get(group_id)
+    if header is None or page is None:
+        cursor = get_db().cursor()
+        if header is None:
+            header = load_group_header(cursor, group_id)
+            if header is None:
+                return "Group not found", 404
+            svc.memberships.put(group_id, (u["username"] for u in header["users"]))
+        if page is None:
+            # latest page of messages in THIS group (newest last); older ones load on demand
+            page = fetch_message_page(cursor, group_id)
+        svc.group_views.put(group_id, header, page, epoch)
+
+    messages, next_before_id = page
+    return render_template("group.html",
+                        group=header["group"], event=header["event"],
+                        users=header["users"], messages=messages,
+                        next_before_id=next_before_id)
 
-    # messages in THIS group (newest last)
-    cursor.execute("""
-        SELECT messages_id, sender, message_content, time_stamp
-        FROM Messages
-        WHERE group_id = %s
-        ORDER BY time_stamp ASC
-    """, (group_id,))
-    messages = cursor.fetchall()
 
-    return render_template("group.html",
-                        group=group, event=event,
-                        users=users, messages=messages)
+def fetch_messages_since(cursor, group_id, since_id, limit=MESSAGE_PAGE_MAX):
+    cursor.execute(MESSAGES_SINCE_SQL, (group_id, since_id, limit))
+    return [message_json(r) for r in cursor.fetchall()]
 
+def fetch_message_page(cursor, group_id, before_id=None, limit=MESSAGE_PAGE_SIZE):
+    #latest `limit` messages (older than before_id), oldest first, plus the cursor for the page before
+    cursor.execute(MESSAGES_BEFORE_SQL, (group_id, before_id or MAX_MESSAGE_ID, limit + 1))
+    return split_message_page(cursor.fetchall(), limit)
 
-@app.route("/api/group/<int:group_id>/messages", methods=["GET", "POST"])
+@bp.route("/api/group/<int:group_id>/messages", methods=["GET", "POST"])
 def api_group_messages(group_id):
     if "username" not in session:
         return jsonify({"error": "unauthorized"}), 401
 
-    cursor = db.cursor()
-
     if request.method == "POST":
         data = request.get_json(silent=True) or {}
         body = (data.get("message") or "").strip()
@@ -353,72 +411,94 @@ def api_group_messages(group_id):
         if len(body) > 300:
             body = body[:300]  # schema uses VARCHAR(300)
 
-        # must belong to this group
-        cursor.execute(
-            "SELECT 1 FROM Matches WHERE group_id=%s AND username=%s LIMIT 1",
-            (group_id, session["username"]),
-        )
-        if not cursor.fetchone():
+        db = get_db()
+        cursor = db.cursor()
+
+        # must belong to this group (cached member set; only a miss or a "no" hits the DB)
+        if not svc.memberships.is_member(cursor, group_id, session["username"]):
             return jsonify({"error": "not a member of this group"}), 403
 
-        cursor.execute(
-            "INSERT INTO Messages (group_id, sender, message_content) VALUES (%s,%s,%s)",
-            (group_id, session["username"], body),
-        )
-        db.commit()
+        # ids must reach the bus in commit order, or a reader could skip one
+        with svc.chat_bus.ordered(group_id):
+            # time_stamp comes from our clock so the reply needs no read-back
+            now = datetime.now().replace(microsecond=0)
+            cursor.execute(
+                "INSERT INTO Messages (group_id, sender, message_content, time_stamp) VALUES (%s,%s,%s,%s)",
+                (group_id, session["username"], body, now),
+            )
+            db.commit()
 
-        new_id = cursor.lastrowid
-        cursor.execute(
-            "SELECT messages_id, sender, message_content, time_stamp FROM Messages WHERE messages_id=%s",
-            (new_id,),
-        )
-        r = cursor.fetchone()
-        return jsonify({
-            "id": r["messages_id"],
-            "sender": r["sender"],
-            "message": r["message_content"],
-            "ts": r["time_stamp"].strftime("%Y-%m-%d %H:%M:%S") if r["time_stamp"] else None,
-        }), 201
-
-    # GET: list messages (support incremental polling by since_id)
+            msg = message_json({"messages_id": cursor.lastrowid, "sender": session["username"],
+                                "message_content": body, "time_stamp": now})
+            svc.message_posted(group_id, msg)
+        return jsonify(msg), 201
+
+    # GET ?since_id=: messages after it, oldest first (polling / catch-up)
     since_id = request.args.get("since_id", type=int)
     if since_id:
-        cursor.execute(
-            """
-            SELECT messages_id, sender, message_content, time_stamp
-            FROM Messages
-            WHERE group_id = %s AND messages_id > %s
-            ORDER BY time_stamp ASC
-            """,
-            (group_id, since_id),
-        )
-    else:
-        cursor.execute(
-            """
-            SELECT messages_id, sender, message_content, time_stamp
-            FROM Messages
-            WHERE group_id = %s
-            ORDER BY time_stamp ASC
-            """,
-            (group_id,),
-        )
-    rows = cursor.fetchall()
-    return jsonify([
-        {
-            "id": r["messages_id"],
-            "sender": r["sender"],
-            "message": r["message_content"],
-            "ts": r["time_stamp"].strftime("%Y-%m-%d %H:%M:%S") if r["time_stamp"] else None,
-        }
-        for r in rows
-    ])
-
-@app.route("/my_group")
+        # ?wait=N turns this into a long-poll; the bus answers without touching MySQL when it can
+        wait = min(max(request.args.get("wait", 0, type=float), 0), CHAT_LONG_POLL_MAX)
+        msgs = svc.chat_bus.wait(group_id, since_id, wait) if wait else svc.chat_bus.read(group_id, since_id)
+        if msgs is not None:
+            return jsonify(msgs)
+
+        cursor = get_db().cursor()
+        msgs = fetch_messages_since(cursor, group_id, since_id)
+        if len(msgs) < MESSAGE_PAGE_MAX:  # a full page means there may be more; don't vouch yet
+            svc.chat_bus.synced(group_id, msgs[-1]["id"] if msgs else since_id)
+        return jsonify(msgs)
+
+    # history: latest page, or the page before ?before_id= when scrolling back
+    limit = min(max(request.args.get("limit", MESSAGE_PAGE_SIZE, type=int), 1), MESSAGE_PAGE_MAX)
+    cursor = get_db().cursor()
+    rows, next_before_id = fetch_message_page(
+        cursor, group_id, before_id=request.args.get("before_id", type=int), limit=limit)
+    return jsonify({"messages": [message_json(r) for r in rows], "next_before_id": next_before_id})
+
+@bp.route("/api/group/<int:group_id>/stream")
+def group_stream(group_id):
+    #Server-Sent Events: pushes new messages as they are published, resumes from Last-Event-ID
+    if "username" not in session:
+        return jsonify({"error": "unauthorized"}), 401
+
+    since_id = (request.headers.get("Last-Event-ID", type=int)
+                or request.args.get("since_id", 0, type=int))
+    # the generator runs after the request context is gone
+    services, dumps = svc._get_current_object(), current_app.json.dumps
+
+    def events():
+        last = since_id
+        # end the stream now and then; EventSource reconnects on its own
+        deadline = time.monotonic() + CHAT_STREAM_MAX_SECONDS
+        yield "retry: 1000\n\n"
+        while time.monotonic() < deadline:
+            msgs = services.chat_bus.wait(group_id, last, CHAT_KEEPALIVE_SECONDS)
+            if msgs is None:
+                # the bus can't vouch for the gap (first reader, restart, or too far behind)
+                with services.pool.connection() as conn:
+                    cursor = conn.cursor()
+                    msgs = fetch_messages_since(cursor, group_id, last)
+                    cursor.close()
+                    conn.commit()
+                if len(msgs) < MESSAGE_PAGE_MAX:
+                    services.chat_bus.synced(group_id, msgs[-1]["id"] if msgs else last)
+            if not msgs:
+                yield ": keepalive\n\n"
+                continue
+            for m in msgs:
+                yield f"id: {m['id']}\ndata: {dumps(m)}\n\n"
+                last = m["id"]
+
+    return current_app.response_class(events(), mimetype="text/event-stream",
+                                      headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@bp.route("/my_group")
 def my_groups():
     if "username" not in session:
         return redirect("/login")
 
     username = session["username"]
+    db = get_db()
     cursor = db.cursor()
 
     # Find groups this user belongs to via Matches → Match_Groups → Single_Events
@@ -434,13 +514,32 @@ def my_groups():
 
     return render_template("my_group.html", groups=groups)
 
-@app.route("/api/hybrid_recommendations")
+@bp.route("/api/hybrid_recommendations")
 def hybrid_recommendations():
     if "username" not in session:
         return jsonify({"error": "unauthorized"}), 401
 
     username = session["username"]
-    cursor = db.cursor(DictCursor)
+
+    # newly loaded events make every cached list stale
+    if svc.new_events():
+        svc.rec_cache.clear()
+
+    payload = svc.rec_cache.get(username)
+    if payload is None:
+        start = time.perf_counter()
+        target_location = normalize_loc(session.get("user_city"), session.get("user_state"))
+        db = get_db()
+        cursor = db.cursor()
+        events = build_recommendations(cursor, username, target_location)
+        payload = current_app.json.dumps(events).encode("utf-8")
+        svc.rec_cache.put(username, payload, build_ms=(time.perf_counter() - start) * 1000)
+
+    return current_app.response_class(payload, mimetype="application/json")
+
+def build_recommendations(cursor, username, target_location):
+    # only events that haven't happened yet are worth recommending
+    since = feed.upcoming_since()
 
     # 1) get the user's interests
     cursor.execute("""
@@ -452,38 +551,33 @@ def hybrid_recommendations():
 
     # fallback if user chose no interests
     if not user_interests:
-        cursor.execute("""
+        sample_ids = svc.event_sampler.sample(20, location=target_location)
+        if not sample_ids:
+            return []
+        placeholders = ",".join(["%s"] * len(sample_ids))
+        cursor.execute(f"""
             SELECT *
             FROM Single_Events
-            ORDER BY RAND()
-            LIMIT 20
-        """)
-        return jsonify(cursor.fetchall())
+            WHERE event_id IN ({placeholders})
+              AND start_at >= %s
+        """, sample_ids + [since])
+        event_map = {e["event_id"]: e for e in cursor.fetchall()}
+        return [event_map[eid] for eid in sample_ids if eid in event_map]
 
-    # 2) find similar users based on shared interests
-    cursor.execute("""
-        SELECT ui2.username, COUNT(*) AS shared
-        FROM User_Interests ui1
-        JOIN User_Interests ui2
-            ON ui1.interest_id = ui2.interest_id
-        WHERE ui1.username = %s
-          AND ui2.username <> %s
-        GROUP BY ui2.username
-        ORDER BY shared DESC
-        LIMIT 10
-    """, (username, username))
-
-    similar_users = [row["username"] for row in cursor.fetchall()]
+    # 2) find similar users based on shared interests (precomputed index)
+    similar_users = svc.similarity_index.neighbors(username)
 
     # 3) events liked (right-swiped) by similar users
     liked_events = []
     if similar_users:
         placeholders = ",".join(["%s"] * len(similar_users))
         cursor.execute(f"""
-            SELECT DISTINCT event_id
-            FROM Matches
-            WHERE username IN ({placeholders})
-        """, similar_users)
+            SELECT DISTINCT m.event_id
+            FROM Matches m
+            JOIN Single_Events e ON e.event_id = m.event_id
+            WHERE m.username IN ({placeholders})
+              AND e.start_at >= %s
+        """, similar_users + [since])
         liked_events = [row["event_id"] for row in cursor.fetchall()]
 
     # 4) content-based events using interest keywords
@@ -498,30 +592,20 @@ def hybrid_recommendations():
     """, (username,))
     keywords = [row["interest_name"] for row in cursor.fetchall()]
 
-    content_events = set()
-    for kw in keywords:
-        cursor.execute("""
-            SELECT event_id
-            FROM Single_Events
-            WHERE event_name LIKE %s
-               OR event_description LIKE %s
-            LIMIT 20
-        """, (f"%{kw}%", f"%{kw}%"))
-        content_events.update([row["event_id"] for row in cursor.fetchall()])
+    # one ranked lookup for all keywords instead of a LIKE scan per keyword
+    if svc.keyword_backend == "fulltext":
+        content_events = set(keyword_index.fulltext_search(cursor, keywords, limit=20 * len(keywords),
+                                                                  since=since))
+    else:
+        content_events = set(svc.event_keywords.search(keywords, limit=20 * len(keywords), since=since))
 
-    # 5) random exploration
-    cursor.execute("""
-        SELECT event_id
-        FROM Single_Events
-        ORDER BY RAND()
-        LIMIT 25
-    """)
-    random_pool = [row["event_id"] for row in cursor.fetchall()]
+    # 5) random exploration (local first)
+    random_pool = svc.event_sampler.sample(25, location=target_location)
 
     # 6) merge all sources
     combined_ids = set(liked_events) | set(content_events) | set(random_pool)
     if not combined_ids:
-        return jsonify([])
+        return []
 
     # 7) scoring
     final_scores = {}
@@ -544,15 +628,37 @@ def hybrid_recommendations():
         SELECT *
         FROM Single_Events
         WHERE event_id IN ({placeholders})
-    """, sorted_ids)
+          AND start_at >= %s
+    """, sorted_ids + [since])
     events = cursor.fetchall()
 
+    # include right-swipes that haven't been flushed to the table yet
+    svc.popularity_counters.merge(events)
+
     # maintain sorted order
     event_map = {e["event_id"]: e for e in events}
-    sorted_events = [event_map[eid] for eid in sorted_ids]
-
-    return jsonify(sorted_events)
+    sorted_events = [event_map[eid] for eid in sorted_ids if eid in event_map]
+
+    return sorted_events
+
+@bp.route("/debug/metrics")
+def debug_metrics():
+    if session.get("username") not in current_app.config["ADMIN_USERS"]:
+        return jsonify({"error": "forbidden"}), 403
+    metrics = current_app.extensions["bubbl_metrics"]
+    profiler = current_app.extensions["bubbl_profiler"]
+    body = {
+        "endpoints": metrics.endpoints(),
+        "top_statements": metrics.top_statements(request.args.get("top", 20, type=int)),
+        "components": svc.stats(),
+        "startup": svc.startup,
+        "profile_rate": profiler.rate,
+    }
+    if request.args.get("profiles"):
+        body["profiles"] = list(profiler.reports)
+    return jsonify(body)
 
 if __name__ == '__main__': 
+    app = create_app()
     app.debug = True
     app.run(host='0.0.0.0', port=5024)
@@ -0,0 +1,419 @@
+"""
+Async entry point for the I/O-bound API routes: swipes, the deck feed,
+recommendations and group chat.
+
+app.py serves every request on a thread that blocks while it waits on
+MySQL. Here the same routes run as coroutines on one event loop, with an
+aiomysql pool, so a waiting request costs a suspended coroutine instead of
+a thread. Chat long-polls and SSE streams wait on ChatBus.wait_async().
+The recommendation stages (neighbours' likes, interest keywords,
+exploration picks) run concurrently under asyncio.gather.
+
+The SQL is the same as the sync app's: feed.range_query, the swipes.*
+statement builders and the group_view message statements. The in-memory
+components (similarity, keyword index, sampler, venue grid) are the same
+classes. They load through a small sync pool, and their first load, which
+blocks, runs on a worker thread. Caches are kept up to date through the
+same Services hooks as app.py (after_swipes, message_posted), and the
+deck honours the same SEEN_CACHE switch. Groups are always formed by the
+background BubbleScheduler, so swipes only queue the user.
+
+The session cookie is the sync app's (same secret key), so a proxy can
+send /api/* here and everything else to app.py:
+
+    hypercorn async_app:app --bind 0.0.0.0:5001
+    python async_app.py
+"""
+
+import asyncio
+import time
+import weakref
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import aiomysql
+from quart import Quart, jsonify, request, session
+
+import feed
+import keyword_index
+import settings
+import swipes
+from db_pool import PoolTimeout
+from geo import normalize_loc
+from group_view import (MAX_MESSAGE_ID, MESSAGES_BEFORE_SQL, MESSAGES_SINCE_SQL, message_json,
+                        split_message_page)
+from services import Services
+
+
+config = settings.from_env()
+app = Quart(__name__)
+app.secret_key = config["SECRET_KEY"]
+
+#request path: aiomysql, autocommit (writes open their own transaction); created on the serving loop
+db_pool = None
+
+#background loaders and flushers: a few blocking connections, used off the event loop.
+#Groups are always formed by the scheduler here, whatever BUBBL_BUBBLE_SCHEDULER says.
+services = Services(dict(config, BUBBLE_SCHEDULER=True), pool_size=config["ASYNC_SYNC_POOL_SIZE"])
+
+chat_locks = weakref.WeakValueDictionary()  # group_id -> asyncio.Lock held around insert + publish
+CHAT_LONG_POLL_MAX = 25
+CHAT_KEEPALIVE_SECONDS = 15
+CHAT_STREAM_MAX_SECONDS = 300
+MESSAGE_PAGE_SIZE = 50
+MESSAGE_PAGE_MAX = 200
+
+
+@app.before_serving
+async def startup():
+    global db_pool
+    params = settings.db_settings(config)
+    params["db"] = params.pop("database")
+    db_pool = await aiomysql.create_pool(minsize=1, maxsize=config["ASYNC_DB_POOL_SIZE"], autocommit=True,
+                                         cursorclass=aiomysql.DictCursor, pool_recycle=3600, **params)
+    if config["WARMUP"]:
+        await asyncio.to_thread(services.warmup)
+
+@app.before_request
+async def start_background():
+    services.ensure_started()
+
+@app.after_serving
+async def shutdown():
+    await asyncio.to_thread(services.stop)
+    db_pool.close()
+    await db_pool.wait_closed()
+
+@app.errorhandler(PoolTimeout)
+async def pool_exhausted(e):
+    return jsonify({"error": "server busy, please retry"}), 503
+
+
+#helper functions
+@asynccontextmanager
+async def connection():
+    #like ConnectionPool.acquire: give up after DB_POOL_TIMEOUT instead of queueing forever
+    timeout = config["DB_POOL_TIMEOUT"]
+    try:
+        conn = await asyncio.wait_for(db_pool.acquire(), timeout)
+    except asyncio.TimeoutError:
+        raise PoolTimeout(f"no DB connection available after {timeout:.1f}s")
+    try:
+        yield conn
+    finally:
+        db_pool.release(conn)
+
+async def fetch_all(conn, sql, params=()):
+    async with conn.cursor() as cur:
+        await cur.execute(sql, params)
+        return list(await cur.fetchall())
+
+async def query(sql, params=()):
+    async with connection() as conn:
+        return await fetch_all(conn, sql, params)
+
+async def seen_events(conn, username):
+    #app.seen_events: cached set of event ids this user already rated (None when the cache is off)
+    if not services.seen_cache_enabled:
+        return None
+    seen = services.seen_cache.get(username)
+    if seen is None:
+        rows = await fetch_all(conn, "SELECT event_id FROM User_Event_Ratings WHERE username = %s", (username,))
+        seen = services.seen_cache.put(username, (row["event_id"] for row in rows))
+    return seen
+
+
+#feed
+async def fetch_unseen(conn, locations, after, limit, seen):
+    #feed._fetch_unseen_cached, awaiting each chunk
+    chunk = max(limit * 2, 20)
+    rows = []
+    while len(rows) <= limit:
+        batch = await fetch_all(conn, *feed.range_query(locations, after, chunk))
+        if not batch:
+            break
+        rows.extend(r for r in batch if r["event_id"] not in seen)
+        after = (batch[-1]["start_at"], batch[-1]["event_id"])
+        if len(batch) < chunk:
+            break
+    return rows
+
+@app.route("/api/events/feed")
+async def events_feed():
+    if "username" not in session:
+        return jsonify({"error": "unauthorized"}), 401
+
+    username = session["username"]
+    try:
+        after = feed.decode_cursor(request.args.get("cursor"), feed.upcoming_since())
+    except feed.BadCursor as e:
+        return jsonify({"error": str(e)}), 400
+    limit = feed.clamp_limit(request.args.get("limit", type=int))
+    locations = await asyncio.to_thread(
+        services.feed_locations, normalize_loc(session["user_city"], session["user_state"]))
+
+    async with connection() as conn:
+        seen = await seen_events(conn, username)
+        if seen is None:
+            # like feed.fetch_page without the cache: the anti-join, one extra row for the cursor
+            rows = await fetch_all(conn, *feed.range_query(locations, after, limit + 1, unrated_by=username))
+        else:
+            rows = await fetch_unseen(conn, locations, after, limit, seen)
+    events, next_cursor = feed.split_page(rows, limit)
+    return jsonify({"events": events, "next_cursor": next_cursor})
+
+
+#swipes
+async def apply_swipes(username, results):
+    #swipes.apply_swipes in one transaction; grouping is left to the bubble scheduler
+    pending = [r for r in results if r["status"] == "pending"]
+    if not pending:
+        return results
+
+    ids = [r["event_id"] for r in pending]
+    yes_ids = []
+    async with connection() as conn:
+        await conn.begin()
+        try:
+            known = {row["event_id"] for row in await fetch_all(conn, *swipes.known_events_query(ids))}
+            previous = {row["event_id"]: row["rating"]
+                        for row in await fetch_all(conn, *swipes.previous_ratings_query(username, ids))}
+            rated = swipes.classify(pending, known, previous)
+            if rated:
+                await fetch_all(conn, *swipes.ratings_upsert(username, rated))
+
+            yes_ids = [r["event_id"] for r in rated if r["choice"] == "yes"]
+            if yes_ids:
+                waiting = {row["event_id"] for row in await fetch_all(conn, *swipes.waiting_query(username, yes_ids))}
+                new_ids = swipes.mark_waiting(rated, waiting)
+                if new_ids:
+                    await fetch_all(conn, *swipes.matches_insert(username, new_ids))
+            await conn.commit()
+        except BaseException:
+            await conn.rollback()
+            raise
+
+    for eid in yes_ids:
+        services.popularity_counters.incr(eid)
+    services.after_swipes(username, results)
+    return results
+
+@app.route("/api/events/<int:event_id>/swipe", methods=["POST"])
+async def swipe_event(event_id):
+    if "username" not in session:
+        return jsonify({"error": "unauthorized"}), 401
+
+    data = await request.get_json(silent=True) or {}
+    choice = (data.get("choice") or "").lower()
+    results = swipes.normalize_swipes([{"event_id": event_id, "choice": "yes" if choice == "yes" else "no"}])
+    result = (await apply_swipes(session["username"], results))[0]
+    if result["status"] == "unknown_event":
+        return jsonify({"error": "no such event"}), 404
+
+    return jsonify({
+        "status": "ok",
+        "choice": choice,
+        "group_created": False,
+        "group_id": None,
+        "already_waiting": result["status"] == "already_waiting",
+    })
+
+@app.route("/api/swipes/batch", methods=["POST"])
+async def swipe_batch():
+    if "username" not in session:
+        return jsonify({"error": "unauthorized"}), 401
+
+    data = await request.get_json(silent=True) or {}
+    items = data.get("swipes")
+    if not isinstance(items, list):
+        return jsonify({"error": "swipes must be a list"}), 400
+    if len(items) > swipes.MAX_BATCH:
+        return jsonify({"error": f"at most {swipes.MAX_BATCH} swipes per batch"}), 413
+
+    results = await apply_swipes(session["username"], swipes.normalize_swipes(items))
+    return jsonify({"results": results})
+
+
+#recommendations
+@app.route("/api/hybrid_recommendations")
+async def hybrid_recommendations():
+    if "username" not in session:
+        return jsonify({"error": "unauthorized"}), 401
+
+    username = session["username"]
+    if await asyncio.to_thread(services.new_events):
+        services.rec_cache.clear()
+
+    payload = services.rec_cache.get(username)
+    if payload is None:
+        start = time.perf_counter()
+        target_location = normalize_loc(session.get("user_city"), session.get("user_state"))
+        events = await build_recommendations(username, target_location)
+        payload = app.json.dumps(events).encode("utf-8")
+        services.rec_cache.put(username, payload, build_ms=(time.perf_counter() - start) * 1000)
+
+    return app.response_class(payload, mimetype="application/json")
+
+async def build_recommendations(username, target_location):
+    #app.build_recommendations with its independent stages in flight together,
+    #each on its own connection (or worker thread for the in-memory indexes)
+    since = feed.upcoming_since()
+
+    async def content_stage():
+        rows = await query("""
+            SELECT i.interest_name
+            FROM User_Interests ui
+            JOIN Interests i ON i.interest_id = ui.interest_id
+            WHERE ui.username = %s
+        """, (username,))
+        keywords = [row["interest_name"] for row in rows]
+        if not keywords:
+            return None  # no interests: fall back to exploration only
+        if services.keyword_backend == "fulltext":
+            ft = keyword_index.fulltext_query(keywords, 20 * len(keywords), since)
+            return {row["event_id"] for row in await query(*ft)} if ft else set()
+        return set(await asyncio.to_thread(services.event_keywords.search, keywords, 20 * len(keywords), since))
+
+    async def liked_stage():
+        similar_users = await asyncio.to_thread(services.similarity_index.neighbors, username)
+        if not similar_users:
+            return set()
+        placeholders = ",".join(["%s"] * len(similar_users))
+        rows = await query(f"""
+            SELECT DISTINCT m.event_id
+            FROM Matches m
+            JOIN Single_Events e ON e.event_id = m.event_id
+            WHERE m.username IN ({placeholders})
+              AND e.start_at >= %s
+        """, similar_users + [since])
+        return {row["event_id"] for row in rows}
+
+    async def explore_stage():
+        return await asyncio.to_thread(services.event_sampler.sample, 25, target_location)
+
+    content_events, liked_events, random_pool = await asyncio.gather(
+        content_stage(), liked_stage(), explore_stage())
+
+    if content_events is None:
+        sorted_ids = random_pool[:20]
+    else:
+        # same weights as app.build_recommendations
+        final_scores = {}
+        for eid in liked_events | content_events | set(random_pool):
+            final_scores[eid] = ((3 if eid in liked_events else 0) + (2 if eid in content_events else 0)
+                                 + (1 if eid in random_pool else 0))
+        sorted_ids = sorted(final_scores, key=lambda x: final_scores[x], reverse=True)
+    if not sorted_ids:
+        return []
+
+    placeholders = ",".join(["%s"] * len(sorted_ids))
+    events = await query(f"""
+        SELECT *
+        FROM Single_Events
+        WHERE event_id IN ({placeholders})
+          AND start_at >= %s
+    """, sorted_ids + [since])
+    services.popularity_counters.merge(events)
+    event_map = {e["event_id"]: e for e in events}
+    return [event_map[eid] for eid in sorted_ids if eid in event_map]
+
+
+#chat
+async def is_member(group_id, username):
+    members = services.memberships.get(group_id)
+    if members is not None and username in members:
+        return True
+    rows = await query("SELECT username FROM Matches WHERE group_id = %s", (group_id,))
+    members = frozenset(row["username"] for row in rows)
+    services.memberships.put(group_id, members)
+    return username in members
+
+async def messages_since(group_id, since_id):
+    #bus first; one query when it can't vouch for the gap
+    rows = await query(MESSAGES_SINCE_SQL, (group_id, since_id, MESSAGE_PAGE_MAX))
+    msgs = [message_json(r) for r in rows]
+    if len(msgs) < MESSAGE_PAGE_MAX:
+        services.chat_bus.synced(group_id, msgs[-1]["id"] if msgs else since_id)
+    return msgs
+
+@app.route("/api/group/<int:group_id>/messages", methods=["GET", "POST"])
+async def api_group_messages(group_id):
+    if "username" not in session:
+        return jsonify({"error": "unauthorized"}), 401
+    username = session["username"]
+
+    if request.method == "POST":
+        data = await request.get_json(silent=True) or {}
+        body = (data.get("message") or "").strip()
+        if not body:
+            return jsonify({"error": "message is required"}), 400
+        body = body[:300]  # schema uses VARCHAR(300)
+
+        if not await is_member(group_id, username):
+            return jsonify({"error": "not a member of this group"}), 403
+
+        # ids must reach the bus in commit order, or a reader could skip one
+        lock = chat_locks.get(group_id)
+        if lock is None:
+            lock = chat_locks[group_id] = asyncio.Lock()
+        async with lock:
+            now = datetime.now().replace(microsecond=0)
+            async with connection() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(
+                        "INSERT INTO Messages (group_id, sender, message_content, time_stamp) VALUES (%s,%s,%s,%s)",
+                        (group_id, username, body, now),
+                    )
+                    message_id = cur.lastrowid
+            msg = message_json({"messages_id": message_id, "sender": username,
+                                "message_content": body, "time_stamp": now})
+            services.message_posted(group_id, msg)
+        return jsonify(msg), 201
+
+    since_id = request.args.get("since_id", type=int)
+    if since_id:
+        wait = min(max(request.args.get("wait", 0, type=float), 0), CHAT_LONG_POLL_MAX)
+        msgs = (await services.chat_bus.wait_async(group_id, since_id, wait) if wait
+                else services.chat_bus.read(group_id, since_id))
+        if msgs is None:
+            msgs = await messages_since(group_id, since_id)
+        return jsonify(msgs)
+
+    limit = min(max(request.args.get("limit", MESSAGE_PAGE_SIZE, type=int), 1), MESSAGE_PAGE_MAX)
+    before_id = request.args.get("before_id", type=int)
+    rows = await query(MESSAGES_BEFORE_SQL, (group_id, before_id or MAX_MESSAGE_ID, limit + 1))
+    rows, next_before_id = split_message_page(rows, limit)
+    return jsonify({"messages": [message_json(r) for r in rows], "next_before_id": next_before_id})
+
+@app.route("/api/group/<int:group_id>/stream")
+async def group_stream(group_id):
+    #Server-Sent Events; an idle stream is one suspended coroutine
+    if "username" not in session:
+        return jsonify({"error": "unauthorized"}), 401
+
+    since_id = (request.headers.get("Last-Event-ID", type=int)
+                or request.args.get("since_id", 0, type=int))
+
+    async def events():
+        last = since_id
+        deadline = time.monotonic() + CHAT_STREAM_MAX_SECONDS
+        yield "retry: 1000\n\n"
+        while time.monotonic() < deadline:
+            msgs = await services.chat_bus.wait_async(group_id, last, CHAT_KEEPALIVE_SECONDS)
+            if msgs is None:
+                msgs = await messages_since(group_id, last)
+            if not msgs:
+                yield ": keepalive\n\n"
+                continue
+            for m in msgs:
+                yield f"id: {m['id']}\ndata: {app.json.dumps(m)}\n\n"
+                last = m["id"]
+
+    response = app.response_class(events(), mimetype="text/event-stream",
+                                  headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    response.timeout = None  # streams outlive Quart's default response timeout
+    return response
+
+
+if __name__ == "__main__":
+    app.run(host="0.0.0.0", port=config["ASYNC_PORT"])
@@ -0,0 +1 @@
+"""Benchmarks and stress scripts for bubbl. They run against a real local MySQL."""
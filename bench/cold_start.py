@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Cold start to first request, with and without warmup.
+
+Each mode runs in a fresh interpreter, so imports and the in-memory
+indexes start empty. The child times `import app`, then create_app()
+(which with WARMUP=1 includes Services.warmup()), then the first request
+of every load_test scenario, and then the p50 of a few more. Without
+warmup, the first requests pay for the index loads and the first
+connections. With it, they should be close to steady state.
+
+Both modes share one MySQL server, so its buffer pool is only cold for
+whichever mode runs first ("cold" does, by default).
+
+    python -m bench.seed --schema --db bubbl_bench
+    python -m bench.cold_start --db bubbl_bench
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+from bench.load_test import SCENARIOS, Workload, make_client_driver, run_scenario
+from bench.seed import add_db_args, pymysql_connect
+
+MODES = {"cold": False, "warm": True}
+
+
+def measure(args, warmup: bool):
+    conn = pymysql_connect(args)
+    try:
+        workload = Workload(conn)
+    finally:
+        conn.close()
+
+    start = time.perf_counter()
+    import app  # noqa: F401  (the module alone; create_app below builds the app)
+    import_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    driver, _ = make_client_driver(args, workload, WARMUP=warmup)
+    create_ms = (time.perf_counter() - start) * 1000
+    services = driver.app.extensions["bubbl"]
+
+    first, steady = {}, {}
+    for scenario in SCENARIOS:
+        first[scenario] = run_scenario(driver, workload, scenario, 1, 1, 0, args.seed)["max_ms"]
+        steady[scenario] = run_scenario(driver, workload, scenario, args.requests, 1, 0, args.seed + 1)["p50_ms"]
+    ready_ms = import_ms + create_ms + sum(v or 0 for v in first.values())
+    return {
+        "import_ms": round(import_ms, 1),
+        "create_app_ms": round(create_ms, 1),
+        "warmup_ms": services.startup["warmup_ms"],
+        "first_request_ms": first,
+        "steady_p50_ms": steady,
+        "first_requests_done_ms": round(ready_ms, 1),
+        "db_connections": services.pool.stats()["created"],
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    add_db_args(ap)
+    ap.add_argument("--modes", default="cold,warm")
+    ap.add_argument("--requests", default=5, type=int, help="requests per scenario after the first")
+    ap.add_argument("--seed", default=42, type=int)
+    ap.add_argument("--child", choices=sorted(MODES), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    args.concurrency = 2  # app pool size
+
+    if args.child:
+        print(json.dumps(measure(args, MODES[args.child])))
+        return
+
+    report = {}
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        if mode not in MODES:
+            ap.error(f"unknown mode: {mode}")
+        cmd = [sys.executable, "-m", "bench.cold_start", "--child", mode,
+               "--host", args.host, "--port", str(args.port), "--user", args.user,
+               "--password", args.password, "--db", args.db,
+               "--requests", str(args.requests), "--seed", str(args.seed)]
+        out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+        report[mode] = json.loads(out.strip().splitlines()[-1])
+        print(f"  {mode}: first requests done after {report[mode]['first_requests_done_ms']} ms",
+              file=sys.stderr)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
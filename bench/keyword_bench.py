@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Compare content-based event lookup backends on the current database:
+
+  like      the old per-keyword `LIKE '%kw%'` loop
+  memory    keyword_index.KeywordIndex (in-process inverted index)
+  fulltext  keyword_index.fulltext_search (needs the ft_events_text index)
+
+Each backend answers the same random keyword sets (drawn from Interests),
+and the JSON report gives per-lookup latency percentiles and how much
+each backend's results overlap with the LIKE baseline.
+
+    python -m bench.keyword_bench --lookups 200 --keywords-per-user 4
+"""
+
+import argparse
+import json
+import random
+import time
+
+import pymysql
+
+import keyword_index
+from bench.seed import add_db_args, pymysql_connect
+from db_pool import ConnectionPool
+
+
+def like_search(cursor, keywords, limit_per_kw=20):
+    found = set()
+    for kw in keywords:
+        cursor.execute("""
+            SELECT event_id
+            FROM Single_Events
+            WHERE event_name LIKE %s
+               OR event_description LIKE %s
+            LIMIT %s
+        """, (f"%{kw}%", f"%{kw}%", limit_per_kw))
+        found.update(row["event_id"] for row in cursor.fetchall())
+    return found
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 3)
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99),
+            "mean_ms": round(sum(samples) / len(samples) * 1000, 3)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    add_db_args(ap)
+    ap.add_argument("--lookups", default=100, type=int)
+    ap.add_argument("--keywords-per-user", default=4, type=int)
+    ap.add_argument("--seed", default=42, type=int)
+    ap.add_argument("--backends", default="like,memory,fulltext")
+    args = ap.parse_args()
+
+    pool = ConnectionPool(lambda: pymysql_connect(args), size=2)
+    rng = random.Random(args.seed)
+    report = {}
+
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT interest_name FROM Interests")
+        vocab = [row["interest_name"] for row in cursor.fetchall()]
+        if not vocab:
+            raise SystemExit("Interests table is empty; nothing to look up")
+        queries = [rng.sample(vocab, min(args.keywords_per_user, len(vocab)))
+                   for _ in range(args.lookups)]
+
+        index = keyword_index.KeywordIndex(pool, max_age=float("inf"))
+        t0 = time.perf_counter()
+        index.refresh(conn)
+        report["memory_build"] = {"ms": round((time.perf_counter() - t0) * 1000, 2), **index.stats()}
+
+        backends = {
+            "like": lambda kws: like_search(cursor, kws),
+            "memory": lambda kws: set(index.search(kws, limit=20 * len(kws))),
+            "fulltext": lambda kws: set(keyword_index.fulltext_search(cursor, kws, limit=20 * len(kws))),
+        }
+        baseline = [like_search(cursor, kws) for kws in queries]
+
+        for name in args.backends.split(","):
+            timings, overlap = [], []
+            try:
+                for kws, base in zip(queries, baseline):
+                    t0 = time.perf_counter()
+                    got = backends[name](kws)
+                    timings.append(time.perf_counter() - t0)
+                    if base:
+                        overlap.append(len(got & base) / len(base))
+            except pymysql.MySQLError as e:
+                report[name] = {"error": str(e)}
+                continue
+            report[name] = {
+                **percentiles(timings),
+                "recall_vs_like": round(sum(overlap) / len(overlap), 3) if overlap else None,
+            }
+    pool.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
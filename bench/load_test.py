@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Load test for the main endpoints, against a database filled by bench.seed.
+
+Scenarios, each run for --requests requests across --concurrency workers:
+
+  events_page      GET  /events                         (find_events)
+  events_feed      GET  /api/events/feed
+  swipe            POST /api/events/<id>/swipe          (swipe_event)
+  recommendations  GET  /api/hybrid_recommendations
+  chat_post        POST /api/group/<id>/messages        (api_group_messages)
+  chat_history     GET  /api/group/<id>/messages
+
+Every request is made as a random seeded user, with ids drawn from that
+user's city and groups. With --mode client (default) the app is built
+with create_app(), pointed at --db, and driven through Flask's test
+client in this process. With --mode http workers log in and hit a
+running server at --url over real HTTP. After the HTTP scenarios the
+loader's own process_events and process_events_stream are timed on a
+fresh synthetic batch (--ingest-items), whose rows are deleted again.
+
+Prints JSON with throughput and latency percentiles per scenario. Pass
+--out to save it and --baseline to compare against an earlier run.
+
+    python -m bench.seed --schema --db bubbl_bench
+    python -m bench.load_test --db bubbl_bench --concurrency 16 --requests 2000 --out run.json
+    python -m bench.load_test --db bubbl_bench --baseline run.json
+"""
+
+import argparse
+import http.cookiejar
+import json
+import math
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import load_events
+from bench.seed import (PASSWORD, PREFIX, add_db_args, connector_connect, load_templates,
+                        pymysql_connect, synth_items)
+
+SCENARIOS = ["events_page", "events_feed", "swipe", "recommendations", "chat_post", "chat_history"]
+INGEST_LABEL = " (bench ingest)"
+
+# (method, path, json body or None)
+Call = Tuple[str, str, Optional[Dict[str, Any]]]
+
+
+# ---------- Workload ----------
+class Workload:
+    """The seeded users plus the event and group ids each of them can act on."""
+
+    def __init__(self, conn):
+        cur = conn.cursor()
+        cur.execute("SELECT username, user_city, user_state FROM Users WHERE username LIKE %s",
+                    (PREFIX + "%",))
+        self.users = {r["username"]: (r["user_city"], r["user_state"]) for r in cur.fetchall()}
+        cur.execute("SELECT event_id, venue_location FROM Single_Events WHERE start_at >= UTC_TIMESTAMP()")
+        self.events: Dict[str, List[int]] = {}
+        for r in cur.fetchall():
+            self.events.setdefault(r["venue_location"], []).append(r["event_id"])
+        cur.execute("SELECT username, group_id FROM Matches WHERE group_id IS NOT NULL AND username LIKE %s",
+                    (PREFIX + "%",))
+        self.groups: Dict[str, List[int]] = {}
+        for r in cur.fetchall():
+            self.groups.setdefault(r["username"], []).append(r["group_id"])
+        cur.close()
+        self.usernames = sorted(self.users)
+        self.grouped = sorted(self.groups)
+        if not self.usernames:
+            raise SystemExit(f"no {PREFIX}* users in this database; run bench.seed first")
+
+    def call(self, scenario: str, rng: random.Random) -> Tuple[str, Call]:
+        if scenario in ("chat_post", "chat_history"):
+            if not self.grouped:
+                raise SystemExit("no seeded groups; run bench.seed with a higher --yes-rate")
+            user = rng.choice(self.grouped)
+            gid = rng.choice(self.groups[user])
+            if scenario == "chat_post":
+                return user, ("POST", f"/api/group/{gid}/messages",
+                              {"message": f"load test {rng.randrange(1 << 30)}"})
+            return user, ("GET", f"/api/group/{gid}/messages", None)
+
+        user = rng.choice(self.usernames)
+        if scenario == "events_page":
+            return user, ("GET", "/events", None)
+        if scenario == "events_feed":
+            return user, ("GET", "/api/events/feed", None)
+        if scenario == "recommendations":
+            return user, ("GET", "/api/hybrid_recommendations", None)
+        if scenario == "swipe":
+            city, state = self.users[user]
+            ids = self.events.get(f"{city}, {state}")
+            if not ids:
+                ids = [eid for pool in self.events.values() for eid in pool]
+            choice = "yes" if rng.random() < 0.3 else "no"
+            return user, ("POST", f"/api/events/{rng.choice(ids)}/swipe", {"choice": choice})
+        raise ValueError(f"unknown scenario {scenario!r}")
+
+
+# ---------- Drivers ----------
+class ClientDriver:
+    """Flask test client in this process; one client per worker thread."""
+
+    def __init__(self, flask_app, workload: Workload):
+        self.app = flask_app
+        self.workload = workload
+        self._local = threading.local()
+
+    def request(self, user: str, call: Call) -> Tuple[int, float]:
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        if getattr(self._local, "user", None) != user:
+            city, state = self.workload.users[user]
+            with client.session_transaction() as s:
+                s["username"], s["user_city"], s["user_state"] = user, city, state
+            self._local.user = user
+        method, path, body = call
+        start = time.perf_counter()
+        resp = client.open(path, method=method, json=body)
+        resp.get_data()
+        return resp.status_code, time.perf_counter() - start
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None  # time the redirect itself, not the page it points to
+
+
+class HttpDriver:
+    """Real HTTP against a running server; one logged-in cookie jar per user."""
+
+    def __init__(self, base_url: str, timeout: float = 30.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._openers: Dict[str, urllib.request.OpenerDirector] = {}
+        self._lock = threading.Lock()
+
+    def _opener(self, user: str):
+        with self._lock:
+            opener = self._openers.get(user)
+        if opener is not None:
+            return opener
+        opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect())
+        form = urllib.parse.urlencode({"username": user, "password": PASSWORD}).encode()
+        try:
+            opener.open(self.base_url + "/login", data=form, timeout=self.timeout).read()
+        except urllib.error.HTTPError as e:
+            if e.code != 302:
+                raise
+        with self._lock:
+            self._openers[user] = opener
+        return opener
+
+    def request(self, user: str, call: Call) -> Tuple[int, float]:
+        opener = self._opener(user)
+        method, path, body = call
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                     headers={"Content-Type": "application/json"} if data else {})
+        start = time.perf_counter()
+        try:
+            with opener.open(req, timeout=self.timeout) as resp:
+                resp.read()
+                status = resp.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            status = e.code
+        return status, time.perf_counter() - start
+
+
+# ---------- Measurement ----------
+def percentile(sorted_values: List[float], p: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    k = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return round(sorted_values[k], 2)
+
+
+def summarize(latencies_ms: List[float], statuses: Dict[int, int], errors: int, elapsed: float) -> Dict[str, Any]:
+    latencies_ms.sort()
+    n = len(latencies_ms)
+    return {
+        "requests": n,
+        "errors": errors,
+        "status": {str(k): v for k, v in sorted(statuses.items())},
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(n / elapsed, 1) if elapsed else None,
+        "mean_ms": round(sum(latencies_ms) / n, 2) if n else None,
+        "p50_ms": percentile(latencies_ms, 50),
+        "p90_ms": percentile(latencies_ms, 90),
+        "p95_ms": percentile(latencies_ms, 95),
+        "p99_ms": percentile(latencies_ms, 99),
+        "max_ms": round(latencies_ms[-1], 2) if n else None,
+    }
+
+
+def run_scenario(driver, workload: Workload, scenario: str, requests: int, concurrency: int,
+                 warmup: int, seed: int) -> Dict[str, Any]:
+    rng = random.Random(f"{seed}:{scenario}")
+    calls = [workload.call(scenario, rng) for _ in range(warmup + requests)]
+    for user, call in calls[:warmup]:
+        driver.request(user, call)
+
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    errors = 0
+    lock = threading.Lock()
+
+    def one(job):
+        nonlocal errors
+        user, call = job
+        try:
+            status, seconds = driver.request(user, call)
+        except Exception:
+            with lock:
+                errors += 1
+            return
+        with lock:
+            latencies.append(seconds * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+            if status >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        list(ex.map(one, calls[warmup:]))
+    return summarize(latencies, statuses, errors, time.perf_counter() - start)
+
+
+def run_ingest(args, workload: Workload, items: int) -> Dict[str, Any]:
+    """Time process_events (row at a time) and process_events_stream (bulk) on fresh items."""
+    rng = random.Random(f"{args.seed}:ingest")
+    templates = load_templates()
+    cities = sorted({tuple(loc.rsplit(", ", 1)) for loc in workload.events})[:10] or [("South Bend", "IN")]
+    per_city = max(1, items // len(cities))
+    out = {}
+    cnx = connector_connect(args)
+    try:
+        for name in ("process_events", "process_events_stream"):
+            batch = list(synth_items(rng, templates, cities, per_city, label=INGEST_LABEL))
+            start = time.perf_counter()
+            if name == "process_events":
+                _, inserted, skipped = load_events.process_events(cnx, batch)
+            else:
+                _, inserted, skipped, _ = load_events.process_events_stream(cnx, batch, progress_every=0)
+            elapsed = time.perf_counter() - start
+            out[name] = {"items": len(batch), "inserted": inserted, "skipped": skipped,
+                         "elapsed_s": round(elapsed, 3),
+                         "rows_per_s": round(inserted / elapsed, 1) if elapsed else None}
+        cur = cnx.cursor()
+        cur.execute("DELETE FROM Single_Events WHERE event_name LIKE %s", (f"%{INGEST_LABEL} #%",))
+        cnx.commit()
+        cur.close()
+    finally:
+        cnx.close()
+    return out
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """Percent change per scenario metric against a previous report (negative latency = faster)."""
+    deltas = {}
+    for name, cur in report["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(name)
+        if not old:
+            continue
+        deltas[name] = {
+            key: round((cur[key] - old[key]) / old[key] * 100, 1)
+            for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+            if cur.get(key) is not None and old.get(key)
+        }
+    return deltas
+
+
+def make_client_driver(args, workload: Workload, **config) -> Tuple[ClientDriver, Callable[[], Dict[str, Any]]]:
+    import app as bubbl_app
+    flask_app = bubbl_app.create_app(dict({
+        "DB_HOST": args.host, "DB_PORT": args.port, "DB_USER": args.user,
+        "DB_PASSWORD": args.password, "DB_NAME": args.db, "DB_POOL_SIZE": args.concurrency,
+    }, **config))
+    metrics = flask_app.extensions["bubbl_metrics"]
+
+    def server_metrics():
+        return metrics.endpoints()
+    return ClientDriver(flask_app, workload), server_metrics
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    add_db_args(ap)
+    ap.add_argument("--mode", choices=("client", "http"), default="client")
+    ap.add_argument("--url", default="http://127.0.0.1:5000", help="with --mode http")
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS))
+    ap.add_argument("--requests", default=500, type=int, help="measured requests per scenario")
+    ap.add_argument("--warmup", default=20, type=int, help="unmeasured requests per scenario")
+    ap.add_argument("--concurrency", default=8, type=int)
+    ap.add_argument("--ingest-items", default=2000, type=int, help="0 to skip the ingest timing")
+    ap.add_argument("--seed", default=42, type=int)
+    ap.add_argument("--out", help="also write the JSON report here")
+    ap.add_argument("--baseline", help="earlier report to compare against")
+    args = ap.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        ap.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    conn = pymysql_connect(args)
+    try:
+        workload = Workload(conn)
+    finally:
+        conn.close()
+
+    server_metrics = None
+    if args.mode == "client":
+        driver, server_metrics = make_client_driver(args, workload)
+    else:
+        driver = HttpDriver(args.url)
+
+    report: Dict[str, Any] = {
+        "config": {"mode": args.mode, "concurrency": args.concurrency, "requests": args.requests,
+                   "warmup": args.warmup, "seed": args.seed, "users": len(workload.usernames),
+                   "upcoming_events": sum(len(v) for v in workload.events.values()),
+                   "cities": len(workload.events), "grouped_users": len(workload.grouped)},
+        "scenarios": {},
+    }
+    for scenario in scenarios:
+        report["scenarios"][scenario] = run_scenario(driver, workload, scenario, args.requests,
+                                                     args.concurrency, args.warmup, args.seed)
+        print(f"  {scenario}: {report['scenarios'][scenario]['throughput_rps']} req/s", file=sys.stderr)
+    if server_metrics is not None:
+        report["server"] = server_metrics()
+    if args.ingest_items > 0:
+        report["ingest"] = run_ingest(args, workload, args.ingest_items)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["vs_baseline_pct"] = compare(report, json.load(f))
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
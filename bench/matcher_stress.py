@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Stress test for matcher.GroupMatcher.
+
+Creates throwaway users and events, fires many concurrent "yes" swipes per
+event through swipes.apply_swipes, then checks the grouping invariants:
+
+  * every group has exactly --group-size members
+  * nobody is in two groups (or grouped and still waiting) for one event
+  * fewer than --group-size users are left waiting per event
+  * grouped + waiting == swipers per event
+
+Prints a JSON report (including swipes/sec) and exits 1 on any violation.
+
+    python -m bench.matcher_stress --swipers 400 --threads 32 --group-size 4
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import pymysql
+
+import swipes
+from bench.seed import add_db_args, pymysql_connect
+from db_pool import ConnectionPool
+from matcher import GroupMatcher
+
+PREFIX = "stress_"
+VENUE = ("Stress Test Venue", "Benchville, ZZ")
+
+
+def setup(conn, n_users: int, n_events: int) -> List[int]:
+    cur = conn.cursor()
+    cur.executemany(
+        """
+        INSERT INTO Users
+        (username, email, full_name, user_password, user_city, user_state, user_age, user_gender)
+        VALUES (%s, %s, %s, 'x', 'Benchville', 'ZZ', 30, 'X')
+        """,
+        [(f"{PREFIX}{i}", f"{PREFIX}{i}@example.com", f"Stress {i}") for i in range(n_users)],
+    )
+    cur.execute(
+        "INSERT IGNORE INTO Venue (venue_address, venue_location) VALUES (%s, %s)", VENUE,
+    )
+    event_ids = []
+    for i in range(n_events):
+        cur.execute(
+            "INSERT INTO Single_Events (event_name, venue_address, venue_location) VALUES (%s, %s, %s)",
+            (f"{PREFIX}event {i}",) + VENUE,
+        )
+        event_ids.append(cur.lastrowid)
+    conn.commit()
+    return event_ids
+
+
+def teardown(conn, event_ids: List[int]):
+    cur = conn.cursor()
+    cur.execute("DELETE FROM Users WHERE username LIKE %s", (PREFIX + "%",))
+    if event_ids:
+        placeholders = ",".join(["%s"] * len(event_ids))
+        cur.execute(f"DELETE FROM Single_Events WHERE event_id IN ({placeholders})", event_ids)
+    cur.execute("DELETE FROM Venue WHERE venue_address = %s AND venue_location = %s", VENUE)
+    conn.commit()
+
+
+def check(conn, event_ids: List[int], swipers: int, size: int) -> List[str]:
+    problems = []
+    cur = conn.cursor()
+    for eid in event_ids:
+        cur.execute("SELECT username, group_id FROM Matches WHERE event_id = %s", (eid,))
+        rows = cur.fetchall()
+        groups: Dict[int, List[str]] = {}
+        waiting = []
+        for r in rows:
+            if r["group_id"] is None:
+                waiting.append(r["username"])
+            else:
+                groups.setdefault(r["group_id"], []).append(r["username"])
+
+        for gid, members in groups.items():
+            if len(members) != size:
+                problems.append(f"event {eid}: group {gid} has {len(members)} members")
+        everyone = [u for m in groups.values() for u in m] + waiting
+        if len(everyone) != len(set(everyone)):
+            problems.append(f"event {eid}: a user appears in more than one group/queue")
+        if len(waiting) >= size:
+            problems.append(f"event {eid}: {len(waiting)} users left waiting")
+        if len(everyone) != swipers:
+            problems.append(f"event {eid}: {len(everyone)} users recorded, expected {swipers}")
+
+        cur.execute("SELECT COUNT(*) AS n FROM Match_Groups WHERE event_id = %s", (eid,))
+        n_groups = cur.fetchone()["n"]
+        if n_groups != swipers // size:
+            problems.append(f"event {eid}: {n_groups} groups, expected {swipers // size}")
+    return problems
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    add_db_args(ap)
+    ap.add_argument("--swipers", default=200, type=int, help="users swiping yes on each event")
+    ap.add_argument("--events", default=2, type=int)
+    ap.add_argument("--threads", default=16, type=int)
+    ap.add_argument("--group-size", default=4, type=int)
+    args = ap.parse_args()
+
+    pool = ConnectionPool(lambda: pymysql_connect(args), size=args.threads, timeout=30)
+    matcher = GroupMatcher(target_size=args.group_size)
+
+    with pool.connection() as conn:
+        event_ids = setup(conn, args.swipers, args.events)
+
+    # interleave events so every event sees concurrent swipers at once
+    jobs = [(f"{PREFIX}{u}", eid) for u in range(args.swipers) for eid in event_ids]
+    latencies = []
+    errors = []
+
+    def swipe(job):
+        username, eid = job
+        t0 = time.perf_counter()
+        try:
+            with pool.connection() as conn:
+                results = swipes.normalize_swipes([{"event_id": eid, "choice": "yes"}])
+                swipes.apply_swipes(conn, username, results, matcher=matcher)
+        except pymysql.MySQLError as e:
+            errors.append(f"{username}/{eid}: {e}")
+        latencies.append(time.perf_counter() - t0)
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as ex:
+            list(ex.map(swipe, jobs))
+        elapsed = time.perf_counter() - start
+
+        with pool.connection() as conn:
+            problems = check(conn, event_ids, args.swipers, args.group_size)
+    finally:
+        with pool.connection() as conn:
+            teardown(conn, event_ids)
+        pool.close()
+
+    latencies.sort()
+    report = {
+        "swipes": len(jobs),
+        "threads": args.threads,
+        "group_size": args.group_size,
+        "elapsed_s": round(elapsed, 3),
+        "swipes_per_s": round(len(jobs) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+        "errors": errors[:20],
+        "violations": problems,
+    }
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if problems or errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Query-plan regression check: EXPLAIN everything the app sends to MySQL.
+
+Runs against a database filled by bench.seed. The app is driven through
+the Flask test client, with the inline matcher on so its locking queries
+run too. Every load_test scenario plus the routes it doesn't cover (login,
+group page, my groups, chat catch-up and scroll-back, feed paging, batch
+swipes) are exercised. Then one bubble scheduler pass, a popularity flush,
+a warmup and a FULLTEXT lookup run. InstrumentedCursor.captured collects one
+instance of every distinct statement as sent. Each SELECT/UPDATE/DELETE
+is then EXPLAINed on a separate connection.
+
+A table accessed with type=ALL is a violation, unless:
+  * the optimizer expects fewer than --min-rows rows (tiny lookup tables
+    like Interests, which MySQL scans whatever indexes exist), or
+  * the statement is in ALLOWED: loaders that read a whole table on
+    purpose to build an in-memory index.
+Full index scans (type=index) are reported as warnings.
+
+Prints JSON and exits 1 on any violation, so it can gate schema changes:
+
+    python -m bench.seed --schema --db bubbl_bench
+    python -m bench.plan_check --db bubbl_bench
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+from typing import Any, Dict, List, Optional
+
+import pymysql
+
+import feed
+import keyword_index
+from bench.load_test import SCENARIOS, Workload, make_client_driver, run_scenario
+from bench.seed import PASSWORD, add_db_args, pymysql_connect
+from instrument import InstrumentedCursor
+
+# normalized sql -> why a full read is expected
+ALLOWED = [
+    (re.compile(r"^SELECT username, interest_id FROM User_Interests$"),
+     "similarity index: loads every user's interests"),
+    (re.compile(r"^SELECT venue_address, venue_location, lat, lng FROM Venue$"),
+     "venue geo index: loads every venue"),
+    (re.compile(r"^SELECT event_id, venue_location FROM Single_Events WHERE start_at >= \?$"),
+     "event sampler: loads every upcoming event (all of them, on seeded data)"),
+    (re.compile(r"^SELECT event_id, event_name, event_description, start_at FROM Single_Events "
+                r"WHERE event_id > \? ORDER BY event_id$"),
+     "keyword index: the first build and periodic rebuilds read every event"),
+    (re.compile(r"^SELECT user_city, user_state, COUNT\(\*\) AS users FROM Users GROUP BY"),
+     "warmup: counts users per city to pick the decks to preload"),
+]
+
+_explainable_re = re.compile(r"^\s*(SELECT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+
+
+# ---------- Exercising the app ----------
+def exercise(client_app, workload: Workload, rng: random.Random, requests: int):
+    """Routes and code paths the load_test scenarios don't reach."""
+    client = client_app.test_client()
+    user = rng.choice(workload.grouped or workload.usernames)
+    city, state = workload.users[user]
+
+    def login_as(name):
+        c, s = workload.users[name]
+        with client.session_transaction() as sess:
+            sess["username"], sess["user_city"], sess["user_state"] = name, c, s
+
+    client.post("/login", data={"username": user, "password": PASSWORD})
+    login_as(user)
+    client.get("/my_group")
+    for gid in workload.groups.get(user, [])[:3]:
+        client.get(f"/group/{gid}")
+        client.get(f"/api/group/{gid}/messages?since_id=1")
+        client.get(f"/api/group/{gid}/messages?before_id={2 ** 40}&limit=20")
+
+    page = client.get("/api/events/feed").get_json() or {}
+    for _ in range(3):
+        if not page.get("next_cursor"):
+            break
+        page = client.get("/api/events/feed", query_string={"cursor": page["next_cursor"]}).get_json() or {}
+
+    ids = workload.events.get(f"{city}, {state}") or []
+    if ids:
+        batch = [{"event_id": eid, "choice": rng.choice(("yes", "no"))}
+                 for eid in rng.sample(ids, min(10, len(ids)))]
+        client.post("/api/swipes/batch", json={"swipes": batch})
+
+        # enough "yes" swipes on one event for the inline matcher to form a group
+        locals_ = [u for u in workload.usernames if workload.users[u] == (city, state)]
+        target = rng.choice(ids)
+        for name in locals_[:requests]:
+            login_as(name)
+            client.post(f"/api/events/{target}/swipe", json={"choice": "yes"})
+
+
+def run_background(services):
+    services.bubble_scheduler.run_once()
+    services.popularity_flusher.flush_now()
+    services.warmup()
+    with services.pool.connection() as conn:
+        cur = conn.cursor()
+        keyword_index.fulltext_search(cur, ["music", "comedy"], limit=50,
+                                      since=feed.upcoming_since())
+        cur.close()
+        conn.commit()
+
+
+# ---------- Checking plans ----------
+def allowed(normalized: str) -> Optional[str]:
+    for pattern, reason in ALLOWED:
+        if pattern.search(normalized):
+            return reason
+    return None
+
+
+def check(conn, captured: Dict[str, str], min_rows: int) -> Dict[str, Any]:
+    violations: List[Dict[str, Any]] = []
+    warnings: List[Dict[str, Any]] = []
+    exempt: List[Dict[str, Any]] = []
+    unexplained: List[Dict[str, Any]] = []
+    explained = 0
+
+    cur = conn.cursor()
+    for normalized, sql in sorted(captured.items()):
+        if not _explainable_re.match(sql):
+            continue
+        try:
+            cur.execute("EXPLAIN " + sql)
+            plan = cur.fetchall()
+        except pymysql.MySQLError as e:
+            unexplained.append({"sql": normalized, "error": str(e)})
+            continue
+        finally:
+            conn.rollback()
+        explained += 1
+
+        for row in plan:
+            table = row.get("table") or ""
+            if table.startswith("<"):
+                continue  # derived tables, union results
+            found = {"sql": normalized, "table": table, "type": row.get("type"),
+                     "rows": row.get("rows"), "possible_keys": row.get("possible_keys"),
+                     "key": row.get("key"), "extra": row.get("Extra")}
+            if row.get("type") == "ALL":
+                reason = allowed(normalized)
+                if reason is not None:
+                    exempt.append(dict(found, reason=reason))
+                elif (row.get("rows") or 0) < min_rows:
+                    exempt.append(dict(found, reason=f"fewer than {min_rows} rows"))
+                else:
+                    violations.append(found)
+            elif row.get("type") == "index":
+                warnings.append(found)
+    cur.close()
+    return {"statements": len(captured), "explained": explained, "violations": violations,
+            "warnings": warnings, "exempt": exempt, "unexplained": unexplained}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    add_db_args(ap)
+    ap.add_argument("--requests", default=20, type=int, help="requests per load_test scenario")
+    ap.add_argument("--min-rows", default=100, type=int,
+                    help="ignore full scans the optimizer expects to read fewer rows than this")
+    ap.add_argument("--seed", default=42, type=int)
+    args = ap.parse_args()
+    args.concurrency = 2  # app pool size; the popularity flusher shares it
+
+    conn = pymysql_connect(args)
+    try:
+        workload = Workload(conn)
+    finally:
+        conn.close()
+
+    # inline matching, so the matcher's own statements are captured too
+    driver, _ = make_client_driver(args, workload, BUBBLE_SCHEDULER=False)
+    services = driver.app.extensions["bubbl"]
+
+    InstrumentedCursor.captured = {}
+    for scenario in SCENARIOS:
+        run_scenario(driver, workload, scenario, args.requests, concurrency=1, warmup=0, seed=args.seed)
+    exercise(driver.app, workload, random.Random(args.seed), args.requests)
+    run_background(services)
+    captured, InstrumentedCursor.captured = InstrumentedCursor.captured, None
+
+    conn = pymysql_connect(args)
+    try:
+        report = check(conn, captured, args.min_rows)
+    finally:
+        conn.close()
+
+    print(json.dumps(report, indent=2, default=str))
+    sys.exit(1 if report["violations"] else 0)
+
+
+if __name__ == "__main__":
+    main()
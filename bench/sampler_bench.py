@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Show that sampler.EventSampler latency stays flat as the event table grows.
+
+Builds samplers over synthetic id sets of increasing size (no database
+needed) and times sample(k), local and global. With --mysql it also
+times the old `ORDER BY RAND() LIMIT k` against the real Single_Events of
+the database given by the usual connection flags.
+
+    python -m bench.sampler_bench --sizes 1000,10000,100000,1000000
+    python -m bench.sampler_bench --mysql --db bubbl_bench
+"""
+
+import argparse
+import json
+import random
+import time
+
+from bench.seed import add_db_args, pymysql_connect
+from sampler import EventSampler
+
+
+def time_calls(fn, n):
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return {"p50_us": round(samples[len(samples) // 2] * 1e6, 2),
+            "p99_us": round(samples[int(len(samples) * 0.99) - 1] * 1e6, 2)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1000,10000,100000,1000000")
+    ap.add_argument("--cities", default=50, type=int)
+    ap.add_argument("--k", default=25, type=int)
+    ap.add_argument("--calls", default=2000, type=int)
+    ap.add_argument("--seed", default=7, type=int)
+    ap.add_argument("--mysql", action="store_true", help="also time ORDER BY RAND() on the database")
+    add_db_args(ap)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    report = {"k": args.k, "sampler": {}}
+    for n in (int(x) for x in args.sizes.split(",")):
+        sampler = EventSampler(pool=None)
+        # ids with gaps, like a table that has seen deletes
+        sampler.load((i * 3 + rng.randrange(3), f"City {i % args.cities}") for i in range(n))
+        report["sampler"][n] = {
+            "local": time_calls(lambda: sampler.sample(args.k, location="City 1"), args.calls),
+            "global": time_calls(lambda: sampler.sample(args.k), args.calls),
+        }
+        # same seed, same draw
+        assert sampler.sample(args.k, seed=1) == sampler.sample(args.k, seed=1)
+
+    if args.mysql:
+        conn = pymysql_connect(args)
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) AS n FROM Single_Events")
+        rows = cursor.fetchone()["n"]
+
+        def order_by_rand():
+            cursor.execute("SELECT event_id FROM Single_Events ORDER BY RAND() LIMIT %s", (args.k,))
+            cursor.fetchall()
+
+        report["order_by_rand"] = {"rows": rows, **time_calls(order_by_rand, min(args.calls, 200))}
+        conn.close()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Seeded synthetic dataset for benchmarks.
+
+Builds the schema from create_tables.sql (with --schema; this DROPS every
+bubbl table in --db, so point it at a scratch database) and fills it at a
+configurable scale:
+
+  * --users users spread over --cities cities from city_centroids.csv,
+    each with a few interests from a fixed vocabulary;
+  * --events-per-city upcoming events per city, built from the shapes of
+    real feed items (title, description, venue, link, "when" string) and
+    inserted through load_events' own bulk path, so start_at, lat/lng etc.
+    are filled exactly as ingest fills them;
+  * ratings per user on events in their city, "yes" at --yes-rate;
+  * Matches for every "yes", chunked into Match_Groups of --group-size
+    (the remainder stays waiting), and --messages-per-group chat messages.
+
+The same --seed always produces the same data. Prints a JSON report.
+
+    python -m bench.seed --schema --db bubbl_bench --users 2000 --cities 20 --events-per-city 300
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+import mysql.connector
+import pymysql
+from pymysql.cursors import DictCursor
+
+import load_events
+import migrate
+from geo import CENTROIDS_PATH
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_PATH = os.path.join(ROOT, "create_tables.sql")
+TEMPLATES_PATH = os.path.join(ROOT, "all_events.json")
+
+PREFIX = "bench_"
+PASSWORD = "bench"
+INTERESTS = [
+    "music", "concert", "jazz", "rock", "hip hop", "country", "comedy", "theatre",
+    "ballet", "dance", "opera", "art", "film", "food", "wine", "beer", "festival",
+    "family", "trivia", "karaoke", "poetry", "book", "yoga", "market", "holiday",
+    "basketball", "hockey", "football", "halloween", "symphony",
+]
+CHAT_LINES = [
+    "anyone want to grab food before?", "I'm in!", "what time are we meeting?",
+    "see you all there", "running 10 min late", "this is going to be great",
+    "where should we park?", "I'll be by the entrance", "first time going to one of these",
+    "who else is coming from downtown?",
+]
+
+
+# ---------- Connections ----------
+def add_db_args(ap: argparse.ArgumentParser):
+    ap.add_argument("--host", default="localhost")
+    ap.add_argument("--port", default=3306, type=int)
+    ap.add_argument("--user", default="mrocazap")
+    ap.add_argument("--password", default="newpassword")
+    ap.add_argument("--db", default="mrocazap")
+
+
+def pymysql_connect(args):
+    return pymysql.connect(host=args.host, port=args.port, user=args.user,
+                           password=args.password, database=args.db,
+                           cursorclass=DictCursor)
+
+
+def connector_connect(args):
+    # load_events is written against mysql.connector
+    return mysql.connector.connect(host=args.host, port=args.port, user=args.user,
+                                   password=args.password, database=args.db,
+                                   autocommit=False)
+
+
+# ---------- Schema ----------
+def apply_schema(conn, path: str = SCHEMA_PATH) -> int:
+    """Rebuild from create_tables.sql; every migration is then recorded as applied."""
+    with open(path, encoding="utf-8") as f:
+        statements = migrate.split_sql(f.read())
+    cur = conn.cursor()
+    cur.execute("SET FOREIGN_KEY_CHECKS = 0")
+    try:
+        for stmt in statements:
+            cur.execute(stmt)
+    finally:
+        cur.execute("SET FOREIGN_KEY_CHECKS = 1")
+    conn.commit()
+    cur.execute("DROP TABLE IF EXISTS schema_migrations")
+    migrate.migrate(conn)
+    return len(statements)
+
+
+# ---------- Event shapes ----------
+def load_templates(path: str = TEMPLATES_PATH, limit: int = 2000) -> List[Dict[str, Any]]:
+    """Feed items to copy shapes from; a truncated feed keeps what parsed."""
+    templates = []
+    try:
+        for item in load_events.iter_feed_items(path):
+            if isinstance(item, dict) and item.get("title"):
+                templates.append(item)
+                if len(templates) >= limit:
+                    break
+    except (ValueError, OSError) as e:
+        if not templates:
+            raise
+        print(f"  {path}: kept {len(templates)} templates ({e})", file=sys.stderr)
+    return templates
+
+
+def load_cities(path: str = CENTROIDS_PATH) -> List[Tuple[str, str]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        return [(row["city"], row["state"]) for row in csv.DictReader(f)]
+
+
+def _clock(t: datetime) -> str:
+    hour = t.hour % 12 or 12
+    return f"{hour}:{t.minute:02d} {'AM' if t.hour < 12 else 'PM'}"
+
+
+def synth_item(template: Dict[str, Any], city: str, state: str,
+               start: datetime, title: str) -> Dict[str, Any]:
+    """A feed item shaped like `template`, moved to city/state and `start` (local time)."""
+    address = template.get("address") or []
+    venue = address[0] if address and isinstance(address[0], str) else "Bench Hall"
+    end = start + timedelta(minutes=90 + 30 * (len(title) % 4))
+    return {
+        "title": title,
+        "date": {
+            "start_date": f"{start:%b} {start.day}",
+            "when": f"{start:%a}, {start:%b} {start.day}, {_clock(start)} – {_clock(end)}",
+        },
+        "address": [venue, f"{city}, {state}"],
+        "link": template.get("link"),
+        "description": template.get("description"),
+    }
+
+
+def synth_items(rng: random.Random, templates: Sequence[Dict[str, Any]],
+                cities: Sequence[Tuple[str, str]], per_city: int,
+                label: str = "", days: int = 60) -> Iterator[Dict[str, Any]]:
+    """per_city upcoming events in each city, starting within the next `days` days."""
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    n = 0
+    for city, state in cities:
+        for _ in range(per_city):
+            template = rng.choice(templates)
+            start = today + timedelta(days=rng.randrange(1, days),
+                                      hours=rng.randrange(10, 22), minutes=rng.choice((0, 30)))
+            n += 1
+            title = f"{template['title'][:80]}{label} #{n}"
+            yield synth_item(template, city, state, start, title)
+
+
+# ---------- Dataset ----------
+def _chunks(seq: Sequence, n: int) -> Iterator[Sequence]:
+    for i in range(0, len(seq), n):
+        yield seq[i:i + n]
+
+
+def seed(conn, ev_cnx, rng: random.Random, templates, cities: Sequence[Tuple[str, str]],
+         users: int, events_per_city: int, interests_per_user: int, ratings_per_user: int,
+         yes_rate: float, group_size: int, messages_per_group: int,
+         batch_size: int = 1000) -> Dict[str, Any]:
+    report: Dict[str, Any] = {"phases_s": {}}
+    cur = conn.cursor()
+
+    def phase(name, start):
+        report["phases_s"][name] = round(time.perf_counter() - start, 3)
+
+    # interests + users
+    t0 = time.perf_counter()
+    cur.executemany("INSERT IGNORE INTO Interests (interest_name) VALUES (%s)", [(i,) for i in INTERESTS])
+    cur.execute("SELECT interest_id FROM Interests")
+    interest_ids = [r["interest_id"] for r in cur.fetchall()]
+    people = [(f"{PREFIX}{i}",) + cities[i % len(cities)] for i in range(users)]
+    for chunk in _chunks(people, batch_size):
+        cur.executemany(
+            """
+            INSERT INTO Users
+            (username, email, full_name, user_password, user_city, user_state, user_age, user_gender)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            """,
+            [(u, f"{u}@example.com", f"Bench {u[len(PREFIX):]}", PASSWORD, city, state,
+              rng.randrange(18, 60), rng.choice("MFX")) for u, city, state in chunk],
+        )
+    likes = [(u, iid) for u, _, _ in people
+             for iid in rng.sample(interest_ids, min(interests_per_user, len(interest_ids)))]
+    for chunk in _chunks(likes, batch_size):
+        cur.executemany("INSERT INTO User_Interests (username, interest_id) VALUES (%s, %s)", chunk)
+    conn.commit()
+    phase("users", t0)
+
+    # events, through the loader's bulk path
+    t0 = time.perf_counter()
+    rows = (load_events.normalize_item(item)
+            for item in synth_items(rng, templates, cities, events_per_city))
+    loaded = load_events.load_rows_bulk(ev_cnx, (r for r in rows if r is not None),
+                                        batch_size=batch_size, progress_every=0)
+    phase("events", t0)
+
+    cur.execute("SELECT event_id, venue_location FROM Single_Events")
+    by_city: Dict[str, List[int]] = {}
+    for r in cur.fetchall():
+        by_city.setdefault(r["venue_location"], []).append(r["event_id"])
+
+    # ratings; every "yes" is also a match
+    t0 = time.perf_counter()
+    ratings = []
+    yes_by_event: Dict[int, List[str]] = {}
+    for u, city, state in people:
+        pool = by_city.get(f"{city}, {state}", [])
+        for eid in rng.sample(pool, min(ratings_per_user, len(pool))):
+            yes = rng.random() < yes_rate
+            ratings.append((u, eid, 1 if yes else 0))
+            if yes:
+                yes_by_event.setdefault(eid, []).append(u)
+    for chunk in _chunks(ratings, batch_size):
+        cur.executemany("INSERT INTO User_Event_Ratings (username, event_id, rating) VALUES (%s, %s, %s)", chunk)
+    conn.commit()
+    phase("ratings", t0)
+
+    # groups of group_size per event; the rest wait
+    t0 = time.perf_counter()
+    matches = []
+    groups: List[Tuple[int, List[str]]] = []
+    for eid in sorted(yes_by_event):
+        swipers = yes_by_event[eid]
+        rng.shuffle(swipers)
+        full = len(swipers) - len(swipers) % group_size
+        for i in range(0, full, group_size):
+            cur.execute("INSERT INTO Match_Groups (event_id) VALUES (%s)", (eid,))
+            members = swipers[i:i + group_size]
+            groups.append((cur.lastrowid, members))
+            matches.extend((eid, u, cur.lastrowid) for u in members)
+        matches.extend((eid, u, None) for u in swipers[full:])
+    for chunk in _chunks(matches, batch_size):
+        cur.executemany("INSERT INTO Matches (event_id, username, group_id) VALUES (%s, %s, %s)", chunk)
+    cur.execute("""
+        UPDATE Single_Events e
+        JOIN (SELECT event_id, COUNT(*) AS n FROM Matches GROUP BY event_id) m ON m.event_id = e.event_id
+        SET e.popularity = m.n
+    """)
+    conn.commit()
+    phase("matches", t0)
+
+    # chat history, a few minutes apart, ending now
+    t0 = time.perf_counter()
+    now = datetime.now().replace(microsecond=0)
+    messages = []
+    for gid, members in groups:
+        for k in range(messages_per_group):
+            ts = now - timedelta(minutes=7 * (messages_per_group - k))
+            messages.append((gid, rng.choice(members), rng.choice(CHAT_LINES), ts))
+    for chunk in _chunks(messages, batch_size):
+        cur.executemany(
+            "INSERT INTO Messages (group_id, sender, message_content, time_stamp) VALUES (%s, %s, %s, %s)",
+            chunk,
+        )
+    conn.commit()
+    phase("messages", t0)
+    cur.close()
+
+    report.update({
+        "users": len(people),
+        "user_interests": len(likes),
+        "cities": len(cities),
+        "venues": loaded["venues"],
+        "events": loaded["inserted"],
+        "ratings": len(ratings),
+        "matches": len(matches),
+        "groups": len(groups),
+        "messages": len(messages),
+    })
+    return report
+
+
+def pick_cities(rng: random.Random, n: int) -> List[Tuple[str, str]]:
+    cities = load_cities()
+    return sorted(rng.sample(cities, min(n, len(cities))))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    add_db_args(ap)
+    ap.add_argument("--schema", action="store_true",
+                    help="drop and recreate every table from create_tables.sql first")
+    ap.add_argument("--seed", default=42, type=int)
+    ap.add_argument("--users", default=1000, type=int)
+    ap.add_argument("--cities", default=10, type=int)
+    ap.add_argument("--events-per-city", default=200, type=int)
+    ap.add_argument("--interests-per-user", default=4, type=int)
+    ap.add_argument("--ratings-per-user", default=30, type=int)
+    ap.add_argument("--yes-rate", default=0.3, type=float)
+    ap.add_argument("--group-size", default=int(os.environ.get("BUBBL_GROUP_SIZE", 2)), type=int)
+    ap.add_argument("--messages-per-group", default=20, type=int)
+    ap.add_argument("--templates", default=TEMPLATES_PATH, help="feed file to copy event shapes from")
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    templates = load_templates(args.templates)
+    cities = pick_cities(rng, args.cities)
+
+    conn = pymysql_connect(args)
+    ev_cnx = connector_connect(args)
+    try:
+        start = time.perf_counter()
+        statements = apply_schema(conn) if args.schema else 0
+        report = seed(conn, ev_cnx, rng, templates, cities,
+                      users=args.users, events_per_city=args.events_per_city,
+                      interests_per_user=args.interests_per_user,
+                      ratings_per_user=args.ratings_per_user, yes_rate=args.yes_rate,
+                      group_size=args.group_size, messages_per_group=args.messages_per_group)
+        report["elapsed_s"] = round(time.perf_counter() - start, 3)
+    finally:
+        ev_cnx.close()
+        conn.close()
+
+    report = {"seed": args.seed, "schema_statements": statements, "templates": len(templates), **report}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+In-process pub/sub for group chat.
+
+The chat page used to poll MySQL every 2 seconds per open tab. Now the
+message POST publishes each new message here, and readers (SSE streams,
+long-polls) block on the group's condition variable until something
+arrives. An idle chat costs no queries.
+
+Each group keeps a short ring buffer of recent messages. The bus can only
+vouch for "everything after id N" once it knows nothing is missing, i.e.
+after the caller has caught up from the database once (synced()) or
+while N is newer than anything evicted from the buffer. read() returns
+None when it can't vouch, and the caller falls back to one query.
+
+wait_async() is the same wait for asyncio readers (async_app.py). They
+are woken through their event loop instead of the condition variable.
+
+Messages are only fanned out within this process. With several worker
+processes, a message posted through another worker never reaches this
+bus, so it must not vouch for anything. Built with vouch=False (or after
+disable_vouching(), which Services calls in every forked worker), read()
+always returns None and the caller asks the database. wait() then blocks
+only until a local publish or `recheck` seconds, whichever comes first,
+before it sends the caller back to the database. Chat still works across
+workers; it just queries every `recheck` seconds per waiting reader, like
+the old polling.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+Message = Dict[str, Any]  # {"id", "sender", "message", "ts"}, as the chat API returns it
+
+
+class _Channel:
+    __slots__ = ("buffer", "floor", "evicted_upto", "cond", "waiters", "last_used", "write_lock",
+                 "listeners")
+
+    def __init__(self, history: int, lock: threading.Lock):
+        self.buffer: Deque[Message] = deque(maxlen=history)
+        self.floor: Optional[int] = None  # every message with id > floor is in buffer
+        self.evicted_upto = 0
+        self.cond = threading.Condition(lock)
+        self.waiters = 0
+        self.last_used = time.monotonic()
+        self.write_lock = threading.Lock()
+        self.listeners: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+
+
+class ChatBus:
+    def __init__(self, history: int = 100, idle_ttl: float = 3600.0, vouch: bool = True,
+                 recheck: float = 2.0):
+        self.history = history
+        self.idle_ttl = idle_ttl
+        self.vouch = vouch
+        self.recheck = recheck
+        self._lock = threading.Lock()
+        self._channels: Dict[int, _Channel] = {}
+        self.published = 0
+        self.delivered = 0
+        self.fallbacks = 0
+
+    def _channel(self, group_id: int) -> _Channel:
+        ch = self._channels.get(group_id)
+        if ch is None:
+            ch = self._channels[group_id] = _Channel(self.history, self._lock)
+        ch.last_used = time.monotonic()
+        return ch
+
+    # ---------- writers ----------
+    def ordered(self, group_id: int) -> threading.Lock:
+        """Hold around insert + commit + publish so ids reach the bus in increasing order."""
+        with self._lock:
+            return self._channel(group_id).write_lock
+
+    def publish(self, group_id: int, message: Message):
+        """Call after the message is committed."""
+        with self._lock:
+            ch = self._channel(group_id)
+            if len(ch.buffer) == ch.buffer.maxlen:
+                ch.evicted_upto = ch.buffer[0]["id"]
+                if ch.floor is not None:
+                    ch.floor = max(ch.floor, ch.evicted_upto)
+            ch.buffer.append(message)
+            self.published += 1
+            ch.cond.notify_all()
+            for loop, event in ch.listeners:
+                loop.call_soon_threadsafe(event.set)
+            self._sweep()
+
+    def synced(self, group_id: int, upto_id: int):
+        """The caller has read everything up to upto_id from the database."""
+        with self._lock:
+            ch = self._channel(group_id)
+            if ch.floor is None:
+                ch.floor = max(upto_id, ch.evicted_upto)
+
+    def disable_vouching(self):
+        """Other processes post to the same groups: always send readers to the database."""
+        with self._lock:
+            self.vouch = False
+
+    # ---------- readers ----------
+    def read(self, group_id: int, since_id: int) -> Optional[List[Message]]:
+        """Buffered messages newer than since_id, or None if the buffer can't cover the gap."""
+        with self._lock:
+            return self._read(self._channel(group_id), since_id)
+
+    def _read(self, ch: _Channel, since_id: int) -> Optional[List[Message]]:
+        if not self.vouch or ch.floor is None or since_id < ch.floor:
+            self.fallbacks += 1
+            return None
+        out = [m for m in ch.buffer if m["id"] > since_id]
+        self.delivered += len(out)
+        return out
+
+    def wait(self, group_id: int, since_id: int, timeout: float) -> Optional[List[Message]]:
+        """Like read(), but blocks up to `timeout` seconds for a new message; [] on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            ch = self._channel(group_id)
+            ch.waiters += 1
+            try:
+                if not self.vouch:
+                    # a local publish ends the wait early; other workers' posts need the query
+                    ch.cond.wait(min(timeout, self.recheck))
+                    return self._read(ch, since_id)
+                while True:
+                    msgs = self._read(ch, since_id)
+                    if msgs is None or msgs:
+                        return msgs
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return []
+                    ch.cond.wait(remaining)
+            finally:
+                ch.waiters -= 1
+                ch.last_used = time.monotonic()
+
+    async def wait_async(self, group_id: int, since_id: int, timeout: float) -> Optional[List[Message]]:
+        """wait() for coroutines: suspends instead of blocking the event loop's thread."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            event = asyncio.Event()
+            with self._lock:
+                ch = self._channel(group_id)
+                vouch = self.vouch
+                msgs = self._read(ch, since_id) if vouch else []
+                if msgs is None or msgs:
+                    return msgs
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return [] if vouch else self._read(ch, since_id)
+                if not vouch:
+                    remaining = min(remaining, self.recheck)
+                listener = (loop, event)
+                ch.listeners.append(listener)
+                ch.waiters += 1
+            try:
+                await asyncio.wait_for(event.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self._lock:
+                    ch.listeners.remove(listener)
+                    ch.waiters -= 1
+                    ch.last_used = time.monotonic()
+            if not vouch:
+                with self._lock:
+                    return self._read(ch, since_id)
+
+    # ---------- housekeeping ----------
+    def _sweep(self):
+        # drop channels nobody has touched in a while; caller holds the lock
+        if len(self._channels) < 1000:
+            return
+        cutoff = time.monotonic() - self.idle_ttl
+        for gid in [g for g, ch in self._channels.items()
+                    if ch.waiters == 0 and ch.last_used < cutoff and not ch.write_lock.locked()]:
+            del self._channels[gid]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "channels": len(self._channels),
+                "waiters": sum(ch.waiters for ch in self._channels.values()),
+                "published": self.published,
+                "delivered": self.delivered,
+                "fallbacks": self.fallbacks,
+            }
@@ -1,4 +1,7 @@
 /* ---------- 1) Drop tables if created -----*/
+DROP TABLE IF EXISTS User_Event_Ratings;
+DROP TABLE IF EXISTS User_Interests;
+DROP TABLE IF EXISTS Interests;
 DROP TABLE IF EXISTS Matches;
 DROP TABLE IF EXISTS Messages;
 DROP TABLE IF EXISTS Match_Groups;
@@ -22,6 +25,9 @@ CREATE TABLE Users (
 CREATE TABLE Venue (
     venue_address     		VARCHAR(100) NOT NULL,
     venue_location 				VARCHAR(100) NOT NULL,
+    /* city centroid from city_centroids.csv; geo.VenueGeoIndex serves radius queries */
+    lat                 DOUBLE NULL,
+    lng                 DOUBLE NULL,
     PRIMARY KEY (venue_address, venue_location)
 ) ENGINE=InnoDB;
 
@@ -33,9 +39,22 @@ CREATE TABLE Single_Events (
     venue_location      VARCHAR(100) NOT NULL,
     link                TEXT,
     popularity          BIGINT DEFAULT 0,
+    /* UTC, parsed at ingest from the feed's date.when / date.start_date */
+    start_at            DATETIME NULL,
+    end_at              DATETIME NULL,
+    /* incremental ingest (load_events.py --incremental): natural key + change detection */
+    event_key           CHAR(40) NULL,
+    content_hash        CHAR(40) NULL,
+    UNIQUE KEY uq_events_key (event_key),
     FOREIGN KEY (venue_address, venue_location) REFERENCES Venue(venue_address, venue_location)
         ON DELETE CASCADE
-        ON UPDATE CASCADE
+        ON UPDATE CASCADE,
+    /* swipe deck: keyset scan of one city's upcoming events by (start_at, event_id) */
+    INDEX idx_events_location_start (venue_location, start_at),
+    /* upcoming events everywhere (sampler, recommendations) */
+    INDEX idx_events_start (start_at, venue_location),
+    /* only used with BUBBL_KEYWORD_BACKEND=fulltext */
+    FULLTEXT INDEX ft_events_text (event_name, event_description)
 ) ENGINE=InnoDB;
 
 CREATE TABLE Match_Groups (
@@ -63,7 +82,11 @@ CREATE TABLE Matches (
     FOREIGN KEY (group_id) REFERENCES Match_Groups(group_id)
         ON DELETE CASCADE 
         ON UPDATE CASCADE,
-    CONSTRAINT unique_user_group UNIQUE (username, group_id)
+    CONSTRAINT unique_user_group UNIQUE (username, group_id),
+    /* matcher locks an event's waiting list (group_id IS NULL) through this */
+    INDEX idx_matches_event_group (event_id, group_id),
+    /* a user's matches for given events (already waiting? already matched?) */
+    INDEX idx_matches_user_event (username, event_id)
 ) ENGINE=InnoDB;
 
 CREATE TABLE Messages (
@@ -77,7 +100,9 @@ CREATE TABLE Messages (
         ON UPDATE CASCADE,
     FOREIGN KEY (group_id) REFERENCES Match_Groups(group_id)
         ON DELETE CASCADE 
-        ON UPDATE CASCADE
+        ON UPDATE CASCADE,
+    /* chat history: latest page, before_id scroll-back and since_id catch-up are all range scans */
+    INDEX idx_messages_group_id (group_id, messages_id)
 ) ENGINE=InnoDB;
 
 CREATE TABLE Interests (
@@ -92,6 +117,19 @@ CREATE TABLE User_Interests (
     FOREIGN KEY (username) REFERENCES Users(username)
         ON DELETE CASCADE ON UPDATE CASCADE,
     FOREIGN KEY (interest_id) REFERENCES Interests(interest_id)
-        ON DELETE CASCADE ON UPDATE CASCADE
+        ON DELETE CASCADE ON UPDATE CASCADE,
+    /* users by interest (similarity posting lists, bubble scoring), covering */
+    INDEX idx_user_interests_interest (interest_id, username)
 );
 
+/* one row per swipe; the PK doubles as the index for the deck's "already rated" anti-join */
+CREATE TABLE User_Event_Ratings (
+    username    VARCHAR(50) NOT NULL,
+    event_id    BIGINT UNSIGNED NOT NULL,
+    rating      TINYINT NOT NULL,
+    PRIMARY KEY (username, event_id),
+    FOREIGN KEY (username) REFERENCES Users(username)
+        ON DELETE CASCADE ON UPDATE CASCADE,
+    FOREIGN KEY (event_id) REFERENCES Single_Events(event_id)
+        ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE=InnoDB;
@@ -0,0 +1,176 @@
+"""
+Thread-safe pymysql connection pool.
+
+Every request checks a connection out, uses it, and hands it back in
+teardown. Idle connections are health-checked on borrow (ping with
+reconnect) once they have sat idle longer than `ping_interval`, and broken
+ones are replaced by a fresh connection, so MySQL's `wait_timeout` no longer kills
+the app.
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import pymysql
+from pymysql.constants import SERVER_STATUS
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out within the timeout."""
+
+
+class ConnectionPool:
+    def __init__(self, connect: Callable[[], Any], size: int = 8,
+                 timeout: float = 5.0, ping_interval: float = 30.0):
+        if size < 1:
+            raise ValueError("pool size must be >= 1")
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+
+        # LIFO so the hottest connections are reused and cold ones age out
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._last_used: Dict[int, float] = {}
+
+        # metrics
+        self._checked_out = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._created = 0
+        self._reconnects = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    # ---------- checkout / release ----------
+    def acquire(self, timeout: Optional[float] = None):
+        timeout = self.timeout if timeout is None else timeout
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=timeout):
+            with self._lock:
+                self._timeouts += 1
+            raise PoolTimeout(f"no DB connection available after {timeout:.1f}s")
+        waited = time.perf_counter() - start
+
+        try:
+            conn = self._checkout_connection()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._checked_out += 1
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return conn
+
+    def release(self, conn, broken: bool = False):
+        try:
+            if not broken and conn.open:
+                # never hand the next request a half-finished transaction
+                if conn.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+                    conn.rollback()
+                self._last_used[id(conn)] = time.monotonic()
+                self._idle.put(conn)
+            else:
+                self._discard(conn)
+        except pymysql.MySQLError:
+            self._discard(conn)
+        finally:
+            with self._lock:
+                self._checked_out -= 1
+            self._slots.release()
+
+    def _checkout_connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            return self._new_connection()
+
+        idle_for = time.monotonic() - self._last_used.get(id(conn), 0.0)
+        if idle_for < self.ping_interval:
+            return conn
+
+        # health check; a stale socket is replaced with a fresh connection
+        try:
+            conn.ping(reconnect=False)
+            return conn
+        except pymysql.MySQLError:
+            self._discard(conn)
+            with self._lock:
+                self._reconnects += 1
+            return self._new_connection()
+
+    def _new_connection(self):
+        conn = self._connect()
+        with self._lock:
+            self._created += 1
+        return conn
+
+    def _discard(self, conn):
+        self._last_used.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    # ---------- context manager ----------
+    def connection(self):
+        return _Checkout(self)
+
+    def after_fork(self):
+        """Forget connections inherited from the parent process, without closing them.
+
+        Their sockets are shared with the parent, whose connections a close
+        here would end (COM_QUIT). The child connects again on demand.
+        """
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._last_used = {}
+        self._checked_out = 0
+
+    def close(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+    # ---------- metrics ----------
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": self.size,
+                "checked_out": self._checked_out,
+                "idle": self._idle.qsize(),
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "created": self._created,
+                "reconnects": self._reconnects,
+                "wait_total_ms": round(self._wait_total * 1000, 3),
+                "wait_avg_ms": round(self._wait_total * 1000 / self._checkouts, 3) if self._checkouts else 0.0,
+                "wait_max_ms": round(self._wait_max * 1000, 3),
+            }
+
+
+class _Checkout:
+    """`with pool.connection() as conn:` for code running outside a request."""
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+        self.conn = None
+
+    def __enter__(self):
+        self.conn = self.pool.acquire()
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        broken = isinstance(exc, (pymysql.OperationalError, pymysql.InterfaceError))
+        self.pool.release(self.conn, broken=broken)
+        return False
@@ -0,0 +1,161 @@
+"""
+Keyset-paginated event feed for the swipe deck.
+
+The deck only ever needs a handful of cards at a time, so instead of
+shipping every local event we page through the city's upcoming events in
+start order, keyed on (start_at, event_id) with an opaque cursor, and
+select just the columns a card renders. Events that are over, or that the
+user has already swiped, are never served.
+"""
+
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+FEED_PAGE_SIZE = 10
+FEED_MAX_PAGE_SIZE = 50
+CARD_DESC_CHARS = 400  # cards show a short blurb, not the whole TEXT column
+STARTED_GRACE = timedelta(hours=1)  # events that began this recently are still shown
+
+CARD_COLUMNS = f"""
+    event_id, event_name,
+    LEFT(event_description, {CARD_DESC_CHARS}) AS event_description,
+    venue_address, venue_location, link, start_at, end_at
+"""
+
+Position = Tuple[datetime, int]  # (start_at, event_id) of the last card served
+
+
+class BadCursor(ValueError):
+    pass
+
+
+def upcoming_since(now: Optional[datetime] = None) -> datetime:
+    """Earliest start_at (naive UTC, like the column) that still counts as upcoming."""
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    return now - STARTED_GRACE
+
+
+# ---------- Cursor encoding ----------
+def encode_cursor(start_at: datetime, last_id: int) -> str:
+    raw = json.dumps({"t": start_at.isoformat(), "id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: Optional[str], since: datetime) -> Position:
+    """Position to continue after; a cursor that has fallen behind `since` restarts there."""
+    if not token:
+        return since, 0
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        start_at = datetime.fromisoformat(data["t"])
+        last_id = int(data["id"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise BadCursor("invalid feed cursor") from e
+    if last_id < 0:
+        raise BadCursor("invalid feed cursor")
+    if start_at < since:
+        return since, 0
+    return start_at, last_id
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    if not limit or limit < 1:
+        return FEED_PAGE_SIZE
+    return min(limit, FEED_MAX_PAGE_SIZE)
+
+
+# ---------- Query ----------
+def fetch_page(cursor, location: Union[str, Sequence[str]], token: Optional[str] = None,
+               limit: int = FEED_PAGE_SIZE, username: Optional[str] = None,
+               seen: Optional[Set[int]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Return (cards, next_cursor); next_cursor is None on the last page.
+
+    `location` is one venue_location or several (the cities within the
+    user's radius). Only upcoming events are served, soonest first, as a
+    range scan of (venue_location, start_at) per city; events without a
+    parsed start_at never qualify (rows loaded before the column existed
+    need `load_events.py --backfill-times`). Events `username` already
+    rated are left out: filtered in Python when their cached `seen` set is
+    given, otherwise with an anti-join against User_Event_Ratings (PK
+    username, event_id).
+    """
+    after = decode_cursor(token, upcoming_since())
+    limit = clamp_limit(limit)
+    locations = [location] if isinstance(location, str) else list(location)
+
+    if username is not None and seen is not None:
+        rows = _fetch_unseen_cached(cursor, locations, after, limit, seen)
+    else:
+        # one extra row tells us whether another page exists
+        rows = _fetch_range(cursor, locations, after, limit + 1, unrated_by=username)
+    return split_page(rows, limit)
+
+
+def split_page(rows: List[Dict[str, Any]], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Trim up to limit + 1 fetched rows to a page plus the cursor for the next one."""
+    next_token = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_token = encode_cursor(rows[-1]["start_at"], rows[-1]["event_id"])
+    return rows, next_token
+
+
+def range_query(locations: Sequence[str], after: Position, n: int,
+                unrated_by: Optional[str] = None) -> Tuple[str, List[Any]]:
+    """(sql, params) for the next n upcoming cards after `after` across `locations`."""
+    start_at, after_id = after
+    anti_join = """
+          AND NOT EXISTS (
+              SELECT 1 FROM User_Event_Ratings r
+              WHERE r.username = %s AND r.event_id = e.event_id
+          )""" if unrated_by is not None else ""
+    one_city = f"""
+        SELECT {CARD_COLUMNS}
+        FROM Single_Events e
+        WHERE e.venue_location = %s
+          AND e.start_at >= %s
+          AND (e.start_at > %s OR e.event_id > %s){anti_join}
+        ORDER BY e.start_at, e.event_id
+        LIMIT %s
+    """
+
+    def params(location):
+        return ((location, start_at, start_at, after_id)
+                + ((unrated_by,) if unrated_by is not None else ()) + (n,))
+
+    if len(locations) == 1:
+        return one_city, list(params(locations[0]))
+    # each branch is a short range scan of its own city; only their
+    # n-row heads get merged, never every upcoming event in the radius
+    branches = " UNION ALL ".join(f"({one_city})" for _ in locations)
+    return f"""
+        SELECT * FROM ({branches}) AS nearby
+        ORDER BY start_at, event_id
+        LIMIT %s
+    """, [p for loc in locations for p in params(loc)] + [n]
+
+
+def _fetch_range(cursor, locations: Sequence[str], after: Position, n: int,
+                 unrated_by: Optional[str] = None) -> List[Dict[str, Any]]:
+    cursor.execute(*range_query(locations, after, n, unrated_by))
+    return list(cursor.fetchall())
+
+
+def _fetch_unseen_cached(cursor, locations: Sequence[str], after: Position, limit: int,
+                         seen: Set[int]) -> List[Dict[str, Any]]:
+    # walk the (venue_location, start_at) index in chunks, dropping seen ids,
+    # until we have limit + 1 unseen cards or the cities run out
+    chunk = max(limit * 2, 20)
+    rows: List[Dict[str, Any]] = []
+    while len(rows) <= limit:
+        batch = _fetch_range(cursor, locations, after, chunk)
+        if not batch:
+            break
+        rows.extend(r for r in batch if r["event_id"] not in seen)
+        after = (batch[-1]["start_at"], batch[-1]["event_id"])
+        if len(batch) < chunk:
+            break
+    return rows
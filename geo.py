@@ -0,0 +1,199 @@
+"""
+Venue coordinates and radius lookups for the swipe deck.
+
+The feeds carry no usable coordinates (event_location_map only has opaque
+Google place ids), so venues are geocoded offline from city_centroids.csv
+by their "City, ST" venue_location. Every venue in a city therefore sits on
+the city's centroid, which is plenty for "events within 15 km".
+
+VenueGeoIndex keeps venues in an in-process grid of `cell_deg` degree
+cells. A radius query only visits the cells overlapping the circle's
+bounding box and checks the haversine distance of what is in them, so it
+stays in the low milliseconds for tens of thousands of venues. The grid is
+reloaded in the background once older than `max_age`.
+"""
+
+import csv
+import logging
+import math
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+log = logging.getLogger(__name__)
+
+CENTROIDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "city_centroids.csv")
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG_LAT = 111.32
+
+LatLng = Tuple[float, float]
+
+
+# ---------- Geocoding ----------
+def location_key(location: str) -> str:
+    """"St. Charles, IL" and "st charles,il" map to the same key."""
+    parts = [p.strip() for p in location.replace(".", "").lower().split(",")]
+    return ", ".join(" ".join(p.split()) for p in parts if p)
+
+
+def normalize_loc(city: Optional[str], state: Optional[str]) -> str:
+    """A user's city and state in venue_location form ("Chicago, IL"); "" if either is missing."""
+    if not city or not state:
+        return ""
+    return f"{city.strip().title()}, {state.strip().upper()}"
+
+
+@lru_cache(maxsize=None)
+def load_centroids(path: str = CENTROIDS_PATH) -> Dict[str, LatLng]:
+    centroids = {}
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                key = location_key(f'{row["city"]}, {row["state"]}')
+                centroids[key] = (float(row["lat"]), float(row["lng"]))
+    except FileNotFoundError:
+        log.warning("no city centroid table at %s; radius lookups disabled", path)
+    return centroids
+
+
+def geocode(location: Optional[str]) -> Optional[LatLng]:
+    """Centroid of a "City, ST" location, or None when the city isn't in the table."""
+    if not location:
+        return None
+    return load_centroids().get(location_key(location))
+
+
+def haversine_km(a: LatLng, b: LatLng) -> float:
+    lat1, lng1, lat2, lng2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+
+# ---------- Index ----------
+class VenueGeoIndex:
+    def __init__(self, pool, cell_deg: float = 0.1, max_age: float = 300.0):
+        self.pool = pool
+        self.cell_deg = cell_deg
+        self.max_age = max_age
+        # cell -> [(lat, lng, venue_address, venue_location)]
+        self._cells: Dict[Tuple[int, int], List[Tuple[float, float, str, str]]] = {}
+        self._venues = 0
+        self._ungeocoded = 0
+        self._near_cache: Dict[Tuple[str, float], List[str]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.RLock()  # re-entered by load() during a guarded first load
+        self._reloading = False
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg)
+
+    # ---------- loading ----------
+    def load(self, rows: Sequence[Tuple[str, str, Optional[float], Optional[float]]]):
+        """Replace the grid with (venue_address, venue_location, lat, lng) rows.
+
+        Venues stored without coordinates are geocoded from their location.
+        """
+        cells: Dict[Tuple[int, int], List[Tuple[float, float, str, str]]] = {}
+        venues = ungeocoded = 0
+        for address, location, lat, lng in rows:
+            if lat is None or lng is None:
+                point = geocode(location)
+                if point is None:
+                    ungeocoded += 1
+                    continue
+                lat, lng = point
+            cells.setdefault(self._cell(lat, lng), []).append((lat, lng, address, location))
+            venues += 1
+        with self._lock:
+            self._cells, self._venues, self._ungeocoded = cells, venues, ungeocoded
+            self._near_cache = {}
+            self._loaded_at = time.monotonic()
+
+    def refresh(self, conn):
+        cursor = conn.cursor()
+        cursor.execute("SELECT venue_address, venue_location, lat, lng FROM Venue")
+        rows = [(r["venue_address"], r["venue_location"], r["lat"], r["lng"]) for r in cursor.fetchall()]
+        cursor.close()
+        conn.commit()
+        self.load(rows)
+
+    def _ensure_fresh(self):
+        if self._loaded_at is None:
+            # one cold load; a burst of first requests waits for it instead of each reading Venue
+            with self._lock:
+                if self._loaded_at is None:
+                    with self.pool.connection() as conn:
+                        self.refresh(conn)
+        elif time.monotonic() - self._loaded_at > self.max_age and not self._reloading:
+            self._reloading = True
+            threading.Thread(target=self._reload, name="venue-geo-reload", daemon=True).start()
+
+    def _reload(self):
+        try:
+            with self.pool.connection() as conn:
+                self.refresh(conn)
+        except Exception:
+            log.exception("venue geo index reload failed")
+        finally:
+            self._reloading = False
+
+    # ---------- queries ----------
+    def within(self, center: LatLng, radius_km: float) -> List[Tuple[float, str, str]]:
+        """(distance_km, venue_address, venue_location) of venues within radius_km, nearest first."""
+        if self.pool is not None:
+            self._ensure_fresh()
+        lat, lng = center
+        dlat = radius_km / KM_PER_DEG_LAT
+        dlng = radius_km / (KM_PER_DEG_LAT * max(math.cos(math.radians(lat)), 1e-6))
+        lo = self._cell(lat - dlat, lng - dlng)
+        hi = self._cell(lat + dlat, lng + dlng)
+
+        with self._lock:
+            cells = self._cells
+        hits = []
+        for i in range(lo[0], hi[0] + 1):
+            for j in range(lo[1], hi[1] + 1):
+                for vlat, vlng, address, location in cells.get((i, j), ()):
+                    d = haversine_km(center, (vlat, vlng))
+                    if d <= radius_km:
+                        hits.append((d, address, location))
+        hits.sort()
+        return hits
+
+    def locations_near(self, location: str, radius_km: float, limit: int = 50) -> List[str]:
+        """venue_locations with a venue within radius_km of `location`'s centroid, nearest first.
+
+        `location` itself always comes first, so an ungeocodable city still
+        gets its exact-match events.
+        """
+        key = (location, radius_km)
+        with self._lock:
+            cached = self._near_cache.get(key)
+        if cached is not None and self._loaded_at is not None \
+                and time.monotonic() - self._loaded_at <= self.max_age:
+            return cached
+
+        near = [location]
+        center = geocode(location)
+        if center is not None:
+            for _, _, loc in self.within(center, radius_km):
+                if loc not in near:
+                    near.append(loc)
+                    if len(near) >= limit:
+                        break
+        with self._lock:
+            self._near_cache[key] = near
+        return near
+
+    def stats(self):
+        with self._lock:
+            return {
+                "venues": self._venues,
+                "ungeocoded": self._ungeocoded,
+                "cells": len(self._cells),
+                "cached_lookups": len(self._near_cache),
+                "age_s": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at else None,
+            }
@@ -0,0 +1,154 @@
+"""
+Everything the group page renders, in at most two round-trips.
+
+The page used to run four queries: the group, its event, its members and
+the full message history. The members query joined Matches on event_id,
+so it listed everyone who had ever matched the event across all of its
+groups. load_group_header() fetches the group, a summary of its event and
+its actual members (by group_id) in one query. The latest page of
+messages is the second.
+
+GroupViewCache keeps both per group. The header is dropped when the
+group's membership changes. The message page is dropped on every new
+message, and the next view reloads just that part.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+MEMBER_SEP = "\x1f"
+MAX_MESSAGE_ID = 2 ** 64 - 1  # BIGINT UNSIGNED
+
+Header = Dict[str, Any]  # {"group": ..., "event": ..., "users": [{"username"}, ...]}
+Page = Tuple[List[Dict[str, Any]], Optional[int]]  # (messages oldest first, next_before_id)
+
+
+def load_group_header(cursor, group_id: int) -> Optional[Header]:
+    cursor.execute("""
+        SELECT g.group_id, g.group_name, g.event_id,
+               e.event_name, e.venue_address, e.venue_location, e.link, e.start_at, e.end_at,
+               (SELECT GROUP_CONCAT(DISTINCT m.username ORDER BY m.username SEPARATOR %s)
+                FROM Matches m
+                WHERE m.group_id = g.group_id) AS members
+        FROM Match_Groups g
+        JOIN Single_Events e ON e.event_id = g.event_id
+        WHERE g.group_id = %s
+    """, (MEMBER_SEP, group_id))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    members = row["members"].split(MEMBER_SEP) if row["members"] else []
+    return {
+        "group": {"group_id": row["group_id"], "group_name": row["group_name"],
+                  "event_id": row["event_id"]},
+        "event": {k: row[k] for k in ("event_id", "event_name", "venue_address",
+                                      "venue_location", "link", "start_at", "end_at")},
+        "users": [{"username": u} for u in members],
+    }
+
+
+# ---------- messages ----------
+# shared by app.py and async_app.py; both take (group_id, id, limit)
+MESSAGES_SINCE_SQL = """
+    SELECT messages_id, sender, message_content, time_stamp
+    FROM Messages
+    WHERE group_id = %s AND messages_id > %s
+    ORDER BY messages_id ASC
+    LIMIT %s
+"""
+MESSAGES_BEFORE_SQL = """
+    SELECT messages_id, sender, message_content, time_stamp
+    FROM Messages
+    WHERE group_id = %s AND messages_id < %s
+    ORDER BY messages_id DESC
+    LIMIT %s
+"""
+
+
+def message_json(r: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": r["messages_id"],
+        "sender": r["sender"],
+        "message": r["message_content"],
+        "ts": r["time_stamp"].strftime("%Y-%m-%d %H:%M:%S") if r["time_stamp"] else None,
+    }
+
+
+def split_message_page(rows: List[Dict[str, Any]], limit: int) -> Page:
+    """MESSAGES_BEFORE_SQL rows (newest first, limit + 1 of them) -> page oldest first + next_before_id."""
+    rows = list(rows)
+    next_before_id = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_before_id = rows[-1]["messages_id"]
+    rows.reverse()
+    return rows, next_before_id
+
+
+class GroupViewCache:
+    def __init__(self, max_groups: int = 2000, ttl: float = 300.0):
+        self.max_groups = max_groups
+        self.ttl = ttl
+        # group_id -> [stored_at, header or None, page or None]
+        self._entries: "OrderedDict[int, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._epoch = 0  # bumped by every invalidation
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def epoch(self) -> int:
+        """Read before loading; pass to put() so a load that raced an invalidation isn't cached."""
+        return self._epoch
+
+    def get(self, group_id: int) -> Tuple[Optional[Header], Optional[Page]]:
+        with self._lock:
+            entry = self._entries.get(group_id)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                self._entries.pop(group_id, None)
+                self.misses += 1
+                return None, None
+            self._entries.move_to_end(group_id)
+            if entry[1] is not None and entry[2] is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return entry[1], entry[2]
+
+    def put(self, group_id: int, header: Header, page: Page, epoch: int):
+        with self._lock:
+            if epoch != self._epoch:
+                return
+            self._entries[group_id] = [time.monotonic(), header, page]
+            self._entries.move_to_end(group_id)
+            while len(self._entries) > self.max_groups:
+                self._entries.popitem(last=False)
+
+    # ---------- invalidation ----------
+    def invalidate(self, group_id: int):
+        """Membership (or the group itself) changed."""
+        with self._lock:
+            self._epoch += 1
+            if self._entries.pop(group_id, None) is not None:
+                self.invalidations += 1
+
+    def invalidate_messages(self, group_id: int):
+        with self._lock:
+            self._epoch += 1
+            entry = self._entries.get(group_id)
+            if entry is not None and entry[2] is not None:
+                entry[2] = None
+                self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "groups": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,271 @@
+"""
+Per-request SQL instrumentation and latency metrics.
+
+InstrumentedCursor (a DictCursor) times every statement and charges it to
+the current request: statement count, total DB time and the slowest few
+statements, as normalized SQL with literals and IN lists collapsed so
+similar queries group together. Each app's pool connections are created with
+its own subclass from cursor_class() as their cursorclass, so plain
+`conn.cursor()` calls are covered wherever they happen.
+
+init_app() hooks a Flask app to:
+  * send a Server-Timing header (db time and statement count, app total);
+  * keep a rolling window of recent requests per endpoint, reported as
+    p50/p95/p99;
+  * keep running totals per normalized statement (top statements by
+    total time);
+  * log requests slower than `slow_ms` with their slowest statements;
+  * profile a sample of requests with cProfile (`profile_rate`, 0 = off)
+    and keep the most recent reports.
+
+Statements run outside a request (background threads) are only counted
+in the per-statement totals.
+"""
+
+import cProfile
+import io
+import logging
+import math
+import pstats
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from pymysql.cursors import DictCursor
+
+log = logging.getLogger(__name__)
+
+SLOWEST_PER_REQUEST = 3
+
+
+# ---------- SQL normalization ----------
+_string_re = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"")
+_number_re = re.compile(r"\b\d+(?:\.\d+)?\b")
+_param_re = re.compile(r"%s|%\(\w+\)s")
+_list_re = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_values_re = re.compile(r"(VALUES\s*\(\?\.\.\.\))(?:\s*,\s*\(\?\.\.\.\))+", re.IGNORECASE)
+_space_re = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(sql: str) -> str:
+    """`SELECT * FROM t WHERE id IN (%s, %s) AND x = 'a'` -> `SELECT * FROM t WHERE id IN (?...) AND x = ?`."""
+    s = _string_re.sub("?", sql)
+    s = _param_re.sub("?", s)
+    s = _number_re.sub("?", s)
+    s = _list_re.sub("(?...)", s)
+    s = _values_re.sub(r"\1, ...", s)
+    return _space_re.sub(" ", s).strip()
+
+
+# ---------- Per-request accounting ----------
+class RequestStats:
+    __slots__ = ("started", "statements", "db_ms", "slowest")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.db_ms = 0.0
+        self.slowest: List[Tuple[float, str]] = []  # (ms, raw sql), at most SLOWEST_PER_REQUEST
+
+    def record(self, sql: str, ms: float):
+        self.statements += 1
+        self.db_ms += ms
+        if len(self.slowest) < SLOWEST_PER_REQUEST or ms > self.slowest[-1][0]:
+            self.slowest.append((ms, sql))
+            self.slowest.sort(key=lambda t: -t[0])
+            del self.slowest[SLOWEST_PER_REQUEST:]
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("bubbl_request_stats", default=None)
+
+
+class InstrumentedCursor(DictCursor):
+    # set on the per-app subclass from cursor_class(); statements are recorded into it as well
+    # as the current request
+    metrics: Optional["Metrics"] = None
+    # set by bench.plan_check: normalized sql -> one instance as sent, for EXPLAIN
+    captured: Optional[Dict[str, str]] = None
+
+    def execute(self, query, args=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, args)
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            stats = _current.get()
+            if stats is not None:
+                stats.record(query, ms)
+            if self.metrics is not None:
+                self.metrics.record_statement(query, ms)
+            if self.captured is not None:
+                self.captured.setdefault(normalize_sql(query), self._executed or query)
+
+
+def cursor_class(metrics: "Metrics") -> type:
+    """An InstrumentedCursor subclass bound to one app's Metrics, for that app's pool.
+
+    Each app gets its own, so two apps in one process (tests, app.py next to
+    async_app.py) never charge statements to each other.
+    """
+    return type("InstrumentedCursor", (InstrumentedCursor,), {"metrics": metrics})
+
+
+# ---------- Aggregates ----------
+def _percentile(sorted_values: List[float], p: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    k = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return round(sorted_values[k], 2)
+
+
+class Metrics:
+    def __init__(self, window: int = 1000, max_statements: int = 500):
+        self.window = window
+        self.max_statements = max_statements
+        # endpoint -> recent (total_ms, db_ms, statements)
+        self._requests: Dict[str, Deque[Tuple[float, float, int]]] = {}
+        self._counts: Dict[str, int] = {}
+        self._slowest: Dict[str, Tuple[float, str]] = {}  # endpoint -> slowest statement seen
+        # normalized sql -> [count, total_ms, max_ms]
+        self._statements: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def record_request(self, endpoint: str, total_ms: float, stats: RequestStats):
+        with self._lock:
+            window = self._requests.get(endpoint)
+            if window is None:
+                window = self._requests[endpoint] = deque(maxlen=self.window)
+            window.append((total_ms, stats.db_ms, stats.statements))
+            self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+            if stats.slowest and stats.slowest[0][0] > self._slowest.get(endpoint, (0.0, ""))[0]:
+                self._slowest[endpoint] = (stats.slowest[0][0], normalize_sql(stats.slowest[0][1]))
+
+    def record_statement(self, sql: str, ms: float):
+        key = normalize_sql(sql)
+        with self._lock:
+            entry = self._statements.get(key)
+            if entry is None:
+                if len(self._statements) >= self.max_statements * 1.2:
+                    self._trim()
+                entry = self._statements[key] = [0, 0.0, 0.0]
+            entry[0] += 1
+            entry[1] += ms
+            entry[2] = max(entry[2], ms)
+
+    def _trim(self):
+        # keep the statements that cost the most in total
+        keep = sorted(self._statements.items(), key=lambda kv: -kv[1][1])[:self.max_statements]
+        self._statements = dict(keep)
+
+    def endpoints(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            snapshot = {ep: list(w) for ep, w in self._requests.items()}
+            counts = dict(self._counts)
+            slowest = dict(self._slowest)
+        out = {}
+        for endpoint, samples in snapshot.items():
+            totals = sorted(s[0] for s in samples)
+            dbs = sorted(s[1] for s in samples)
+            out[endpoint] = {
+                "requests": counts[endpoint],
+                "window": len(samples),
+                "p50_ms": _percentile(totals, 50),
+                "p95_ms": _percentile(totals, 95),
+                "p99_ms": _percentile(totals, 99),
+                "db_p50_ms": _percentile(dbs, 50),
+                "db_p95_ms": _percentile(dbs, 95),
+                "statements_avg": round(sum(s[2] for s in samples) / len(samples), 2),
+                "slowest_statement_ms": round(slowest[endpoint][0], 2) if endpoint in slowest else None,
+                "slowest_statement": slowest[endpoint][1] if endpoint in slowest else None,
+            }
+        return out
+
+    def top_statements(self, n: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = sorted(self._statements.items(), key=lambda kv: -kv[1][1])[:n]
+        return [{"sql": sql, "count": int(c), "total_ms": round(total, 2),
+                 "avg_ms": round(total / c, 3), "max_ms": round(mx, 2)}
+                for sql, (c, total, mx) in items]
+
+
+# ---------- Sampled profiling ----------
+class Profiler:
+    def __init__(self, rate: float = 0.0, keep: int = 20, top: int = 25):
+        self.rate = rate
+        self.top = top
+        self.reports: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self._lock = threading.Lock()
+        self._active = False  # cProfile can't nest; one sampled request at a time
+
+    def maybe_start(self) -> Optional[cProfile.Profile]:
+        if self.rate <= 0 or random.random() >= self.rate:
+            return None
+        with self._lock:
+            if self._active:
+                return None
+            self._active = True
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+        except ValueError:  # another profiler is already running in this process
+            with self._lock:
+                self._active = False
+            return None
+        return prof
+
+    def finish(self, prof: cProfile.Profile, endpoint: str, total_ms: float):
+        prof.disable()
+        with self._lock:
+            self._active = False
+        out = io.StringIO()
+        pstats.Stats(prof, stream=out).sort_stats("cumulative").print_stats(self.top)
+        self.reports.append({"endpoint": endpoint, "total_ms": round(total_ms, 2),
+                             "at": time.time(), "report": out.getvalue()})
+
+
+# ---------- Flask integration ----------
+def init_app(app, metrics: Metrics, profiler: Optional[Profiler] = None, slow_ms: float = 500.0):
+    from flask import g, request
+
+    @app.before_request
+    def _start_request_stats():
+        g._req_stats = RequestStats()
+        g._req_stats_token = _current.set(g._req_stats)
+        g._req_profile = profiler.maybe_start() if profiler is not None else None
+
+    @app.after_request
+    def _server_timing(response):
+        stats = g.get("_req_stats")
+        if stats is None:
+            return response
+        total_ms = (time.perf_counter() - stats.started) * 1000
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={stats.db_ms:.1f};desc="{stats.statements} statements", app;dur={total_ms:.1f}',
+        )
+        return response
+
+    @app.teardown_request
+    def _finish_request_stats(exc):
+        stats = g.pop("_req_stats", None)
+        if stats is None:
+            return
+        _current.reset(g.pop("_req_stats_token"))
+        total_ms = (time.perf_counter() - stats.started) * 1000
+        endpoint = request.endpoint or "<unmatched>"
+        metrics.record_request(endpoint, total_ms, stats)
+
+        prof = g.pop("_req_profile", None)
+        if prof is not None:
+            profiler.finish(prof, endpoint, total_ms)
+
+        if total_ms >= slow_ms:
+            log.warning("slow request %s %.1f ms (db %.1f ms, %d statements); slowest: %s",
+                        endpoint, total_ms, stats.db_ms, stats.statements,
+                        "; ".join(f"{ms:.1f} ms {normalize_sql(sql)}" for ms, sql in stats.slowest))
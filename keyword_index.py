@@ -0,0 +1,240 @@
+"""
+Inverted keyword index over Single_Events for content-based matching.
+
+hybrid_recommendations used to run `event_name LIKE '%kw%' OR
+event_description LIKE '%kw%'` once per interest, a full scan of two TEXT
+columns per keyword. Here every event's name and description are tokenized
+once into posting arrays (sorted event ids in compact `array('Q')`s), and
+search() ranks events against all of a user's interests in one pass.
+Every event is indexed, but search(since=...) drops those starting before
+`since` (or with no start_at) before the top `limit` are cut, as
+fulltext_search does.
+
+An interest phrase matches an event when all its tokens occur in it. A
+match in the name outranks one found only in the description. Unlike LIKE
+this matches whole words, so "art" no longer hits "party".
+
+The index is built on first use and then caught up incrementally: event
+ids only grow, so refresh() just indexes rows above the highest id seen.
+That is how rows inserted by load_events.py show up. Rows updated in place
+(load_events.py --incremental) or deleted (--expire) are not seen that
+way. So every `rebuild_age` seconds a background thread re-reads every
+event and swaps in a fresh index. A digest of each event's text tells
+whether anything changed, and if so `on_change` is called (the app clears
+its cached recommendations).
+
+fulltext_search() is the alternative backend on top of the
+ft_events_text FULLTEXT index; bench/keyword_bench.py compares the two.
+"""
+
+import logging
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+log = logging.getLogger(__name__)
+
+_token_re = re.compile(r"[a-z0-9]+")
+
+NAME_WEIGHT = 2
+DESC_WEIGHT = 1
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    return list(dict.fromkeys(t for t in _token_re.findall(text.lower()) if len(t) > 1))
+
+
+def _contains(postings: array, event_id: int) -> bool:
+    i = bisect_left(postings, event_id)
+    return i < len(postings) and postings[i] == event_id
+
+
+def _read_rows(conn, after_id: int) -> List[Dict[str, Any]]:
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT event_id, event_name, event_description, start_at
+        FROM Single_Events
+        WHERE event_id > %s
+        ORDER BY event_id
+    """, (after_id,))
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.commit()
+    return rows
+
+
+class KeywordIndex:
+    def __init__(self, pool, max_age: float = 60.0, rebuild_age: float = 600.0,
+                 on_change: Optional[Callable[[], None]] = None):
+        self.pool = pool
+        self.max_age = max_age
+        self.rebuild_age = rebuild_age
+        # called after a rebuild found updated or deleted events
+        self.on_change = on_change
+        self._name: Dict[str, array] = {}
+        self._text: Dict[str, array] = {}  # name + description
+        self._digests: Dict[int, int] = {}  # event_id -> hash of its text and start
+        self._starts: Dict[int, Optional[datetime]] = {}
+        self._max_id = 0
+        self._checked_at: Optional[float] = None
+        self._built_at: Optional[float] = None
+        self._lock = threading.RLock()
+        self._rebuilding = False
+        self.events = 0
+        self.rebuilds = 0
+        self.last_rebuild_changes = 0
+
+    # ---------- maintenance ----------
+    def add(self, event_id: int, name: Optional[str], description: Optional[str],
+            start_at: Optional[datetime] = None):
+        """Index one event. Ids must arrive in increasing order."""
+        with self._lock:
+            if event_id <= self._max_id:
+                return
+            name_tokens = tokenize(name)
+            for tok in name_tokens:
+                self._name.setdefault(tok, array("Q")).append(event_id)
+            for tok in dict.fromkeys(name_tokens + tokenize(description)):
+                self._text.setdefault(tok, array("Q")).append(event_id)
+            self._digests[event_id] = hash((name, description, start_at))
+            self._starts[event_id] = start_at
+            self._max_id = event_id
+            self.events += 1
+
+    def refresh(self, conn) -> int:
+        """Index rows added since the last refresh; returns how many."""
+        with self._lock:
+            rows = _read_rows(conn, self._max_id)
+            for row in rows:
+                self.add(row["event_id"], row["event_name"], row["event_description"], row["start_at"])
+            self._checked_at = time.monotonic()
+            if self._built_at is None:
+                self._built_at = self._checked_at
+            return len(rows)
+
+    def rebuild(self, conn) -> int:
+        """Re-index every event and swap the result in; returns how many events changed or vanished."""
+        with self._lock:
+            before = dict(self._digests)  # events known before the read: missing afterwards = deleted
+        fresh = KeywordIndex(self.pool)
+        for row in _read_rows(conn, 0):
+            fresh.add(row["event_id"], row["event_name"], row["event_description"], row["start_at"])
+        changed = sum(1 for eid, digest in before.items() if fresh._digests.get(eid) != digest)
+        with self._lock:
+            # rows a concurrent refresh() added past our snapshot are re-read by the next one
+            self._name, self._text, self._digests = fresh._name, fresh._text, fresh._digests
+            self._starts = fresh._starts
+            self._max_id, self.events = fresh._max_id, fresh.events
+            self._checked_at = self._built_at = time.monotonic()
+            self.rebuilds += 1
+            self.last_rebuild_changes = changed
+        if changed and self.on_change is not None:
+            self.on_change()
+        return changed
+
+    def ensure_fresh(self) -> int:
+        """Refresh if the last check is older than max_age; returns rows added.
+
+        A full rebuild, once rebuild_age has passed, runs in the background.
+        """
+        now = time.monotonic()
+        if (self._built_at is not None and now - self._built_at > self.rebuild_age
+                and not self._rebuilding):
+            self._rebuilding = True
+            threading.Thread(target=self._rebuild, name="keyword-rebuild", daemon=True).start()
+        if self._checked_at is not None and now - self._checked_at < self.max_age:
+            return 0
+        with self.pool.connection() as conn:
+            return self.refresh(conn)
+
+    def _rebuild(self):
+        try:
+            with self.pool.connection() as conn:
+                self.rebuild(conn)
+        except Exception:
+            log.exception("keyword index rebuild failed")
+        finally:
+            self._rebuilding = False
+
+    # ---------- queries ----------
+    def search(self, phrases: Iterable[str], limit: int = 50,
+               since: Optional[datetime] = None) -> List[int]:
+        """Event ids matching any phrase, best first.
+
+        With `since`, only events starting at or after it are returned.
+        """
+        self.ensure_fresh()
+        scores: Dict[int, int] = {}
+        with self._lock:
+            for phrase in phrases:
+                tokens = tokenize(phrase)
+                if not tokens:
+                    continue
+                in_name = self._match(self._name, tokens)
+                for eid in self._match(self._text, tokens):
+                    weight = NAME_WEIGHT if eid in in_name else DESC_WEIGHT
+                    scores[eid] = scores.get(eid, 0) + weight
+            if since is not None:
+                # filter before the cut, or past events could fill all `limit` slots
+                starts = self._starts
+                scores = {eid: n for eid, n in scores.items()
+                          if starts.get(eid) is not None and starts[eid] >= since}
+        # newer events win ties
+        ranked = sorted(scores, key=lambda eid: (-scores[eid], -eid))
+        return ranked[:limit]
+
+    @staticmethod
+    def _match(index: Dict[str, array], tokens: Sequence[str]) -> set:
+        lists = [index.get(tok) for tok in tokens]
+        if any(p is None for p in lists):
+            return set()
+        lists.sort(key=len)
+        # walk the shortest posting list and binary-search the others
+        return {eid for eid in lists[0] if all(_contains(p, eid) for p in lists[1:])}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "events": self.events,
+                "tokens": len(self._text),
+                "postings": sum(len(p) for p in self._text.values()),
+                "max_event_id": self._max_id,
+                "rebuilds": self.rebuilds,
+                "last_rebuild_changes": self.last_rebuild_changes,
+            }
+
+
+def fulltext_query(phrases: Iterable[str], limit: int = 50,
+                   since: Optional[datetime] = None) -> Optional[Tuple[str, tuple]]:
+    """(sql, params) for fulltext_search, or None when there is nothing to match."""
+    terms = " ".join(p for p in phrases if p and p.strip())
+    if not terms:
+        return None
+    upcoming = "AND start_at >= %s" if since is not None else ""
+    return f"""
+        SELECT event_id, MATCH(event_name, event_description) AGAINST (%s) AS score
+        FROM Single_Events
+        WHERE MATCH(event_name, event_description) AGAINST (%s)
+          {upcoming}
+        ORDER BY score DESC, event_id DESC
+        LIMIT %s
+    """, (terms, terms) + ((since,) if since is not None else ()) + (limit,)
+
+
+def fulltext_search(cursor, phrases: Iterable[str], limit: int = 50,
+                    since: Optional[datetime] = None) -> List[int]:
+    """Same lookup through MySQL's FULLTEXT index (ft_events_text), in one query.
+
+    With `since`, only events starting at or after it are returned.
+    """
+    query = fulltext_query(phrases, limit, since)
+    if query is None:
+        return []
+    cursor.execute(*query)
+    return [row["event_id"] for row in cursor.fetchall()]
@@ -7,6 +7,8 @@ Assumes schema:
 CREATE TABLE Venue (
     venue_address     VARCHAR(100) NOT NULL,
     venue_location VARCHAR(100) NOT NULL,
+    lat               DOUBLE NULL,        -- city centroid from city_centroids.csv
+    lng               DOUBLE NULL,
     PRIMARY KEY (venue_address, venue_location)
 ) ENGINE=InnoDB;
 
@@ -17,6 +19,12 @@ CREATE TABLE Single_Events (
     venue_address        VARCHAR(100) NOT NULL,
     venue_location    VARCHAR(100) NOT NULL,
     link              TEXT,
+    start_at          DATETIME NULL,      -- UTC, parsed from date.when / date.start_date
+    end_at            DATETIME NULL,
+    event_key         CHAR(40) NULL,      -- --incremental: sha1 of title/date/venue/link
+    content_hash      CHAR(40) NULL,      -- --incremental: sha1 of the mutable fields
+    UNIQUE KEY uq_events_key (event_key),
+    INDEX idx_events_location_start (venue_location, start_at),
     FOREIGN KEY (venue_address, venue_location)
         REFERENCES Venue(venue_address, venue_location)
         ON DELETE CASCADE ON UPDATE CASCADE
@@ -24,14 +32,27 @@ CREATE TABLE Single_Events (
 """
 
 import argparse
+import csv
+import glob
+import hashlib
 import json
+import os
 import re
+import resource
 import sys
-from typing import Any, Dict, List, Optional
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import date, datetime, time as time_of_day, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 import mysql.connector
 from mysql.connector import errorcode
 
+from geo import geocode
+
 # ---- Defaults ----
 DEFAULT_JSON = "/var/www/html/cse30246/bubbl/all_events.json"
 DEFAULT_HOST = "localhost"
@@ -116,25 +137,326 @@ def extract_link(item: Dict[str, Any]) -> Optional[str]:
         return ln
     return None
 
+# ---------- Dates ----------
+def extract_date_strings(item: Dict[str, Any]) -> Tuple[str, str]:
+    start = safe_get(item, "date", "start_date")
+    when = safe_get(item, "date", "when")
+    return (normalize(start) if isinstance(start, str) else "",
+            normalize(when) if isinstance(when, str) else "")
+
+# "Sat, Nov 1, 7:30 – 10:30 PM CDT", "Dec 31, 2025, 9 PM – Jan 1, 2026, 1 AM", "Thu, Nov 20"
+_MONTHS = {m: i for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], 1)}
+_WEEKDAYS = {d: i for i, d in enumerate(["mon", "tue", "wed", "thu", "fri", "sat", "sun"])}
+_date_re = re.compile(
+    r"(?:(?P<dow>[A-Za-z]{3})[a-z]*\.?,\s*)?(?P<mon>[A-Za-z]{3})[a-z]*\.?\s+(?P<day>\d{1,2})"
+    r"(?:,\s*(?P<year>\d{4}))?")
+_time_re = re.compile(r"(?P<h>\d{1,2})(?::(?P<m>\d{2}))?\s*(?P<ap>[AaPp]\.?[Mm]\.?)?$")
+_range_re = re.compile(r"\s*[–—]\s*|\s+-\s+")
+_tz_suffix_re = re.compile(r"\s+(?P<tz>[A-Z]{2,5})$")
+
+# offsets (hours from UTC) for the suffixes the feeds use
+TZ_OFFSETS = {
+    "UTC": 0, "GMT": 0,
+    "EST": -5, "EDT": -4, "CST": -6, "CDT": -5, "MST": -7, "MDT": -6,
+    "PST": -8, "PDT": -7, "AKST": -9, "AKDT": -8, "HST": -10,
+}
+
+# zone used when `when` carries no suffix; by venue state, multi-zone states get their main zone
+STATE_TZ = {
+    "CT": "America/New_York", "DE": "America/New_York", "DC": "America/New_York",
+    "FL": "America/New_York", "GA": "America/New_York", "IN": "America/Indiana/Indianapolis",
+    "KY": "America/New_York", "ME": "America/New_York", "MD": "America/New_York",
+    "MA": "America/New_York", "MI": "America/Detroit", "NH": "America/New_York",
+    "NJ": "America/New_York", "NY": "America/New_York", "NC": "America/New_York",
+    "OH": "America/New_York", "PA": "America/New_York", "RI": "America/New_York",
+    "SC": "America/New_York", "VT": "America/New_York", "VA": "America/New_York",
+    "WV": "America/New_York",
+    "AL": "America/Chicago", "AR": "America/Chicago", "IL": "America/Chicago",
+    "IA": "America/Chicago", "KS": "America/Chicago", "LA": "America/Chicago",
+    "MN": "America/Chicago", "MS": "America/Chicago", "MO": "America/Chicago",
+    "NE": "America/Chicago", "ND": "America/Chicago", "OK": "America/Chicago",
+    "SD": "America/Chicago", "TN": "America/Chicago", "TX": "America/Chicago",
+    "WI": "America/Chicago",
+    "AZ": "America/Phoenix", "CO": "America/Denver", "ID": "America/Boise",
+    "MT": "America/Denver", "NM": "America/Denver", "UT": "America/Denver",
+    "WY": "America/Denver",
+    "CA": "America/Los_Angeles", "NV": "America/Los_Angeles", "OR": "America/Los_Angeles",
+    "WA": "America/Los_Angeles",
+    "AK": "America/Anchorage", "HI": "Pacific/Honolulu",
+}
+
+
+def _infer_year(month: int, day: int, weekday: Optional[int], ref: date) -> Optional[date]:
+    """The feeds omit the year: pick the candidate nearest `ref`, preferring
+    ones whose weekday matches the one printed next to the date."""
+    candidates = []
+    for year in (ref.year, ref.year + 1, ref.year - 1):
+        try:
+            candidates.append(date(year, month, day))
+        except ValueError:  # Feb 29
+            pass
+    if weekday is not None:
+        candidates = [d for d in candidates if d.weekday() == weekday] or candidates
+    if not candidates:
+        return None
+    return min(candidates, key=lambda d: abs((d - ref).days))
+
+
+def _parse_date(m, ref: date) -> Optional[date]:
+    month = _MONTHS.get(m.group("mon").lower())
+    if month is None:
+        return None
+    day = int(m.group("day"))
+    if m.group("year"):
+        try:
+            return date(int(m.group("year")), month, day)
+        except ValueError:
+            return None
+    dow = m.group("dow")
+    return _infer_year(month, day, _WEEKDAYS.get(dow.lower()) if dow else None, ref)
+
+
+def _parse_time(text: str) -> Optional[Tuple[int, int, Optional[str]]]:
+    """(hour, minute, "am"/"pm" or None) from "7", "7:30", "10 PM"."""
+    m = _time_re.match(text.strip())
+    if not m:
+        return None
+    hour, minute = int(m.group("h")), int(m.group("m") or 0)
+    ap = m.group("ap")
+    ap = ap.replace(".", "").lower() if ap else None
+    if hour > 23 or minute > 59 or (ap and not 1 <= hour <= 12):
+        return None
+    return hour, minute, ap
+
+
+def _clock(hour: int, minute: int, ap: Optional[str]) -> time_of_day:
+    if ap == "am":
+        hour = 0 if hour == 12 else hour
+    elif ap == "pm":
+        hour = 12 if hour == 12 else hour + 12
+    return time_of_day(hour, minute)
+
+
+def _split_point(text: str, ref: date):
+    """(date or None, time tuple or None) for one side of a range."""
+    m = _date_re.match(text)
+    if m:
+        day = _parse_date(m, ref)
+        rest = text[m.end():].lstrip(", ")
+        return day, (_parse_time(rest) if rest else None)
+    return None, _parse_time(text)
+
+
+@lru_cache(maxsize=8192)
+def parse_when(when: str, start_date: str, ref: date) -> Optional[Tuple[datetime, Optional[datetime], Optional[str]]]:
+    """(start, end, tz suffix) as naive local datetimes, or None if unparseable.
+
+    Feeds repeat the same handful of strings across thousands of events,
+    hence the cache. An event with a date but no time runs all day; one with
+    only a start time has end None.
+    """
+    text = normalize(when)
+    tz = None
+    m = _tz_suffix_re.search(text)
+    if m and m.group("tz") in TZ_OFFSETS:
+        tz = m.group("tz")
+        text = text[:m.start()]
+    if not text:
+        text = normalize(start_date)
+        if not text:
+            return None
+
+    parts = _range_re.split(text, maxsplit=1)
+    start_day, start_t = _split_point(parts[0], ref)
+    if start_day is None:
+        fallback = _date_re.match(normalize(start_date))
+        start_day = _parse_date(fallback, ref) if fallback else None
+        if start_day is None:
+            return None
+    end_day, end_t = _split_point(parts[1], start_day) if len(parts) > 1 else (None, None)
+
+    if start_t is None:
+        if end_day is not None and end_day > start_day:
+            return datetime.combine(start_day, time_of_day()), datetime.combine(end_day, time_of_day()), tz
+        start = datetime.combine(start_day, time_of_day())
+        return start, start + timedelta(days=1), tz
+
+    # "7 – 9 PM": the start borrows the end's AM/PM
+    borrowed = start_t[2] is None and end_t is not None and end_t[2] is not None
+    start = datetime.combine(start_day, _clock(start_t[0], start_t[1], end_t[2] if borrowed else start_t[2]))
+    if end_t is None:
+        return start, None, tz
+    end = datetime.combine(end_day or start_day, _clock(*end_t))
+    if end_day is None and end < start:
+        if borrowed and end >= start - timedelta(hours=12):
+            start -= timedelta(hours=12)  # "11 – 1 PM" is 11 AM to 1 PM
+        else:
+            end += timedelta(days=1)  # "10 PM – 12 AM" ends the next day
+    return start, end, tz
+
+
+@lru_cache(maxsize=1024)
+def zone_for_location(venue_location: str) -> Optional[ZoneInfo]:
+    """IANA zone for a "City, ST" location, or None when the state is unknown."""
+    state = venue_location.rsplit(",", 1)[-1].strip().upper()[:2]
+    name = STATE_TZ.get(state)
+    try:
+        return ZoneInfo(name) if name else None
+    except ZoneInfoNotFoundError:
+        return None
+
+
+def _to_utc(local: datetime, tz: Optional[str], venue_location: str) -> datetime:
+    if tz is not None:
+        utc = local - timedelta(hours=TZ_OFFSETS[tz])
+    else:
+        zone = zone_for_location(venue_location)
+        if zone is None:
+            return local  # nothing better to go on; treat as UTC
+        utc = local.replace(tzinfo=zone).astimezone(timezone.utc).replace(tzinfo=None)
+    return utc
+
+
+def extract_times(item: Dict[str, Any], venue_location: str,
+                  ref: Optional[date] = None) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """(start_at, end_at) as naive UTC datetimes; (None, None) if the feed has no usable date.
+
+    `ref` (default: today) anchors year inference for dates printed without one.
+    """
+    start_date, when = extract_date_strings(item)
+    parsed = parse_when(when, start_date, ref or date.today())
+    if parsed is None:
+        return None, None
+    start, end, tz = parsed
+    return (_to_utc(start, tz, venue_location),
+            _to_utc(end, tz, venue_location) if end is not None else None)
+
+
+# (venue_address, venue_location, event_name, description, link, start_at, end_at)
+Row = Tuple[str, str, str, Optional[str], Optional[str], Optional[datetime], Optional[datetime]]
+
+
+def normalize_item(item: Dict[str, Any], ref: Optional[date] = None) -> Optional[Row]:
+    """A Row ready for insertion, or None to skip."""
+    if not isinstance(item, dict):
+        return None
+    vname = clip(normalize(extract_venue_address(item)), LEN_venue_address)
+    vloc  = clip(normalize(extract_venue_location(item)), LEN_VENUE_LOCATION)
+    ename = clip(normalize(extract_event_name(item)), LEN_EVENT_NAME)
+    if not vname or not vloc:
+        return None
+    start_at, end_at = extract_times(item, vloc, ref)
+    return vname, vloc, ename, extract_description(item), extract_link(item), start_at, end_at
+
+def _sha1(*parts: Optional[str]) -> str:
+    h = hashlib.sha1()
+    for p in parts:
+        h.update((p or "").encode("utf-8"))
+        h.update(b"\x1f")  # unit separator keeps ("ab", "c") != ("a", "bc")
+    return h.hexdigest()
+
+def event_key(item: Dict[str, Any], row: Row) -> str:
+    """Natural key for an event: title, date, venue and link."""
+    vname, vloc, ename, _, link = row[:5]
+    start, when = extract_date_strings(item)
+    return _sha1(ename, start, when, vname, vloc, link)
+
+def content_hash(row: Row) -> str:
+    """Hash of the mutable part of an event; a change here means an UPDATE."""
+    start_at, end_at = row[5], row[6]
+    return _sha1(row[3], start_at.isoformat() if start_at else None,
+                 end_at.isoformat() if end_at else None)
+
+# ---------- Streaming input ----------
+def iter_json_array(f, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array one at a time.
+
+    Only the current element plus one read chunk is held in memory, so the
+    feed file can be far larger than RAM.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buf, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buf = buf[pos:] + chunk
+        pos = 0
+        return True
+
+    def skip_ws():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf) or not fill():
+                return
+
+    skip_ws()
+    if pos >= len(buf) or buf[pos] != "[":
+        raise ValueError("JSON root must be an array of events")
+    pos += 1
+
+    first = True
+    while True:
+        skip_ws()
+        if pos >= len(buf):
+            raise ValueError("unexpected end of JSON array")
+        if buf[pos] == "]":
+            return
+        if not first:
+            if buf[pos] != ",":
+                raise ValueError(f"expected ',' in JSON array, got {buf[pos]!r}")
+            pos += 1
+            skip_ws()
+        first = False
+
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+                # a value ending exactly at the buffer edge may be cut short (e.g. a number)
+                if end < len(buf) or eof:
+                    break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            if not fill():
+                # eof reached: one last attempt (raises if the value is truncated)
+                value, end = decoder.raw_decode(buf, pos)
+                break
+        pos = end
+        yield value
+
 # ---------- DB Operations ----------
 def upsert_venue(cur, venue_address: str, venue_location: str):
+    lat, lng = geocode(venue_location) or (None, None)
     sql = """
-        INSERT INTO Venue (venue_address, venue_location)
-        VALUES (%s, %s)
+        INSERT INTO Venue (venue_address, venue_location, lat, lng)
+        VALUES (%s, %s, %s, %s)
         ON DUPLICATE KEY UPDATE
             venue_address = VALUES(venue_address),
-            venue_location = VALUES(venue_location)
+            venue_location = VALUES(venue_location),
+            lat = VALUES(lat),
+            lng = VALUES(lng)
     """
-    cur.execute(sql, (venue_address, venue_location))
+    cur.execute(sql, (venue_address, venue_location, lat, lng))
 
 
 def insert_event(cur, event_name: str, event_desc: Optional[str],
-                 venue_address: str, venue_location: str, link: Optional[str]):
+                 venue_address: str, venue_location: str, link: Optional[str],
+                 start_at: Optional[datetime] = None, end_at: Optional[datetime] = None):
     sql = """
-        INSERT INTO Single_Events (event_name, event_description, venue_address, venue_location, link)
-        VALUES (%s, %s, %s, %s, %s)
+        INSERT INTO Single_Events
+            (event_name, event_description, venue_address, venue_location, link, start_at, end_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
     """
-    cur.execute(sql, (event_name, event_desc, venue_address, venue_location, link))
+    cur.execute(sql, (event_name, event_desc, venue_address, venue_location, link, start_at, end_at))
 
 
 def process_events(cnx, events: List[Dict[str, Any]], batch_size: int = 500):
@@ -145,20 +467,12 @@ def process_events(cnx, events: List[Dict[str, Any]], batch_size: int = 500):
 
     try:
         for i, item in enumerate(events, 1):
-            vname = extract_venue_address(item)
-            vloc  = extract_venue_location(item)
-            ename = extract_event_name(item)
-            edesc = extract_description(item)
-            link  = extract_link(item)
-
             # normalize + enforce lengths
-            vname = clip(normalize(vname), LEN_venue_address)
-            vloc  = clip(normalize(vloc), LEN_VENUE_LOCATION)
-            ename = clip(normalize(ename), LEN_EVENT_NAME)
-
-            if not vname or not vloc:
+            row = normalize_item(item)
+            if row is None:
                 skipped += 1
                 continue
+            vname, vloc, ename, edesc, link, start_at, end_at = row
 
             # upsert venue
             upsert_venue(cur, vname, vloc)
@@ -166,7 +480,7 @@ def process_events(cnx, events: List[Dict[str, Any]], batch_size: int = 500):
 
             # insert event
             try:
-                insert_event(cur, ename, edesc, vname, vloc, link)
+                insert_event(cur, ename, edesc, vname, vloc, link, start_at, end_at)
                 inserted_events += 1
             except mysql.connector.Error as e:
                 if e.errno in (errorcode.ER_NO_REFERENCED_ROW_2, errorcode.ER_ROW_IS_REFERENCED_2):
@@ -184,42 +498,570 @@ def process_events(cnx, events: List[Dict[str, Any]], batch_size: int = 500):
     return upserted_venues, inserted_events, skipped
 
 
+# ---------- Backfill ----------
+def backfill_times(cnx, events: Iterable[Any], batch_size: int = 500) -> Dict[str, int]:
+    """Set start_at/end_at on events loaded before those columns existed.
+
+    The feed only shows events with a start_at, so rows from an older load
+    are invisible until this runs over the feed they came from. Rows are
+    matched to feed items by name, venue and link, and only rows whose
+    start_at is still NULL are touched, so it is safe to re-run.
+    """
+    cur = cnx.cursor()
+    stats = {"updated": 0, "undated": 0, "skipped": 0}
+    try:
+        for i, item in enumerate(events, 1):
+            row = normalize_item(item)
+            if row is None:
+                stats["skipped"] += 1
+                continue
+            vname, vloc, ename, _, link, start_at, end_at = row
+            if start_at is None:
+                stats["undated"] += 1
+                continue
+            cur.execute("""
+                UPDATE Single_Events
+                SET start_at = %s, end_at = %s
+                WHERE start_at IS NULL
+                  AND event_name = %s AND venue_address = %s AND venue_location = %s
+                  AND link <=> %s
+            """, (start_at, end_at, ename, vname, vloc, link))
+            stats["updated"] += cur.rowcount
+            if i % batch_size == 0:
+                cnx.commit()
+        cnx.commit()
+    finally:
+        cur.close()
+    return stats
+
+
+# ---------- Bulk (streaming) mode ----------
+def bulk_upsert_venues(cur, venues: List[Tuple[str, str]]):
+    if not venues:
+        return
+    cur.execute(f"""
+        INSERT INTO Venue (venue_address, venue_location, lat, lng)
+        VALUES {", ".join(["(%s, %s, %s, %s)"] * len(venues))}
+        ON DUPLICATE KEY UPDATE lat = VALUES(lat), lng = VALUES(lng)
+    """, [v for address, location in venues
+          for v in (address, location, *(geocode(location) or (None, None)))])
+
+
+def bulk_insert_events(cur, rows: List[Row]):
+    if not rows:
+        return
+    cur.execute(f"""
+        INSERT INTO Single_Events
+            (event_name, event_description, venue_address, venue_location, link, start_at, end_at)
+        VALUES {", ".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(rows))}
+    """, [v for vname, vloc, ename, edesc, link, start_at, end_at in rows
+          for v in (ename, edesc, vname, vloc, link, start_at, end_at)])
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _with_deadlock_retry(cnx, fn, attempts: int = 3):
+    # parallel writers can deadlock on shared Venue rows; the batch is simply retried
+    for attempt in range(1, attempts + 1):
+        try:
+            return fn()
+        except mysql.connector.Error as e:
+            cnx.rollback()
+            if e.errno != errorcode.ER_LOCK_DEADLOCK or attempt == attempts:
+                raise
+
+
+def load_rows_bulk(cnx, rows: Iterable[Row], batch_size: int = 500,
+                   progress_every: int = 10000, seen_venues: Optional[set] = None) -> Dict[str, Any]:
+    """Insert normalized rows: per batch one multi-row venue upsert (unseen
+    venues only) plus one multi-row event INSERT, then a commit."""
+    cur = cnx.cursor()
+    seen_venues = set() if seen_venues is None else seen_venues
+    stats = {"venues": 0, "inserted": 0}
+    batch: List[Row] = []
+    start = time.perf_counter()
+    next_report = progress_every
+
+    def flush():
+        new_venues = sorted({(r[0], r[1]) for r in batch} - seen_venues)
+
+        def write():
+            bulk_upsert_venues(cur, new_venues)
+            bulk_insert_events(cur, batch)
+            cnx.commit()
+        _with_deadlock_retry(cnx, write)
+
+        seen_venues.update(new_venues)
+        stats["venues"] += len(new_venues)
+        stats["inserted"] += len(batch)
+        batch.clear()
+
+    try:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                flush()
+            if progress_every and stats["inserted"] >= next_report:
+                elapsed = time.perf_counter() - start
+                print(f"  {stats['inserted']} events, {stats['inserted'] / elapsed:,.0f} rows/s, "
+                      f"peak RSS {peak_rss_mb():.1f} MB", file=sys.stderr)
+                next_report += progress_every
+        if batch:
+            flush()
+    finally:
+        cur.close()
+    return stats
+
+
+def process_events_stream(cnx, items: Iterable[Any], batch_size: int = 500,
+                          progress_every: int = 10000):
+    """Bulk-load raw feed items (e.g. from iter_json_array) with bounded memory."""
+    skipped = 0
+
+    def rows():
+        nonlocal skipped
+        for item in items:
+            row = normalize_item(item)
+            if row is None:
+                skipped += 1
+            else:
+                yield row
+
+    start = time.perf_counter()
+    stats = load_rows_bulk(cnx, rows(), batch_size=batch_size, progress_every=progress_every)
+    elapsed = time.perf_counter() - start
+    report = {
+        "seconds": round(elapsed, 2),
+        "rows_per_sec": round(stats["inserted"] / elapsed, 1) if elapsed else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+    return stats["venues"], stats["inserted"], skipped, report
+
+
+# ---------- Incremental mode ----------
+def prepare_item(item: Any) -> Optional[Tuple[Row, str, str]]:
+    """(row, event_key, content_hash) for incremental loading, or None to skip."""
+    row = normalize_item(item)
+    if row is None:
+        return None
+    return row, event_key(item, row), content_hash(row)
+
+
+def new_summary() -> Dict[str, int]:
+    return {"inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0,
+            "expired": 0, "kept_with_groups": 0}
+
+
+def load_rows_incremental(cnx, prepared: Iterable[Tuple[Row, str, str]], batch_size: int = 500,
+                          expire: bool = False, summary: Optional[Dict[str, int]] = None,
+                          seen_venues: Optional[set] = None, seen_keys: Optional[set] = None,
+                          locations: Optional[set] = None) -> Dict[str, int]:
+    """Insert new events, update changed ones and leave the rest alone.
+
+    Events are matched on event_key (unique index); content_hash tells
+    whether a known event changed. With expire=True, keyed events in the
+    feed's cities that were not in this feed are deleted, except ones that
+    already have groups (those chats stay). Callers loading several feeds
+    pass their own `seen_keys` / `locations` sets to expire once, over all
+    of them, via expire_missing().
+    """
+    cur = cnx.cursor()
+    summary = new_summary() if summary is None else summary
+    seen_venues = set() if seen_venues is None else seen_venues
+    seen_keys = set() if seen_keys is None else seen_keys
+    locations = set() if locations is None else locations
+    batch: Dict[str, Tuple[Row, str]] = {}
+
+    def flush():
+        keys = list(batch)
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        upserts = []
+        new_venues = []
+
+        def write():
+            counts.update(inserted=0, updated=0, unchanged=0)
+            upserts.clear()
+            cur.execute(f"""
+                SELECT event_key, content_hash
+                FROM Single_Events
+                WHERE event_key IN ({", ".join(["%s"] * len(keys))})
+            """, keys)
+            known = dict(cur.fetchall())
+
+            for key, (row, chash) in batch.items():
+                if key not in known:
+                    counts["inserted"] += 1
+                elif known[key] != chash:
+                    counts["updated"] += 1
+                else:
+                    counts["unchanged"] += 1
+                    continue
+                upserts.append((row, key, chash))
+
+            new_venues[:] = sorted({(r[0], r[1]) for r, _, _ in upserts} - seen_venues)
+            bulk_upsert_venues(cur, new_venues)
+            if upserts:
+                cur.execute(f"""
+                    INSERT INTO Single_Events
+                        (event_name, event_description, venue_address, venue_location, link,
+                         start_at, end_at, event_key, content_hash)
+                    VALUES {", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s, %s)"] * len(upserts))}
+                    ON DUPLICATE KEY UPDATE
+                        event_description = VALUES(event_description),
+                        start_at          = VALUES(start_at),
+                        end_at            = VALUES(end_at),
+                        content_hash      = VALUES(content_hash)
+                """, [v for (vname, vloc, ename, edesc, link, start_at, end_at), key, chash in upserts
+                      for v in (ename, edesc, vname, vloc, link, start_at, end_at, key, chash)])
+            cnx.commit()
+        _with_deadlock_retry(cnx, write)
+
+        seen_venues.update(new_venues)
+        for k, n in counts.items():
+            summary[k] += n
+        batch.clear()
+
+    try:
+        for prep in prepared:
+            row, key, chash = prep
+            if key in seen_keys and key not in batch:
+                summary["unchanged"] += 1  # repeated in the feed, already handled
+                continue
+            seen_keys.add(key)
+            locations.add(row[1])
+            batch[key] = (row, chash)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+
+        if expire and locations:
+            _expire_missing(cnx, cur, locations, seen_keys, summary)
+    finally:
+        cur.close()
+    return summary
+
+
+def expire_missing(cnx, locations: set, seen_keys: set) -> Dict[str, int]:
+    """Delete keyed events in `locations` that are not in `seen_keys` (events with groups are kept)."""
+    summary = {"expired": 0, "kept_with_groups": 0}
+    if locations:
+        cur = cnx.cursor()
+        try:
+            _expire_missing(cnx, cur, locations, seen_keys, summary)
+        finally:
+            cur.close()
+    return summary
+
+
+def process_events_incremental(cnx, items: Iterable[Any], batch_size: int = 500,
+                               expire: bool = False) -> Dict[str, int]:
+    summary = new_summary()
+
+    def prepared():
+        for item in items:
+            prep = prepare_item(item)
+            if prep is None:
+                summary["skipped"] += 1
+            else:
+                yield prep
+
+    return load_rows_incremental(cnx, prepared(), batch_size=batch_size, expire=expire,
+                                 summary=summary)
+
+
+def _expire_missing(cnx, cur, locations, seen_keys, summary, chunk: int = 500):
+    locs = sorted(locations)
+    cur.execute(f"""
+        SELECT e.event_id, e.event_key,
+               EXISTS (SELECT 1 FROM Match_Groups g WHERE g.event_id = e.event_id) AS has_groups
+        FROM Single_Events e
+        WHERE e.venue_location IN ({", ".join(["%s"] * len(locs))})
+          AND e.event_key IS NOT NULL
+    """, locs)
+    gone = []
+    for event_id, key, has_groups in cur.fetchall():
+        if key in seen_keys:
+            continue
+        if has_groups:
+            summary["kept_with_groups"] += 1
+        else:
+            gone.append(event_id)
+
+    for start in range(0, len(gone), chunk):
+        ids = gone[start:start + chunk]
+        cur.execute(f"DELETE FROM Single_Events WHERE event_id IN ({', '.join(['%s'] * len(ids))})", ids)
+        cnx.commit()
+    summary["expired"] = len(gone)
+
+
+# ---------- Multi-file (parallel) mode ----------
+FEED_EXTENSIONS = (".json", ".csv")
+
+
+def resolve_feed_paths(specs: List[str]) -> List[str]:
+    """Expand directories and glob patterns into a sorted list of feed files."""
+    paths = set()
+    for spec in specs:
+        if os.path.isdir(spec):
+            candidates = [os.path.join(spec, name) for name in os.listdir(spec)]
+        else:
+            candidates = glob.glob(spec)
+        paths.update(p for p in candidates
+                     if os.path.isfile(p) and p.lower().endswith(FEED_EXTENSIONS))
+    return sorted(paths)
+
+
+def unflatten_csv_row(flat: Dict[str, str]) -> Dict[str, Any]:
+    """Turn a CSV row with `a/b/0`-style headers back into the nested feed shape."""
+    out: Dict[str, Any] = {}
+    for path, value in flat.items():
+        if not path or value is None or value == "":
+            continue
+        parts = path.split("/")
+        cur: Any = out
+        for i, part in enumerate(parts):
+            last = i == len(parts) - 1
+            child: Any = None if last else ([] if parts[i + 1].isdigit() else {})
+            if isinstance(cur, list):
+                if not part.isdigit():
+                    break  # header disagrees with an earlier one about the shape; drop it
+                idx = int(part)
+                cur.extend([None] * (idx + 1 - len(cur)))
+                if last:
+                    cur[idx] = value
+                elif cur[idx] is None:
+                    cur[idx] = child
+                cur = cur[idx]
+            else:
+                if last:
+                    cur[part] = value
+                else:
+                    cur = cur.setdefault(part, child)
+            if not last and not isinstance(cur, (dict, list)):
+                break
+    return out
+
+
+def iter_feed_items(path: str) -> Iterator[Any]:
+    if path.lower().endswith(".csv"):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            for flat in csv.DictReader(f):
+                yield unflatten_csv_row(flat)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            yield from iter_json_array(f)
+
+
+def parse_feed_file(path: str) -> Dict[str, Any]:
+    """Process-pool worker: read and normalize one feed file.
+
+    A malformed or truncated file keeps everything read before the error,
+    which is reported alongside.
+    """
+    start = time.perf_counter()
+    prepared: List[Tuple[Row, str, str]] = []
+    skipped = 0
+    error = None
+    try:
+        for item in iter_feed_items(path):
+            prep = prepare_item(item)
+            if prep is None:
+                skipped += 1
+            else:
+                prepared.append(prep)
+    except (ValueError, csv.Error, OSError) as e:
+        error = str(e)
+    return {"path": path, "prepared": prepared, "skipped": skipped, "error": error,
+            "parse_s": round(time.perf_counter() - start, 3)}
+
+
+def load_feeds(paths: List[str], connect, workers: int, db_workers: int,
+               batch_size: int = 500, incremental: bool = False,
+               expire: bool = False) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Parse feeds in a process pool and write them through `db_workers`
+    threads, each holding its own connection.
+
+    With expire=True nothing is deleted per file: two feeds covering the
+    same city would delete each other's events. The keys and cities of
+    every file are collected instead, and expired once after all writers
+    are done, and only if every file loaded cleanly.
+    """
+    local = threading.local()
+    conns = []
+    conns_lock = threading.Lock()
+    all_keys: set = set()
+    all_locations: set = set()
+
+    def get_cnx():
+        if not hasattr(local, "cnx"):
+            local.cnx = connect()
+            local.seen_venues = set()
+            with conns_lock:
+                conns.append(local.cnx)
+        return local.cnx
+
+    def write(parsed):
+        start = time.perf_counter()
+        cnx = get_cnx()
+        stat = {"file": parsed["path"], "parse_s": parsed["parse_s"], "error": parsed["error"]}
+        try:
+            if incremental:
+                summary = new_summary()
+                summary["skipped"] = parsed["skipped"]
+                keys, locations = set(), set()
+                stat.update(load_rows_incremental(cnx, parsed["prepared"], batch_size=batch_size,
+                                                  summary=summary, seen_venues=local.seen_venues,
+                                                  seen_keys=keys, locations=locations))
+                with conns_lock:
+                    all_keys.update(keys)
+                    all_locations.update(locations)
+            else:
+                rows = (row for row, _, _ in parsed["prepared"])
+                stat.update(load_rows_bulk(cnx, rows, batch_size=batch_size, progress_every=0,
+                                           seen_venues=local.seen_venues))
+                stat["skipped"] = parsed["skipped"]
+        except mysql.connector.Error as e:
+            cnx.rollback()
+            stat["error"] = f"write failed: {e}"
+        stat["write_s"] = round(time.perf_counter() - start, 3)
+        return stat
+
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as parse_pool, \
+                ThreadPoolExecutor(max_workers=db_workers) as write_pool:
+            parse_futs = [parse_pool.submit(parse_feed_file, p) for p in paths]
+            write_futs = [write_pool.submit(write, fut.result()) for fut in as_completed(parse_futs)]
+            per_file = [f.result() for f in write_futs]
+        failed = sum(1 for st in per_file if st["error"])
+        expired = None
+        if incremental and expire and not failed:
+            expired = expire_missing(get_cnx(), all_locations, all_keys)
+    finally:
+        for cnx in conns:
+            cnx.close()
+
+    elapsed = time.perf_counter() - start
+    totals: Dict[str, Any] = {"files": len(per_file), "failed_files": failed}
+    for st in per_file:
+        for k, v in st.items():
+            if isinstance(v, int) and not isinstance(v, bool):
+                totals[k] = totals.get(k, 0) + v
+    if expired is not None:
+        totals.update(expired)
+    elif incremental and expire:
+        totals["expire_skipped"] = True  # a file failed; its missing events may not be gone
+    rows = totals.get("inserted", 0) + totals.get("updated", 0)
+    totals["seconds"] = round(elapsed, 2)
+    totals["rows_per_sec"] = round(rows / elapsed, 1) if elapsed else None
+    per_file.sort(key=lambda st: st["file"])
+    return per_file, totals
+
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--json", default=DEFAULT_JSON)
+    ap.add_argument("--feeds", nargs="+", metavar="DIR_OR_GLOB",
+                    help="load every .json/.csv feed in these directories / glob patterns in parallel")
+    ap.add_argument("--workers", default=os.cpu_count() or 2, type=int,
+                    help="with --feeds: parser processes")
+    ap.add_argument("--db-workers", default=4, type=int,
+                    help="with --feeds: writer threads (one DB connection each)")
     ap.add_argument("--host", default=DEFAULT_HOST)
     ap.add_argument("--port", default=DEFAULT_PORT, type=int)
     ap.add_argument("--user", default=DEFAULT_USER)
     ap.add_argument("--password", default=DEFAULT_PASS)
     ap.add_argument("--db", default=DEFAULT_DB)
     ap.add_argument("--batch", default=500, type=int)
+    ap.add_argument("--stream", action="store_true",
+                    help="parse the JSON array incrementally and insert with multi-row batches")
+    ap.add_argument("--incremental", action="store_true",
+                    help="only insert new / update changed events, matched by content fingerprint")
+    ap.add_argument("--expire", action="store_true",
+                    help="with --incremental: delete events in the feed's cities that are no longer "
+                         "in the feed (events with groups are kept)")
+    ap.add_argument("--backfill-times", action="store_true",
+                    help="set start_at/end_at on already-loaded events from --json, inserting nothing")
     args = ap.parse_args()
 
-    try:
-        with open(args.json, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except Exception as e:
-        print("Failed to read JSON:", e, file=sys.stderr)
-        sys.exit(1)
-
-    if not isinstance(data, list):
-        print("JSON root must be an array of events", file=sys.stderr)
-        sys.exit(1)
+    if args.expire and not args.incremental:
+        ap.error("--expire requires --incremental")
+    if args.backfill_times and (args.feeds or args.incremental or args.stream):
+        ap.error("--backfill-times only takes --json")
 
-    try:
-        cnx = mysql.connector.connect(
+    def connect():
+        return mysql.connector.connect(
             host=args.host, port=args.port,
             user=args.user, password=args.password,
             database=args.db,
             autocommit=False,
         )
+
+    if args.feeds:
+        paths = resolve_feed_paths(args.feeds)
+        if not paths:
+            print("No .json/.csv feeds matched", file=sys.stderr)
+            sys.exit(1)
+        try:
+            per_file, totals = load_feeds(paths, connect, workers=args.workers,
+                                          db_workers=args.db_workers, batch_size=args.batch,
+                                          incremental=args.incremental, expire=args.expire)
+        except mysql.connector.Error as e:
+            print("DB connection failed:", e, file=sys.stderr)
+            sys.exit(2)
+        for st in per_file:
+            counts = ", ".join(f"{k}={v}" for k, v in st.items()
+                               if isinstance(v, int) and not isinstance(v, bool))
+            line = f"{st['file']}: {counts} (parse {st['parse_s']}s, write {st['write_s']}s)"
+            if st["error"]:
+                line += f" ERROR: {st['error']}"
+            print(line)
+        print("Done. " + ", ".join(f"{k}={v}" for k, v in totals.items()))
+        sys.exit(3 if totals["failed_files"] else 0)
+
+    data = None
+    if not (args.stream or args.incremental or args.backfill_times):
+        try:
+            with open(args.json, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print("Failed to read JSON:", e, file=sys.stderr)
+            sys.exit(1)
+
+        if not isinstance(data, list):
+            print("JSON root must be an array of events", file=sys.stderr)
+            sys.exit(1)
+
+    try:
+        cnx = connect()
     except mysql.connector.Error as e:
         print("DB connection failed:", e, file=sys.stderr)
         sys.exit(2)
 
     try:
-        v, e, s = process_events(cnx, data, batch_size=args.batch)
-        print(f"Done. Upserted venues: {v}, Inserted events: {e}, Skipped: {s}")
+        if args.backfill_times:
+            with open(args.json, "r", encoding="utf-8") as f:
+                summary = backfill_times(cnx, iter_json_array(f), batch_size=args.batch)
+            print("Done. " + ", ".join(f"{k.capitalize()}: {v}" for k, v in summary.items()))
+        elif args.incremental:
+            with open(args.json, "r", encoding="utf-8") as f:
+                summary = process_events_incremental(cnx, iter_json_array(f), batch_size=args.batch,
+                                                     expire=args.expire)
+            print("Done. " + ", ".join(f"{k.replace('_', ' ').capitalize()}: {v}"
+                                       for k, v in summary.items()))
+        elif args.stream:
+            with open(args.json, "r", encoding="utf-8") as f:
+                v, e, s, stats = process_events_stream(cnx, iter_json_array(f), batch_size=args.batch)
+            print(f"Done. Upserted venues: {v}, Inserted events: {e}, Skipped: {s}")
+            print(f"Took {stats['seconds']}s ({stats['rows_per_sec']} rows/s), "
+                  f"peak RSS {stats['peak_rss_mb']} MB")
+        else:
+            v, e, s = process_events(cnx, data, batch_size=args.batch)
+            print(f"Done. Upserted venues: {v}, Inserted events: {e}, Skipped: {s}")
     except Exception as e:
         cnx.rollback()
         print("Error during load:", e, file=sys.stderr)
@@ -0,0 +1,132 @@
+"""
+Group formation for Matches.
+
+Forming groups used to be four separately committed statements (INSERT,
+COUNT, INSERT group, UPDATE ... WHERE group_id IS NULL), so two concurrent
+swipes could both see enough waiters and create duplicate groups, and a
+group swept up every waiter no matter how many there were.
+
+GroupMatcher does it in one transaction: it locks the event's ungrouped
+Matches rows (SELECT ... FOR UPDATE over the (event_id, group_id) index),
+splits them into groups of exactly `target_size` and assigns them.
+A concurrent matcher blocks on the same rows and, once it gets them, sees
+them already grouped.
+
+`on_formed`, if given, is called with {group_id: [usernames]} after each
+commit that formed groups, so in-process caches can pick them up.
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_GROUP_SIZE = 2
+
+
+class GroupMatcher:
+    def __init__(self, target_size: int = DEFAULT_GROUP_SIZE,
+                 on_formed: Optional[Callable[[Dict[int, List[str]]], None]] = None):
+        if target_size < 2:
+            raise ValueError("groups need at least 2 members")
+        self.target_size = target_size
+        self.on_formed = on_formed
+
+    def split(self, waiters: Sequence[Tuple[int, str]]) -> Tuple[List[List[Tuple[int, str]]], List[int]]:
+        """Chunk (match_id, username) waiters, oldest first, into full groups.
+
+        Returns (groups, duplicate_match_ids). A user waiting twice on the same
+        event keeps only their oldest row; leftovers short of a full group keep
+        waiting.
+        """
+        seen = set()
+        unique, dupes = [], []
+        for match_id, username in waiters:
+            if username in seen:
+                dupes.append(match_id)
+            else:
+                seen.add(username)
+                unique.append((match_id, username))
+
+        n_full = len(unique) // self.target_size * self.target_size
+        groups = [unique[i:i + self.target_size] for i in range(0, n_full, self.target_size)]
+        return groups, dupes
+
+    def form_groups(self, conn, event_id: int) -> Dict[int, List[str]]:
+        """Group waiters on `event_id`; returns {new group_id: [usernames]}."""
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT match_id, username
+                FROM Matches
+                WHERE event_id = %s AND group_id IS NULL
+                ORDER BY match_id
+                FOR UPDATE
+            """, (event_id,))
+            waiters = [(row["match_id"], row["username"]) for row in cursor.fetchall()]
+
+            groups, dupes = self.split(waiters)
+            formed = self._assign(cursor, event_id, groups)
+
+            if dupes:
+                placeholders = ",".join(["%s"] * len(dupes))
+                cursor.execute(f"DELETE FROM Matches WHERE match_id IN ({placeholders})", dupes)
+
+            conn.commit()
+            self._notify(formed)
+            return formed
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def assign_groups(self, conn, event_id: int,
+                      groups: List[List[Tuple[int, str]]]) -> Dict[int, List[str]]:
+        """Persist caller-chosen groups of (match_id, username) in one transaction.
+
+        Used by the bubble scheduler, which picks members itself. The rows are
+        re-locked first; a group any of whose rows got grouped in the meantime
+        is skipped, so a late scheduler run can never double-assign anyone.
+        """
+        match_ids = [mid for grp in groups for mid, _ in grp]
+        if not match_ids:
+            return {}
+        cursor = conn.cursor()
+        try:
+            placeholders = ",".join(["%s"] * len(match_ids))
+            cursor.execute(f"""
+                SELECT match_id
+                FROM Matches
+                WHERE match_id IN ({placeholders})
+                  AND event_id = %s AND group_id IS NULL
+                ORDER BY match_id
+                FOR UPDATE
+            """, match_ids + [event_id])
+            still_waiting = {row["match_id"] for row in cursor.fetchall()}
+
+            valid = [grp for grp in groups if all(mid in still_waiting for mid, _ in grp)]
+            formed = self._assign(cursor, event_id, valid)
+            conn.commit()
+            self._notify(formed)
+            return formed
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def _notify(self, formed: Dict[int, List[str]]):
+        if formed and self.on_formed is not None:
+            self.on_formed(formed)
+
+    def _assign(self, cursor, event_id: int, groups) -> Dict[int, List[str]]:
+        formed: Dict[int, List[str]] = {}
+        for grp in groups:
+            cursor.execute("INSERT INTO Match_Groups (event_id) VALUES (%s)", (event_id,))
+            group_id = cursor.lastrowid
+            ids = [mid for mid, _ in grp]
+            placeholders = ",".join(["%s"] * len(ids))
+            cursor.execute(
+                f"UPDATE Matches SET group_id = %s WHERE match_id IN ({placeholders})",
+                [group_id] + ids,
+            )
+            formed[group_id] = [username for _, username in grp]
+        return formed
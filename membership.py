@@ -0,0 +1,72 @@
+"""
+Who belongs to which group, for authorizing chat posts without a query.
+
+Every chat POST used to start with `SELECT 1 FROM Matches WHERE
+group_id=%s AND username=%s`. Membership only changes when groups are
+formed, so the member sets are kept here instead. GroupMatcher's
+on_formed fills them, and the group page primes them from the members it
+loads anyway. A group not seen yet costs one query, and its set is then
+cached. A "no" from the cache is re-checked against the database before
+it is trusted, since another process may have formed the group. Groups
+are evicted least-recently-used past `max_groups`.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, Optional
+
+
+class MembershipCache:
+    def __init__(self, max_groups: int = 10000):
+        self.max_groups = max_groups
+        self._groups: "OrderedDict[int, FrozenSet[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def put(self, group_id: int, members: Iterable[str]):
+        with self._lock:
+            self._groups[group_id] = frozenset(members)
+            self._groups.move_to_end(group_id)
+            while len(self._groups) > self.max_groups:
+                self._groups.popitem(last=False)
+                self.evictions += 1
+
+    def fill(self, formed: Dict[int, Iterable[str]]):
+        """GroupMatcher on_formed hook: {group_id: [usernames]}."""
+        for group_id, members in formed.items():
+            self.put(group_id, members)
+
+    def get(self, group_id: int) -> Optional[FrozenSet[str]]:
+        with self._lock:
+            members = self._groups.get(group_id)
+            if members is None:
+                self.misses += 1
+                return None
+            self._groups.move_to_end(group_id)
+            self.hits += 1
+            return members
+
+    def load(self, cursor, group_id: int) -> FrozenSet[str]:
+        cursor.execute("SELECT username FROM Matches WHERE group_id = %s", (group_id,))
+        members = frozenset(row["username"] for row in cursor.fetchall())
+        self.put(group_id, members)
+        return members
+
+    def is_member(self, cursor, group_id: int, username: str) -> bool:
+        members = self.get(group_id)
+        if members is not None and username in members:
+            return True
+        return username in self.load(cursor, group_id)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "groups": len(self._groups),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations.
+
+create_tables.sql is the full current schema for a fresh database. An
+existing database is brought up to date with the numbered files in
+migrations/ (`NNNN_description.sql`), applied in order. Each applied
+version is recorded in schema_migrations with a checksum of its file.
+
+MySQL commits every DDL statement on its own, so a migration can't be
+rolled back as a unit. Each file therefore holds one change per
+statement. "Already there" errors (table/column/index exists, index to
+drop is missing) are skipped. That way a migration that failed halfway
+can simply be re-run, and so can one whose change a database built from
+a newer create_tables.sql already has.
+
+    python migrate.py            # apply everything pending
+    python migrate.py --status   # list applied / pending versions
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+import pymysql
+from pymysql.cursors import DictCursor
+
+import settings
+
+log = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+# the change is already in place
+ER_TABLE_EXISTS = 1050
+ER_DUP_FIELDNAME = 1060
+ER_DUP_KEYNAME = 1061
+ER_CANT_DROP_FIELD_OR_KEY = 1091
+ALREADY_APPLIED = {ER_TABLE_EXISTS, ER_DUP_FIELDNAME, ER_DUP_KEYNAME, ER_CANT_DROP_FIELD_OR_KEY}
+
+_file_re = re.compile(r"^(\d+)_([\w-]+)\.sql$")
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    path: str
+    checksum: str
+
+
+# ---------- SQL files ----------
+def split_sql(sql: str) -> List[str]:
+    """Statements of a .sql file; comments are dropped first since they may contain ';'."""
+    sql = re.sub(r"/\*.*?\*/", "", sql, flags=re.S)
+    sql = re.sub(r"^\s*--.*$", "", sql, flags=re.M)
+    return [s.strip() for s in sql.split(";") if s.strip()]
+
+
+def discover(path: str = MIGRATIONS_DIR) -> List[Migration]:
+    found = []
+    for fname in sorted(os.listdir(path)):
+        m = _file_re.match(fname)
+        if not m:
+            continue
+        full = os.path.join(path, fname)
+        with open(full, "rb") as f:
+            checksum = hashlib.sha1(f.read()).hexdigest()
+        found.append(Migration(int(m.group(1)), m.group(2), full, checksum))
+    versions = [m.version for m in found]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"duplicate migration versions in {path}")
+    return found
+
+
+# ---------- Bookkeeping ----------
+def ensure_table(conn):
+    cur = conn.cursor()
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version     INT PRIMARY KEY,
+            name        VARCHAR(200) NOT NULL,
+            checksum    CHAR(40) NOT NULL,
+            applied_at  TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            duration_ms INT NOT NULL
+        ) ENGINE=InnoDB
+    """)
+    conn.commit()
+    cur.close()
+
+
+def applied_versions(conn) -> Dict[int, Dict]:
+    cur = conn.cursor()
+    cur.execute("SELECT version, name, checksum, applied_at FROM schema_migrations ORDER BY version")
+    rows = {row["version"]: row for row in cur.fetchall()}
+    cur.close()
+    return rows
+
+
+def apply(conn, migration: Migration) -> Dict:
+    with open(migration.path, encoding="utf-8") as f:
+        statements = split_sql(f.read())
+    cur = conn.cursor()
+    start = time.perf_counter()
+    skipped = 0
+    for stmt in statements:
+        try:
+            cur.execute(stmt)
+        except pymysql.MySQLError as e:
+            if e.args and e.args[0] in ALREADY_APPLIED:
+                log.info("%04d: already in place, skipped: %s", migration.version, e.args[1])
+                skipped += 1
+                continue
+            raise
+    duration_ms = int((time.perf_counter() - start) * 1000)
+    cur.execute(
+        "INSERT INTO schema_migrations (version, name, checksum, duration_ms) VALUES (%s, %s, %s, %s)",
+        (migration.version, migration.name, migration.checksum, duration_ms),
+    )
+    conn.commit()
+    cur.close()
+    return {"version": migration.version, "name": migration.name, "statements": len(statements),
+            "skipped": skipped, "duration_ms": duration_ms}
+
+
+def migrate(conn, path: str = MIGRATIONS_DIR, target: Optional[int] = None) -> List[Dict]:
+    """Apply every pending migration up to `target` (default: all), in order."""
+    ensure_table(conn)
+    done = applied_versions(conn)
+    results = []
+    for m in discover(path):
+        if target is not None and m.version > target:
+            break
+        if m.version in done:
+            if done[m.version]["checksum"] != m.checksum:
+                log.warning("migration %04d_%s changed after it was applied", m.version, m.name)
+            continue
+        results.append(apply(conn, m))
+    return results
+
+
+def status(conn, path: str = MIGRATIONS_DIR) -> List[Dict]:
+    ensure_table(conn)
+    done = applied_versions(conn)
+    return [{"version": m.version, "name": m.name,
+             "applied_at": str(done[m.version]["applied_at"]) if m.version in done else None,
+             "modified": m.version in done and done[m.version]["checksum"] != m.checksum}
+            for m in discover(path)]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    config = settings.from_env()
+    ap.add_argument("--host", default=config["DB_HOST"])
+    ap.add_argument("--port", default=config["DB_PORT"], type=int)
+    ap.add_argument("--user", default=config["DB_USER"])
+    ap.add_argument("--password", default=config["DB_PASSWORD"])
+    ap.add_argument("--db", default=config["DB_NAME"])
+    ap.add_argument("--dir", default=MIGRATIONS_DIR)
+    ap.add_argument("--target", type=int, help="stop after this version")
+    ap.add_argument("--status", action="store_true", help="list versions instead of applying")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    try:
+        conn = pymysql.connect(host=args.host, port=args.port, user=args.user,
+                               password=args.password, database=args.db, cursorclass=DictCursor)
+    except pymysql.MySQLError as e:
+        print("DB connection failed:", e, file=sys.stderr)
+        sys.exit(2)
+    try:
+        if args.status:
+            out = status(conn, args.dir)
+        else:
+            out = migrate(conn, args.dir, args.target)
+    except pymysql.MySQLError as e:
+        print("Migration failed:", e, file=sys.stderr)
+        sys.exit(3)
+    finally:
+        conn.close()
+    print(json.dumps(out, indent=2))
+
+
+if __name__ == "__main__":
+    main()
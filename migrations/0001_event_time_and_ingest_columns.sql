@@ -0,0 +1,7 @@
+/* start_at/end_at: UTC, parsed at ingest (load_events.extract_times).
+   event_key/content_hash: natural key + change detection for load_events.py --incremental. */
+ALTER TABLE Single_Events ADD COLUMN start_at DATETIME NULL;
+ALTER TABLE Single_Events ADD COLUMN end_at DATETIME NULL;
+ALTER TABLE Single_Events ADD COLUMN event_key CHAR(40) NULL;
+ALTER TABLE Single_Events ADD COLUMN content_hash CHAR(40) NULL;
+ALTER TABLE Single_Events ADD UNIQUE KEY uq_events_key (event_key);
@@ -0,0 +1,3 @@
+/* city centroid from city_centroids.csv; geo.VenueGeoIndex serves radius queries */
+ALTER TABLE Venue ADD COLUMN lat DOUBLE NULL;
+ALTER TABLE Venue ADD COLUMN lng DOUBLE NULL;
@@ -0,0 +1,8 @@
+/* swipe deck: keyset scan of one city's upcoming events by (start_at, event_id) */
+ALTER TABLE Single_Events ADD INDEX idx_events_location_start (venue_location, start_at);
+/* upcoming events everywhere (sampler, recommendations) */
+ALTER TABLE Single_Events ADD INDEX idx_events_start (start_at, venue_location);
+/* superseded by idx_events_location_start once the deck paged by start time */
+ALTER TABLE Single_Events DROP INDEX idx_events_location_id;
+/* only used with BUBBL_KEYWORD_BACKEND=fulltext */
+ALTER TABLE Single_Events ADD FULLTEXT INDEX ft_events_text (event_name, event_description);
@@ -0,0 +1,4 @@
+/* matcher locks an event's waiting list (group_id IS NULL) through this */
+ALTER TABLE Matches ADD INDEX idx_matches_event_group (event_id, group_id);
+/* a user's matches for given events (already waiting? already matched?) */
+ALTER TABLE Matches ADD INDEX idx_matches_user_event (username, event_id);
@@ -0,0 +1,2 @@
+/* chat history: latest page, before_id scroll-back and since_id catch-up are all range scans */
+ALTER TABLE Messages ADD INDEX idx_messages_group_id (group_id, messages_id);
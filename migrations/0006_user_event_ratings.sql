@@ -0,0 +1,11 @@
+/* one row per swipe; the PK doubles as the index for the deck's "already rated" anti-join */
+CREATE TABLE User_Event_Ratings (
+    username    VARCHAR(50) NOT NULL,
+    event_id    BIGINT UNSIGNED NOT NULL,
+    rating      TINYINT NOT NULL,
+    PRIMARY KEY (username, event_id),
+    FOREIGN KEY (username) REFERENCES Users(username)
+        ON DELETE CASCADE ON UPDATE CASCADE,
+    FOREIGN KEY (event_id) REFERENCES Single_Events(event_id)
+        ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE=InnoDB;
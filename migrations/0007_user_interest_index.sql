@@ -0,0 +1,2 @@
+/* users by interest (similarity posting lists, bubble scoring), covering */
+ALTER TABLE User_Interests ADD INDEX idx_user_interests_interest (interest_id, username);
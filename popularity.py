@@ -0,0 +1,154 @@
+"""
+In-memory popularity counters for Single_Events.
+
+Right-swipes used to run `UPDATE Single_Events SET popularity = popularity + 1`
+inline, so every concurrent "yes" on a trending event queued on the same
+row lock. Swipes now bump a striped in-process counter, and a background
+flusher applies the aggregated deltas in one batched UPDATE per interval
+(and once more on shutdown). Readers merge the persisted value with the
+deltas still pending, so popularity stays close to real time.
+
+Deltas that have not been flushed yet are lost if the process is killed
+hard; popularity is a ranking signal, not a record, so that's acceptable.
+"""
+
+import atexit
+import logging
+import threading
+from typing import Any, Dict, Iterable, List
+
+log = logging.getLogger(__name__)
+
+FLUSH_CHUNK = 500  # events per UPDATE statement
+
+
+class PopularityCounters:
+    def __init__(self, stripes: int = 16):
+        self._counts: List[Dict[int, int]] = [{} for _ in range(stripes)]
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def incr(self, event_id: int, n: int = 1):
+        i = event_id % len(self._locks)
+        with self._locks[i]:
+            counts = self._counts[i]
+            counts[event_id] = counts.get(event_id, 0) + n
+
+    def pending(self, event_id: int) -> int:
+        i = event_id % len(self._locks)
+        with self._locks[i]:
+            return self._counts[i].get(event_id, 0)
+
+    def has_pending(self) -> bool:
+        return any(self._counts)
+
+    def drain(self) -> Dict[int, int]:
+        """Take every pending delta, leaving the counters empty."""
+        out: Dict[int, int] = {}
+        for counts, lock in zip(self._counts, self._locks):
+            with lock:
+                out.update(counts)
+                counts.clear()
+        return out
+
+    def restore(self, deltas: Dict[int, int]):
+        # a failed flush puts its deltas back so the next one retries them
+        for event_id, n in deltas.items():
+            self.incr(event_id, n)
+
+    # ---------- read API ----------
+    def merge(self, rows: Iterable[Dict[str, Any]]):
+        """Add pending deltas to the `popularity` of event rows, in place."""
+        for row in rows:
+            delta = self.pending(row["event_id"])
+            if delta:
+                row["popularity"] = (row.get("popularity") or 0) + delta
+
+    # ---------- write-back ----------
+    def flush(self, conn) -> int:
+        """Apply all pending deltas; returns how many events were touched."""
+        deltas = self.drain()
+        if not deltas:
+            return 0
+        try:
+            _apply_deltas(conn, deltas)
+        except Exception:
+            self.restore(deltas)
+            raise
+        return len(deltas)
+
+
+def _apply_deltas(conn, deltas: Dict[int, int]):
+    # sorted ids give every flusher the same lock order
+    ids: List[int] = sorted(deltas)
+    cursor = conn.cursor()
+    try:
+        for start in range(0, len(ids), FLUSH_CHUNK):
+            chunk = ids[start:start + FLUSH_CHUNK]
+            cases = " ".join(["WHEN %s THEN %s"] * len(chunk))
+            placeholders = ",".join(["%s"] * len(chunk))
+            params = [v for eid in chunk for v in (eid, deltas[eid])] + chunk
+            cursor.execute(f"""
+                UPDATE Single_Events
+                   SET popularity = COALESCE(popularity, 0) + CASE event_id {cases} ELSE 0 END
+                 WHERE event_id IN ({placeholders})
+            """, params)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+class PopularityFlusher:
+    """Background thread that flushes `counters` through `pool` every `interval` seconds."""
+
+    def __init__(self, counters: PopularityCounters, pool, interval: float = 5.0):
+        self.counters = counters
+        self.pool = pool
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self.flushes = 0
+        self.failures = 0
+
+    def start(self):
+        # a thread inherited through fork() is not alive in the child; start a new one there
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="popularity-flusher", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        # final flush so a clean shutdown loses nothing
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+        self.flush_now()
+
+    def flush_now(self) -> int:
+        if not self.counters.has_pending():
+            return 0
+        try:
+            with self.pool.connection() as conn:
+                n = self.counters.flush(conn)
+            self.flushes += 1
+            return n
+        except Exception:
+            self.failures += 1
+            log.exception("popularity flush failed; deltas kept for the next run")
+            return 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "interval_s": self.interval,
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "pending_events": sum(len(c) for c in self.counters._counts),
+        }
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush_now()
@@ -0,0 +1,114 @@
+"""
+Per-user cache of /api/hybrid_recommendations responses.
+
+Entries are the serialized JSON bytes, so a hit is a dict lookup, and the
+byte cap counts what is actually held. They expire after `ttl` seconds and
+are evicted least-recently-used once either `max_entries` or `max_bytes`
+is exceeded.
+
+The app invalidates an entry when its user's interests change, when one
+of the user's similar-user neighbours adds Matches, and wholesale when
+new events are loaded. The counters in stats() (hit rate, bytes held,
+rebuild latency) are what to look at when sizing ttl and max_bytes.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+
+
+class RecommendationCache:
+    def __init__(self, ttl: float = 300.0, max_entries: int = 10000,
+                 max_bytes: int = 32 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.rebuilds = 0
+        self.rebuild_ms_total = 0.0
+        self.rebuild_ms_max = 0.0
+
+    def get(self, username: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, payload = entry
+            if time.monotonic() - stored_at > self.ttl:
+                self._drop(username)
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(username)
+            self.hits += 1
+            return payload
+
+    def put(self, username: str, payload: bytes, build_ms: float = 0.0):
+        with self._lock:
+            self.rebuilds += 1
+            self.rebuild_ms_total += build_ms
+            self.rebuild_ms_max = max(self.rebuild_ms_max, build_ms)
+            if len(payload) > self.max_bytes:
+                return  # would evict everything else and still not fit
+
+            self._drop(username)
+            self._entries[username] = (time.monotonic(), payload)
+            self._bytes += len(payload)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    # ---------- invalidation ----------
+    def invalidate(self, username: str):
+        with self._lock:
+            if self._drop(username):
+                self.invalidations += 1
+
+    def invalidate_many(self, usernames: Iterable[str]):
+        with self._lock:
+            for username in usernames:
+                if self._drop(username):
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+
+    def _drop(self, username: str) -> bool:
+        entry = self._entries.pop(username, None)
+        if entry is None:
+            return False
+        self._bytes -= len(entry[1])
+        return True
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_s": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "rebuilds": self.rebuilds,
+                "rebuild_ms_avg": round(self.rebuild_ms_total / self.rebuilds, 2) if self.rebuilds else None,
+                "rebuild_ms_max": round(self.rebuild_ms_max, 2),
+            }
@@ -0,0 +1,117 @@
+"""
+O(k) random event sampling for recommendation exploration.
+
+`ORDER BY RAND() LIMIT k` makes MySQL read and sort the whole of
+Single_Events on every call. EventSampler keeps the event ids in memory
+instead, as compact arrays: one for everything and one per venue_location.
+It draws k of them with random.sample over index ranges, which costs O(k)
+however big the table is. Pass `seed` for reproducible draws (tests,
+benchmarks).
+
+Only upcoming events (see feed.upcoming_since) are loaded, through the
+idx_events_start range. The arrays are reloaded in the background once
+older than `max_age`, so new, deleted and past events are picked up after
+a short delay.
+"""
+
+import logging
+import random
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from feed import upcoming_since
+
+log = logging.getLogger(__name__)
+
+
+class EventSampler:
+    def __init__(self, pool, max_age: float = 300.0):
+        self.pool = pool
+        self.max_age = max_age
+        self._all = array("Q")
+        self._by_location: Dict[str, array] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.RLock()  # re-entered by load() during a guarded first load
+        self._reloading = False
+        self._rng = random.Random()
+
+    # ---------- loading ----------
+    def load(self, rows: Iterable[Tuple[int, str]]):
+        """Replace the id arrays with (event_id, venue_location) pairs."""
+        everything = array("Q")
+        by_location: Dict[str, array] = {}
+        for event_id, location in rows:
+            everything.append(event_id)
+            by_location.setdefault(location, array("Q")).append(event_id)
+        with self._lock:
+            self._all, self._by_location = everything, by_location
+            self._loaded_at = time.monotonic()
+
+    def refresh(self, conn):
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT event_id, venue_location
+            FROM Single_Events
+            WHERE start_at >= %s
+        """, (upcoming_since(),))
+        rows = [(row["event_id"], row["venue_location"]) for row in cursor.fetchall()]
+        cursor.close()
+        conn.commit()
+        self.load(rows)
+
+    def _ensure_fresh(self):
+        if self._loaded_at is None:
+            # one cold load; concurrent first requests wait for it instead of each taking a loader slot
+            with self._lock:
+                if self._loaded_at is None:
+                    with self.pool.connection() as conn:
+                        self.refresh(conn)
+        elif time.monotonic() - self._loaded_at > self.max_age and not self._reloading:
+            self._reloading = True
+            threading.Thread(target=self._reload, name="sampler-reload", daemon=True).start()
+
+    def _reload(self):
+        try:
+            with self.pool.connection() as conn:
+                self.refresh(conn)
+        except Exception:
+            log.exception("event sampler reload failed")
+        finally:
+            self._reloading = False
+
+    # ---------- sampling ----------
+    def sample(self, k: int, location: Optional[str] = None, seed: Optional[int] = None) -> List[int]:
+        """k distinct random event ids, local to `location` when it has any.
+
+        A city with fewer than k events is topped up from everywhere else.
+        """
+        if self.pool is not None:
+            self._ensure_fresh()
+        rng = random.Random(seed) if seed is not None else self._rng
+        with self._lock:
+            everything = self._all
+            local = self._by_location.get(location) if location else None
+
+        picked: List[int] = []
+        if local:
+            picked = [local[i] for i in rng.sample(range(len(local)), min(k, len(local)))]
+        if len(picked) < k and everything:
+            # rejection-sample the rest; only loops much when nearly every id is taken
+            want = min(k, len(everything))
+            taken = set(picked)
+            while len(picked) < want:
+                eid = everything[rng.randrange(len(everything))]
+                if eid not in taken:
+                    taken.add(eid)
+                    picked.append(eid)
+        return picked
+
+    def stats(self):
+        with self._lock:
+            return {
+                "events": len(self._all),
+                "locations": len(self._by_location),
+                "age_s": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at else None,
+            }
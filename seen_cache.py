@@ -0,0 +1,53 @@
+"""
+Per-user "seen" sets for the swipe deck.
+
+Holds the event ids each recently active user has already rated so the
+feed can skip them in Python instead of anti-joining User_Event_Ratings on
+every refill. Users are evicted least-recently-used once `max_users` is
+reached; an evicted user is simply reloaded from the DB on their next
+request.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional, Set
+
+
+class SeenCache:
+    def __init__(self, max_users: int = 10000):
+        self.max_users = max_users
+        self._users: "OrderedDict[str, Set[int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, username: str) -> Optional[Set[int]]:
+        with self._lock:
+            seen = self._users.get(username)
+            if seen is None:
+                self.misses += 1
+                return None
+            self._users.move_to_end(username)
+            self.hits += 1
+            return seen
+
+    def put(self, username: str, event_ids: Iterable[int]) -> Set[int]:
+        with self._lock:
+            # keep anything recorded by a swipe that raced with the DB load
+            seen = set(event_ids) | self._users.get(username, set())
+            self._users[username] = seen
+            self._users.move_to_end(username)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+            return seen
+
+    def add(self, username: str, event_id: int):
+        # only track users we already hold; others are loaded fresh on demand
+        with self._lock:
+            seen = self._users.get(username)
+            if seen is not None:
+                seen.add(event_id)
+
+    def stats(self):
+        with self._lock:
+            return {"users": len(self._users), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,260 @@
+"""
+The components behind app.py and async_app.py, built from settings.
+
+Constructing Services does no I/O and starts no threads. The pool connects
+on first checkout, and the in-memory indexes load on first use or in
+warmup(). They load through a separate loader pool. A request that holds
+a pooled connection while it triggers a first load would otherwise wait on
+the pool it is holding, and with every connection held that deadlocks. The background threads (popularity flusher, bubble scheduler)
+start on the first request, through ensure_started(). So a pre-fork server
+can build and even warm the app in its master process. After fork, each
+worker forgets the inherited connections without closing them, since the
+parent still owns those sockets, and then starts its own threads. Its
+ChatBus stops vouching for "no newer messages" too, since a sibling worker
+may have taken the post (see chat_bus.py).
+
+warmup() loads everything a first request would otherwise load, and times
+each step. That includes the first deck page of the busiest cities.
+`startup` records those timings plus how long the first request came after
+the app was built (or after the worker was forked).
+"""
+
+import logging
+import os
+import threading
+import time
+import weakref
+from typing import Any, Dict, List, Mapping, Optional
+
+import pymysql
+from pymysql.cursors import DictCursor
+
+import feed
+import keyword_index
+import settings
+from bubbles import BubbleScheduler
+from chat_bus import ChatBus
+from db_pool import ConnectionPool
+from geo import VenueGeoIndex, normalize_loc
+from group_view import GroupViewCache
+from matcher import GroupMatcher
+from membership import MembershipCache
+from popularity import PopularityCounters, PopularityFlusher
+from rec_cache import RecommendationCache
+from sampler import EventSampler
+from seen_cache import SeenCache
+from similarity import SimilarityIndex
+
+log = logging.getLogger(__name__)
+
+_live: "weakref.WeakSet[Services]" = weakref.WeakSet()
+
+
+class Services:
+    def __init__(self, config: Mapping[str, Any], cursorclass=DictCursor, pool_size: Optional[int] = None):
+        self.created_at = time.perf_counter()
+        self.config = config
+        self.cursorclass = cursorclass
+        self.pool = ConnectionPool(self._connect, size=pool_size or config["DB_POOL_SIZE"],
+                                   timeout=config["DB_POOL_TIMEOUT"])
+        # the in-memory indexes load through their own connections: a request holding one from
+        # `pool` may trigger a first load, which must never wait on `pool` itself
+        self.loader_pool = ConnectionPool(self._connect, size=config["DB_LOADER_POOL_SIZE"],
+                                          timeout=config["DB_POOL_TIMEOUT"])
+
+        # right-swipes bump in-memory counters; a background thread writes them back in batches
+        self.popularity_counters = PopularityCounters()
+        self.popularity_flusher = PopularityFlusher(self.popularity_counters, self.pool,
+                                                    interval=config["POPULARITY_FLUSH_INTERVAL"])
+
+        # group page header + latest messages, and member sets for authorizing chat posts
+        self.group_views = GroupViewCache(max_groups=config["GROUP_VIEW_CACHE"])
+        self.memberships = MembershipCache(max_groups=config["MEMBERSHIP_CACHE"])
+
+        # groups are formed out of request by the scheduler (inline matching when it's off)
+        self.matcher = GroupMatcher(target_size=config["GROUP_SIZE"], on_formed=self.on_groups_formed)
+        self.bubble_scheduler_enabled = config["BUBBLE_SCHEDULER"]
+        self.bubble_scheduler = BubbleScheduler(self.pool, self.matcher, interval=config["BUBBLE_INTERVAL"])
+
+        self.seen_cache_enabled = config["SEEN_CACHE"]
+        self.seen_cache = SeenCache(max_users=config["SEEN_CACHE_USERS"])
+        self.rec_cache = RecommendationCache(ttl=config["REC_CACHE_TTL"], max_bytes=config["REC_CACHE_BYTES"])
+        self.similarity_index = SimilarityIndex(self.loader_pool, k=10, max_age=config["SIMILARITY_MAX_AGE"],
+                                                on_change=self.rec_cache.invalidate_many)
+        self.keyword_backend = config["KEYWORD_BACKEND"]
+        self.keyword_refresh = config["KEYWORD_REFRESH"]
+        # fulltext backend: new events are spotted from MAX(event_id) instead of the in-memory index
+        self._max_event_id: Optional[int] = None
+        self._max_event_checked_at = 0.0
+        self._max_event_lock = threading.Lock()
+        self.event_keywords = keyword_index.KeywordIndex(self.loader_pool, max_age=config["KEYWORD_REFRESH"],
+                                                         rebuild_age=config["KEYWORD_REBUILD"],
+                                                         on_change=self.rec_cache.clear)
+        self.event_sampler = EventSampler(self.loader_pool, max_age=config["SAMPLER_MAX_AGE"])
+        self.feed_radius_km = config["FEED_RADIUS_KM"]
+        self.venue_geo = VenueGeoIndex(self.loader_pool, max_age=config["GEO_MAX_AGE"])
+        # with several worker processes the bus can't vouch for messages posted elsewhere
+        self.chat_bus = ChatBus(history=config["CHAT_HISTORY"], vouch=config["CHAT_BUS_VOUCH"])
+
+        self.startup: Dict[str, Any] = {"pid": os.getpid(), "forked": False,
+                                        "warmup_ms": None, "first_request_ms": None}
+        self._started_pid = None
+        self._start_lock = threading.Lock()
+        _live.add(self)
+
+    def _connect(self):
+        return pymysql.connect(cursorclass=self.cursorclass, **settings.db_settings(self.config))
+
+    # ---------- hooks used by the routes ----------
+    def on_groups_formed(self, formed):
+        self.memberships.fill(formed)
+        for group_id in formed:
+            self.group_views.invalidate(group_id)
+
+    def after_swipes(self, username: str, results: List[Dict[str, Any]]):
+        """Cache upkeep once a batch of swipes has committed (app.py and async_app.py alike)."""
+        for r in results:
+            if r["status"] in ("ok", "duplicate", "already_waiting"):
+                self.seen_cache.add(username, r["event_id"])
+        # a new match changes the "liked by similar users" input of everyone who has this user as a neighbour
+        if any(r["status"] == "ok" and r["choice"] == "yes" for r in results):
+            self.rec_cache.invalidate_many(self.similarity_index.followers(username))
+
+    def message_posted(self, group_id: int, msg: Dict[str, Any]):
+        # wake every stream / long-poll waiting on this group, and drop its cached group page
+        self.chat_bus.publish(group_id, msg)
+        self.group_views.invalidate_messages(group_id)
+
+    def new_events(self) -> bool:
+        """Whether events were loaded since the last check; cached recommendations are stale then.
+
+        The memory backend learns this from catching its index up. With
+        fulltext there is no index to keep, so MAX(event_id) is read
+        instead, at most once every KEYWORD_REFRESH seconds.
+        """
+        if self.keyword_backend != "fulltext":
+            return self.event_keywords.ensure_fresh() > 0
+        if time.monotonic() - self._max_event_checked_at < self.keyword_refresh:
+            return False
+        if not self._max_event_lock.acquire(blocking=False):
+            return False  # another request is checking
+        try:
+            with self.loader_pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT MAX(event_id) AS max_id FROM Single_Events")
+                max_id = cursor.fetchone()["max_id"] or 0
+                cursor.close()
+                conn.commit()
+            previous, self._max_event_id = self._max_event_id, max_id
+            self._max_event_checked_at = time.monotonic()
+            return previous is not None and max_id > previous
+        finally:
+            self._max_event_lock.release()
+
+    def swipe_matcher(self):
+        # with the scheduler on, swipes only queue the user
+        return False if self.bubble_scheduler_enabled else self.matcher
+
+    def feed_locations(self, target_location: str) -> List[str]:
+        # the user's city first, then nearby venue_locations; just the city if it can't be geocoded
+        if not target_location or self.feed_radius_km <= 0:
+            return [target_location]
+        return self.venue_geo.locations_near(target_location, self.feed_radius_km)
+
+    # ---------- lifecycle ----------
+    def ensure_started(self):
+        """Start the background threads, once per process; called at the top of every request."""
+        if self._started_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._started_pid == os.getpid():
+                return
+            self.popularity_flusher.start()
+            if self.bubble_scheduler_enabled:
+                self.bubble_scheduler.start()
+            self.startup["first_request_ms"] = round((time.perf_counter() - self.created_at) * 1000, 1)
+            self._started_pid = os.getpid()
+
+    def stop(self):
+        self.bubble_scheduler.stop()
+        self.popularity_flusher.stop()
+        self.pool.close()
+        self.loader_pool.close()
+
+    def _after_fork(self):
+        self.pool.after_fork()
+        self.loader_pool.after_fork()
+        # siblings forked from the same master post to the same groups
+        self.chat_bus.disable_vouching()
+        self._start_lock = threading.Lock()
+        self.created_at = time.perf_counter()
+        self.startup.update(pid=os.getpid(), forked=True, first_request_ms=None)
+
+    # ---------- warmup ----------
+    def warmup(self, cities: Optional[int] = None) -> Dict[str, float]:
+        """Load the in-memory indexes and the busiest cities' decks; returns ms per step."""
+        cities = self.config["WARMUP_CITIES"] if cities is None else cities
+        timings = {}
+        with self.loader_pool.connection() as conn:
+            steps = [("similarity_index", self.similarity_index.build),
+                     ("keyword_index", self.event_keywords.refresh),
+                     ("event_sampler", self.event_sampler.refresh),
+                     ("venue_geo", self.venue_geo.refresh),
+                     ("city_decks", lambda c: self._warm_decks(c, cities))]
+            if self.keyword_backend == "fulltext":
+                del steps[1]  # the in-memory keyword index is never used
+            for name, load in steps:
+                start = time.perf_counter()
+                load(conn)
+                timings[name] = round((time.perf_counter() - start) * 1000, 1)
+        timings["total"] = round(sum(timings.values()), 1)
+        self.startup["warmup_ms"] = timings
+        log.info("warmup: %s", timings)
+        return timings
+
+    def _warm_decks(self, conn, cities: int):
+        # radius lookups are memoized per city, and the first page pulls its index pages into MySQL's buffer pool
+        if cities <= 0:
+            return
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT user_city, user_state, COUNT(*) AS users
+            FROM Users
+            GROUP BY user_city, user_state
+            ORDER BY users DESC
+            LIMIT %s
+        """, (cities,))
+        start = (feed.upcoming_since(), 0)
+        for row in cursor.fetchall():
+            location = normalize_loc(row["user_city"], row["user_state"])
+            if location:
+                cursor.execute(*feed.range_query(self.feed_locations(location), start, feed.FEED_PAGE_SIZE + 1))
+                cursor.fetchall()
+        cursor.close()
+        conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "db_pool": self.pool.stats(),
+            "db_loader_pool": self.loader_pool.stats(),
+            "rec_cache": self.rec_cache.stats(),
+            "seen_cache": self.seen_cache.stats(),
+            "group_views": self.group_views.stats(),
+            "memberships": self.memberships.stats(),
+            "similarity_index": self.similarity_index.stats(),
+            "keyword_index": self.event_keywords.stats(),
+            "event_sampler": self.event_sampler.stats(),
+            "venue_geo": self.venue_geo.stats(),
+            "chat_bus": self.chat_bus.stats(),
+            "popularity_flusher": self.popularity_flusher.stats(),
+            "bubble_scheduler": self.bubble_scheduler.stats(),
+        }
+
+
+def _after_fork_in_child():
+    for services in list(_live):
+        services._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,97 @@
+"""
+Settings for app.py and async_app.py.
+
+Every key below can be set in the environment as BUBBL_<KEY>
+(BUBBL_DB_HOST, BUBBL_DB_POOL_SIZE, ...). The value is parsed to the
+type of its default: "1"/"0" for switches, comma-separated lists for
+sets. create_app(config) layers an explicit mapping on top. Tests and
+tools can therefore build an app without touching os.environ.
+"""
+
+import os
+from typing import Any, Dict, Mapping, Optional
+
+PREFIX = "BUBBL_"
+
+DEFAULTS: Dict[str, Any] = {
+    # sessions
+    "SECRET_KEY": "secret-key",
+    # database
+    "DB_HOST": "localhost",
+    "DB_PORT": 3306,
+    "DB_USER": "mrocazap",
+    "DB_PASSWORD": "newpassword",
+    "DB_NAME": "mrocazap",
+    "DB_POOL_SIZE": 8,
+    "DB_POOL_TIMEOUT": 5.0,
+    "DB_LOADER_POOL_SIZE": 2,
+    # instrumentation
+    "PROFILE_RATE": 0.0,
+    "SLOW_REQUEST_MS": 500.0,
+    "ADMIN_USERS": frozenset(),
+    # background work
+    "POPULARITY_FLUSH_INTERVAL": 5.0,
+    "BUBBLE_SCHEDULER": True,
+    "BUBBLE_INTERVAL": 30.0,
+    "GROUP_SIZE": 2,
+    # caches and in-memory indexes
+    "GROUP_VIEW_CACHE": 2000,
+    "MEMBERSHIP_CACHE": 10000,
+    "SEEN_CACHE": True,
+    "SEEN_CACHE_USERS": 10000,
+    "REC_CACHE_TTL": 300.0,
+    "REC_CACHE_BYTES": 32 * 1024 * 1024,
+    "SIMILARITY_MAX_AGE": 600.0,
+    "KEYWORD_BACKEND": "memory",
+    "KEYWORD_REFRESH": 60.0,
+    "KEYWORD_REBUILD": 600.0,
+    "SAMPLER_MAX_AGE": 300.0,
+    "FEED_RADIUS_KM": 15.0,
+    "GEO_MAX_AGE": 300.0,
+    "CHAT_HISTORY": 100,
+    "CHAT_BUS_VOUCH": True,  # set to 0 when running several worker processes without fork
+    # startup
+    "WARMUP": False,
+    "WARMUP_CITIES": 20,
+    # async_app
+    "ASYNC_DB_POOL_SIZE": 32,
+    "ASYNC_SYNC_POOL_SIZE": 4,
+    "ASYNC_PORT": 5001,
+}
+
+
+def _parse(raw: str, default: Any) -> Any:
+    if isinstance(default, bool):
+        return raw.strip().lower() in ("1", "true", "yes", "on")
+    if isinstance(default, int):
+        return int(raw)
+    if isinstance(default, float):
+        return float(raw)
+    if isinstance(default, frozenset):
+        return frozenset(v.strip() for v in raw.split(",") if v.strip())
+    return raw
+
+
+def from_env(environ: Optional[Mapping[str, str]] = None) -> Dict[str, Any]:
+    """DEFAULTS overridden by whatever BUBBL_* variables are set."""
+    environ = os.environ if environ is None else environ
+    config = dict(DEFAULTS)
+    for key, default in DEFAULTS.items():
+        raw = environ.get(PREFIX + key)
+        if raw is not None:
+            try:
+                config[key] = _parse(raw, default)
+            except ValueError:
+                raise ValueError(f"{PREFIX}{key}={raw!r} is not a valid {type(default).__name__}")
+    return config
+
+
+def db_settings(config: Mapping[str, Any]) -> Dict[str, Any]:
+    """pymysql.connect() keyword arguments."""
+    return {
+        "host": config["DB_HOST"],
+        "port": config["DB_PORT"],
+        "user": config["DB_USER"],
+        "password": config["DB_PASSWORD"],
+        "database": config["DB_NAME"],
+    }
@@ -0,0 +1,133 @@
+"""
+User-similarity index for /api/hybrid_recommendations.
+
+Keeps the user x interest matrix in memory as sparse sets (interests per
+user plus a posting list of users per interest) and serves each user's
+top-K neighbours by Jaccard similarity. A user's neighbour list is worked
+out once, from the posting lists of their own interests only, and cached
+until something that could change it does. A request costs a dict lookup
+instead of a self-join over all of User_Interests.
+
+No route in the app writes User_Interests, so there is nothing to apply
+incrementally. The index is rebuilt in the background once it is older
+than `max_age`, and each rebuild reports the users whose interests
+changed through `on_change`.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+log = logging.getLogger(__name__)
+
+
+class SimilarityIndex:
+    def __init__(self, pool, k: int = 10, max_age: float = 600.0,
+                 on_change: Optional[Callable[[Set[str]], None]] = None):
+        self.pool = pool
+        self.k = k
+        self.max_age = max_age
+        # called with the usernames whose interests changed
+        self.on_change = on_change
+        self._interests: Dict[str, Set[int]] = {}
+        self._postings: Dict[int, Set[str]] = {}
+        self._neighbors: Dict[str, List[Tuple[str, float]]] = {}
+        self._followers: Dict[str, Set[str]] = {}  # user -> users whose cached top-K include them
+        self._lock = threading.RLock()
+        self._loaded_at: Optional[float] = None
+        self._rebuilding = False
+        self.rebuilds = 0
+        self.last_build_ms = 0.0
+
+    # ---------- build ----------
+    def build(self, conn):
+        start = time.perf_counter()
+        cursor = conn.cursor()
+        cursor.execute("SELECT username, interest_id FROM User_Interests")
+        interests: Dict[str, Set[int]] = {}
+        postings: Dict[int, Set[str]] = {}
+        for row in cursor.fetchall():
+            interests.setdefault(row["username"], set()).add(row["interest_id"])
+            postings.setdefault(row["interest_id"], set()).add(row["username"])
+        cursor.close()
+        conn.commit()
+
+        with self._lock:
+            first = self._loaded_at is None
+            changed = {u for u in interests.keys() | self._interests.keys()
+                       if interests.get(u) != self._interests.get(u)}
+            self._interests, self._postings = interests, postings
+            self._neighbors, self._followers = {}, {}
+            self._loaded_at = time.monotonic()
+            self.rebuilds += 1
+            self.last_build_ms = round((time.perf_counter() - start) * 1000, 2)
+        if changed and not first and self.on_change is not None:
+            self.on_change(changed)
+
+    def _ensure_fresh(self):
+        if self._loaded_at is None:
+            with self._lock:
+                if self._loaded_at is None:
+                    with self.pool.connection() as conn:
+                        self.build(conn)
+            return
+        if time.monotonic() - self._loaded_at > self.max_age and not self._rebuilding:
+            self._rebuilding = True
+            threading.Thread(target=self._rebuild, name="similarity-rebuild", daemon=True).start()
+
+    def _rebuild(self):
+        try:
+            with self.pool.connection() as conn:
+                self.build(conn)
+        except Exception:
+            log.exception("similarity index rebuild failed")
+        finally:
+            self._rebuilding = False
+
+    # ---------- queries ----------
+    def neighbors(self, username: str) -> List[str]:
+        """Top-K most similar usernames, most similar first."""
+        self._ensure_fresh()
+        with self._lock:
+            cached = self._neighbors.get(username)
+            if cached is None:
+                cached = self._compute(username)
+                self._neighbors[username] = cached
+                for other, _ in cached:
+                    self._followers.setdefault(other, set()).add(username)
+            return [user for user, _ in cached]
+
+    def followers(self, username: str) -> Set[str]:
+        """Users whose cached neighbour list currently includes `username`."""
+        with self._lock:
+            return set(self._followers.get(username, ()))
+
+    def _compute(self, username: str) -> List[Tuple[str, float]]:
+        mine = self._interests.get(username)
+        if not mine:
+            return []
+        shared: Dict[str, int] = {}
+        for iid in mine:
+            for other in self._postings.get(iid, ()):
+                if other != username:
+                    shared[other] = shared.get(other, 0) + 1
+
+        scored = [
+            (other, n / (len(mine) + len(self._interests[other]) - n), n)
+            for other, n in shared.items()
+        ]
+        # Jaccard first, then raw overlap, then name so results are stable
+        scored.sort(key=lambda t: (-t[1], -t[2], t[0]))
+        return [(other, jac) for other, jac, _ in scored[:self.k]]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "users": len(self._interests),
+                "interests": len(self._postings),
+                "cached_neighbor_lists": len(self._neighbors),
+                "rebuilds": self.rebuilds,
+                "last_build_ms": self.last_build_ms,
+                "age_s": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at else None,
+            }
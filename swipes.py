@@ -0,0 +1,191 @@
+"""
+Swipe ingestion shared by /api/events/<id>/swipe and /api/swipes/batch.
+
+A batch is applied in one transaction with set-based statements: one
+multi-row upsert into User_Event_Ratings and one multi-row INSERT into
+Matches, however many swipes it carries (popularity goes through the
+in-memory counters in popularity.py). Nothing is
+acknowledged before the commit, so an acknowledged swipe survives a
+restart; the client keeps unacknowledged swipes and simply resends them.
+Resending is safe: a "yes" the user already recorded is reported as a
+duplicate and has no further side effects.
+"""
+
+from typing import Any, Dict, List, Set, Tuple
+
+from matcher import GroupMatcher
+
+MAX_BATCH = 100
+
+
+def _placeholders(n: int) -> str:
+    return ",".join(["%s"] * n)
+
+
+# ---------- Validation ----------
+def normalize_swipes(items: List[Any]) -> List[Dict[str, Any]]:
+    """Turn raw client items into result dicts, marking bad or superseded ones.
+
+    When the same event appears twice, the swipe with the latest `ts` wins
+    (ties go to the later item).
+    """
+    results = []
+    latest: Dict[int, Dict[str, Any]] = {}
+    for index, item in enumerate(items):
+        res = {"index": index, "event_id": None, "choice": None, "status": "invalid", "group_id": None}
+        results.append(res)
+        if not isinstance(item, dict):
+            continue
+        try:
+            event_id = int(item.get("event_id"))
+        except (TypeError, ValueError):
+            continue
+        choice = str(item.get("choice") or "").lower()
+        ts = item.get("ts")
+        res["event_id"] = event_id
+        res["choice"] = choice
+        if event_id <= 0 or choice not in ("yes", "no"):
+            continue
+        res["ts"] = ts if isinstance(ts, (int, float)) else 0
+        res["status"] = "pending"
+
+        prev = latest.get(event_id)
+        if prev is None or res["ts"] >= prev["ts"]:
+            if prev is not None:
+                prev["status"] = "superseded"
+            latest[event_id] = res
+        else:
+            res["status"] = "superseded"
+
+    for res in results:
+        res.pop("ts", None)
+    return results
+
+
+# ---------- Statements ----------
+# (sql, params) builders, shared with the async entry point (async_app.py)
+Query = Tuple[str, List[Any]]
+
+
+def known_events_query(ids: List[int]) -> Query:
+    return f"SELECT event_id FROM Single_Events WHERE event_id IN ({_placeholders(len(ids))})", ids
+
+
+def previous_ratings_query(username: str, ids: List[int]) -> Query:
+    return f"""
+        SELECT event_id, rating
+        FROM User_Event_Ratings
+        WHERE username = %s AND event_id IN ({_placeholders(len(ids))})
+    """, [username] + ids
+
+
+def ratings_upsert(username: str, rated: List[Dict[str, Any]]) -> Query:
+    return f"""
+        INSERT INTO User_Event_Ratings (username, event_id, rating)
+        VALUES {",".join(["(%s, %s, %s)"] * len(rated))}
+        ON DUPLICATE KEY UPDATE rating = VALUES(rating)
+    """, [v for r in rated for v in (username, r["event_id"], 1 if r["choice"] == "yes" else 0)]
+
+
+def popularity_bump(yes_ids: List[int]) -> Query:
+    return f"""
+        UPDATE Single_Events
+           SET popularity = COALESCE(popularity, 0) + 1
+         WHERE event_id IN ({_placeholders(len(yes_ids))})
+    """, yes_ids
+
+
+def waiting_query(username: str, yes_ids: List[int]) -> Query:
+    # already signed up and waiting for a group -> don't queue them twice
+    return f"""
+        SELECT event_id FROM Matches
+        WHERE username = %s AND group_id IS NULL
+          AND event_id IN ({_placeholders(len(yes_ids))})
+    """, [username] + yes_ids
+
+
+def matches_insert(username: str, new_ids: List[int]) -> Query:
+    return (f"INSERT INTO Matches (event_id, username) VALUES {','.join(['(%s, %s)'] * len(new_ids))}",
+            [v for eid in new_ids for v in (eid, username)])
+
+
+def classify(pending: List[Dict[str, Any]], known: Set[int],
+             previous: Dict[int, int]) -> List[Dict[str, Any]]:
+    """Set each pending swipe's status; returns the ones to record."""
+    rated = []
+    for r in pending:
+        if r["event_id"] not in known:
+            r["status"] = "unknown_event"
+        elif r["choice"] == "yes" and previous.get(r["event_id"]) == 1:
+            r["status"] = "duplicate"
+        else:
+            r["status"] = "ok"
+            rated.append(r)
+    return rated
+
+
+def mark_waiting(rated: List[Dict[str, Any]], waiting: Set[int]) -> List[int]:
+    """Flag "yes" swipes on events the user already waits on; returns the events to queue them for."""
+    for r in rated:
+        if r["choice"] == "yes" and r["event_id"] in waiting:
+            r["status"] = "already_waiting"
+    return [r["event_id"] for r in rated if r["choice"] == "yes" and r["event_id"] not in waiting]
+
+
+# ---------- Ingestion ----------
+def apply_swipes(conn, username: str, results: List[Dict[str, Any]],
+                 counters=None, matcher: GroupMatcher = None) -> List[Dict[str, Any]]:
+    """Apply the "pending" entries of `results` (from normalize_swipes) in one
+    transaction, filling in each entry's status and group_id.
+
+    Popularity bumps go to `counters` (a popularity.PopularityCounters) once
+    the transaction commits; without it they are written inline. After the
+    commit, `matcher` groups the waiters of every newly liked event; pass
+    matcher=False to leave grouping to someone else.
+    """
+    if matcher is None:
+        matcher = GroupMatcher()
+    pending = [r for r in results if r["status"] == "pending"]
+    if not pending:
+        return results
+
+    cursor = conn.cursor()
+    ids = [r["event_id"] for r in pending]
+    try:
+        cursor.execute(*known_events_query(ids))
+        known = {row["event_id"] for row in cursor.fetchall()}
+        cursor.execute(*previous_ratings_query(username, ids))
+        previous = {row["event_id"]: row["rating"] for row in cursor.fetchall()}
+
+        rated = classify(pending, known, previous)
+        if rated:
+            cursor.execute(*ratings_upsert(username, rated))
+
+        yes_ids = [r["event_id"] for r in rated if r["choice"] == "yes"]
+        if yes_ids:
+            if counters is None:
+                cursor.execute(*popularity_bump(yes_ids))
+            cursor.execute(*waiting_query(username, yes_ids))
+            new_ids = mark_waiting(rated, {row["event_id"] for row in cursor.fetchall()})
+            if new_ids:
+                cursor.execute(*matches_insert(username, new_ids))
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    if counters is not None:
+        for eid in yes_ids:
+            counters.incr(eid)
+
+    # each event is grouped in its own short transaction, in id order
+    if matcher:
+        queued = {r["event_id"]: r for r in rated if r["status"] == "ok" and r["choice"] == "yes"}
+        for eid in sorted(queued):
+            for group_id, members in matcher.form_groups(conn, eid).items():
+                if username in members:
+                    queued[eid]["group_id"] = group_id
+    return results